@@ -28,7 +28,7 @@ const CommentSection = ({ postId }) => {
       }
 
       const data = await response.json();
-      setComments(data);
+      setComments(data.results);
     } catch (err) {
       setError(err.message);
     } finally {
@@ -264,11 +264,11 @@ const CommentSection = ({ postId }) => {
               <button
                 onClick={() => handleLike(comment.id)}
                 className={`text-sm flex items-center gap-1 ${
-                  comment.has_liked ? 'text-blue-600' : 'text-gray-500'
+                  comment.viewer_has_liked ? 'text-blue-600' : 'text-gray-500'
                 } hover:text-blue-600`}
               >
                 <span>👍</span>
-                <span>{comment.likes_count || 0}</span>
+                <span>{comment.like_count || 0}</span>
               </button>
               {user && (
                 <button
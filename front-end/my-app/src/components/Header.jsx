@@ -11,7 +11,7 @@ const SearchResult = ({ result, type }) => {
         className="block p-4 hover:bg-gray-50 border-b last:border-b-0"
       >
         <h3 className="font-medium text-gray-900">{result.title}</h3>
-        <p className="text-sm text-gray-500 mt-1 line-clamp-2">{result.content}</p>
+        <p className="text-sm text-gray-500 mt-1 line-clamp-2">{result.excerpt}</p>
         <div className="text-xs text-gray-500 mt-1">
           Posted by {result.author} in /{result.sub_forum_name}
         </div>
@@ -18,18 +18,53 @@ export const AuthProvider = ({ children }) => {
     }
   };
 
+  // 角色变更后旧的 access token 返回 401 token_revoked，用 refresh token 换一个带有新声明的 access token
+  const refreshAccessToken = async () => {
+    const refresh_token = localStorage.getItem('refresh_token');
+    if (!refresh_token) {
+      return null;
+    }
+    const response = await fetch('/api/auth/token/refresh/', {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/json',
+      },
+      body: JSON.stringify({ refresh: refresh_token }),
+    });
+    if (!response.ok) {
+      console.error('Failed to refresh access token:', response.status);
+      return null;
+    }
+    const data = await response.json();
+    // 未开启 ROTATE_REFRESH_TOKENS 时只返回新的 access token
+    updateTokens(data.access, data.refresh || refresh_token);
+    return data.access;
+  };
+
   // 从后端获取最新的用户信息
   const updateUserInfo = async () => {
     console.log('Starting updateUserInfo...');
     try {
-      const token = localStorage.getItem('access_token');
+      let token = localStorage.getItem('access_token');
       console.log('Using token:', token);
 
-      const response = await fetch('/api/user/detail/', {
+      const fetchUserDetail = (accessToken) => fetch('/api/user/detail/', {
         headers: {
-          'Authorization': `Bearer ${token}`
+          'Authorization': `Bearer ${accessToken}`
         }
       });
+      let response = await fetchUserDetail(token);
+
+      if (response.status === 401) {
+        const errorData = await response.clone().json().catch(() => ({}));
+        if (errorData.code === 'token_revoked') {
+          console.log('Token revoked, refreshing access token');
+          token = await refreshAccessToken();
+          if (token) {
+            response = await fetchUserDetail(token);
+          }
+        }
+      }
 
       console.log('Response status:', response.status);
       if (response.ok) {
@@ -171,6 +206,7 @@ export const AuthProvider = ({ children }) => {
     logout,
     loading,
     updateTokens,
+    refreshAccessToken,
     updateUserInfo  // 导出 updateUserInfo 函数
   };
 
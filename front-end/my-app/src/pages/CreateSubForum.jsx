@@ -5,7 +5,7 @@ import BackButton from '../components/BackButton';
 
 const CreateSubForum = () => {
   const navigate = useNavigate();
-  const { user, updateUserInfo } = useAuth();
+  const { user, updateUserInfo, updateTokens } = useAuth();
   const [errors, setErrors] = useState({});
   const [formData, setFormData] = useState({
     name: '',
@@ -70,6 +70,11 @@ const CreateSubForum = () => {
         return;
       }
 
+      // 创建者成为子论坛管理员时旧令牌已失效，换成响应中带有新角色的令牌
+      if (data.tokens) {
+        updateTokens(data.tokens.access, data.tokens.refresh);
+      }
+
       // 创建成功后，重新获取用户信息并等待完成
       try {
         await updateUserInfo();
@@ -80,7 +80,7 @@ const Profile = () => {
       const commentsData = await commentsResponse.json();
 
       setUserDetail(userDetailData);
-      setPosts(postsData);
+      setPosts(postsData.results);
       setComments(commentsData);
       setManagedSubforums(managedSubforumsData);
     } catch (err) {
@@ -1,7 +1,6 @@
 import React, { useState, useEffect } from 'react';
 import { useParams, Link, useNavigate } from 'react-router-dom';
 import { useAuth } from '../context/AuthContext';
-import ReactMarkdown from 'react-markdown';
 import BackButton from '../components/BackButton';
 
 const AdminModal = ({ isOpen, onClose, admins, moderators }) => {
@@ -114,7 +113,7 @@ const SubForum = () => {
       }
 
       const postsData = await postsResponse.json();
-      setPosts(postsData);
+      setPosts(postsData.results);
     } catch (err) {
       setError(err.message);
     } finally {
@@ -269,11 +268,7 @@ const SubForum = () => {
                       {post.title}
                     </h3>
                     <div className="mt-2 text-gray-600 line-clamp-2 prose prose-sm">
-                      {post.format === 'markdown' ? (
-                        <ReactMarkdown>{post.content}</ReactMarkdown>
-                      ) : (
-                        post.content
-                      )}
+                      {post.excerpt}
                     </div>
                   </Link>
                   <div className="mt-4 flex items-center gap-4 text-sm text-gray-500">
@@ -0,0 +1,80 @@
+from django.db import DEFAULT_DB_ALIAS
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .models import User
+from .blacklist import blacklist_filter
+
+# 写入令牌的用户声明，ClaimsJWTAuthentication 直接用它们构造 request.user
+AUTH_CLAIMS = ('username', 'role', 'is_banned', 'is_active', 'auth_version')
+
+
+def add_auth_claims(token, user):
+    for claim in AUTH_CLAIMS:
+        token[claim] = getattr(user, claim)
+
+
+class ClaimsRefreshToken(RefreshToken):
+    """
+    带有 role、is_banned、is_active、auth_version 声明的刷新令牌
+    - 刷新时如果令牌中的 auth_version 已过期，从数据库读取最新的声明写入新的访问令牌
+    - 检查黑名单时先查进程内的过滤器，确定不在黑名单中时不再查询数据库
+    """
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        add_auth_claims(token, user)
+        return token
+
+    def check_blacklist(self):
+        if blacklist_filter.might_contain(self.payload[api_settings.JTI_CLAIM]):
+            super().check_blacklist()
+
+    def blacklist(self):
+        result = super().blacklist()
+        blacklist_filter.add(self.payload[api_settings.JTI_CLAIM])
+        return result
+
+    @property
+    def access_token(self):
+        access = super().access_token
+        user_id = self[api_settings.USER_ID_CLAIM]
+        if access.get('auth_version') != User.current_auth_version(user_id):
+            user = User.objects.filter(pk=user_id).first()
+            if user is not None:
+                add_auth_claims(access, user)
+        return access
+
+
+class ClaimsTokenRefreshSerializer(TokenRefreshSerializer):
+    token_class = ClaimsRefreshToken
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """
+    从令牌声明构造 request.user，不再每个请求查询 users 表
+    - 令牌中的 auth_version 与当前版本（缓存）不一致时拒绝，角色变更、全局封禁和停用用户会增加版本
+    - 与 JWTAuthentication 一样按 CHECK_USER_IS_ACTIVE 拒绝已停用的用户
+    - 声明之外的字段（email、created_at 等）是延迟字段，第一次访问时才查询数据库
+    - 没有这些声明的旧令牌回退为查询数据库
+    """
+    def get_user(self, validated_token):
+        if any(claim not in validated_token for claim in AUTH_CLAIMS):
+            return super().get_user(validated_token)
+
+        user_id = validated_token[api_settings.USER_ID_CLAIM]
+        if validated_token['auth_version'] != User.current_auth_version(user_id):
+            # 与 simplejwt 一样在响应中带上 code，客户端据此刷新令牌而不是要求重新登录
+            raise AuthenticationFailed({
+                'detail': 'Token claims are out of date, refresh the access token.',
+                'code': 'token_revoked',
+            })
+        if api_settings.CHECK_USER_IS_ACTIVE and not validated_token['is_active']:
+            raise AuthenticationFailed('User is inactive', code='user_inactive')
+
+        claims = {'id': user_id, **{claim: validated_token[claim] for claim in AUTH_CLAIMS}}
+        field_names = [f.attname for f in User._meta.concrete_fields if f.attname in claims]
+        return User.from_db(DEFAULT_DB_ALIAS, field_names, [claims[name] for name in field_names])
@@ -0,0 +1,182 @@
+import hashlib
+import logging
+import math
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction, close_old_connections
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+from .caching import cache_is_shared
+
+logger = logging.getLogger(__name__)
+
+# 黑名单有新增时更换该缓存键的值，其他进程据此增量同步自己的过滤器
+BLACKLIST_VERSION_KEY = 'token_blacklist:version'
+BLACKLIST_MIN_CAPACITY = 10000
+BLACKLIST_ERROR_RATE = 0.001
+# 增量同步时重新读取 last_id 之前的这么多行：并发事务不一定按 id 顺序提交
+BLACKLIST_SYNC_OVERLAP = 100
+# 过滤器最多使用这么多秒，之后从黑名单表完整重建，限制任何遗漏的最长影响时间
+BLACKLIST_REBUILD_INTERVAL = 300
+TOKEN_PURGE_CHUNK_SIZE = 500
+
+
+class BloomFilter:
+    """
+    布隆过滤器：判断为不存在时一定不存在，判断为存在时可能误判
+    """
+    def __init__(self, capacity, error_rate=BLACKLIST_ERROR_RATE):
+        self.capacity = capacity
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def positions(self, item):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hash_count)]
+
+    def add(self, item):
+        for position in self.positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self.positions(item))
+
+
+class BlacklistFilter:
+    """
+    进程内的刷新令牌黑名单过滤器
+    第一次使用时从黑名单表加载未过期的 jti；之后只在共享缓存中的版本变化时，
+    增量读取新加入黑名单的行，并每隔 BLACKLIST_REBUILD_INTERVAL 秒完整重建。
+    过滤器判断为不在黑名单中时不再查询数据库，判断为可能在黑名单中时由调用方查询数据库确认；
+    缓存后端不在进程间共享时收不到其他进程的登出通知，总是由调用方查询数据库
+    """
+    def __init__(self):
+        self.bloom = None
+        self.last_id = 0
+        self.version = None
+        self.built_at = None
+        self.lock = threading.Lock()
+
+    def reset(self):
+        with self.lock:
+            self.bloom = None
+            self.last_id = 0
+            self.version = None
+            self.built_at = None
+
+    def rebuild(self):
+        rows = list(
+            BlacklistedToken.objects.filter(token__expires_at__gt=timezone.now())
+            .values_list('id', 'token__jti')
+        )
+        bloom = BloomFilter(max(BLACKLIST_MIN_CAPACITY, 2 * len(rows)))
+        for _, jti in rows:
+            bloom.add(jti)
+        self.bloom = bloom
+        self.last_id = max((row_id for row_id, _ in rows), default=0)
+        self.built_at = time.monotonic()
+
+    def sync(self):
+        version = cache.get(BLACKLIST_VERSION_KEY)
+        if version is None:
+            # 缓存中没有版本（首次启动或被清除）时设置一个，之后的变化都会更换它
+            cache.add(BLACKLIST_VERSION_KEY, uuid.uuid4().hex, None)
+            version = cache.get(BLACKLIST_VERSION_KEY)
+        stale = self.built_at is None or time.monotonic() - self.built_at > BLACKLIST_REBUILD_INTERVAL
+        if self.bloom is not None and not stale and version is not None and version == self.version:
+            return
+
+        with self.lock:
+            if self.bloom is None or stale or self.bloom.count > self.bloom.capacity:
+                self.rebuild()
+            else:
+                # 重新读取 last_id 之前的一小段，补上晚于更大 id 提交的行
+                rows = BlacklistedToken.objects.filter(
+                    id__gt=self.last_id - BLACKLIST_SYNC_OVERLAP
+                ).values_list('id', 'token__jti')
+                for row_id, jti in rows:
+                    if jti not in self.bloom:
+                        self.bloom.add(jti)
+                    self.last_id = max(self.last_id, row_id)
+            self.version = version
+
+    def might_contain(self, jti):
+        if not cache_is_shared():
+            return True
+        self.sync()
+        return jti in self.bloom
+
+    def add(self, jti):
+        """
+        令牌加入黑名单后调用：立即更新本进程的过滤器，事务提交后再通知其他进程同步
+        """
+        if self.bloom is not None:
+            self.bloom.add(jti)
+        transaction.on_commit(lambda: cache.set(BLACKLIST_VERSION_KEY, uuid.uuid4().hex, None))
+
+
+blacklist_filter = BlacklistFilter()
+
+
+def purge_expired_tokens(now=None, chunk_size=TOKEN_PURGE_CHUNK_SIZE):
+    """
+    分批删除已过期的 OutstandingToken 及其 BlacklistedToken
+    每批在单独的短事务中删除，避免长时间持有 SQLite 写锁
+    返回 (删除的 OutstandingToken 行数, 删除的 BlacklistedToken 行数)
+    """
+    if now is None:
+        now = timezone.now()
+    outstanding = blacklisted = 0
+    while True:
+        with transaction.atomic():
+            ids = list(OutstandingToken.objects.filter(expires_at__lt=now).values_list('id', flat=True)[:chunk_size])
+            if not ids:
+                break
+            blacklisted += BlacklistedToken.objects.filter(token_id__in=ids).delete()[0]
+            outstanding += OutstandingToken.objects.filter(id__in=ids).delete()[0]
+    return outstanding, blacklisted
+
+
+_token_purger = None
+_token_purger_lock = threading.Lock()
+
+
+def _run_token_purger(interval):
+    while True:
+        try:
+            outstanding, blacklisted = purge_expired_tokens()
+            if outstanding:
+                logger.info('Purged %d expired tokens (%d blacklisted)', outstanding, blacklisted)
+        except Exception:
+            logger.exception('Failed to purge expired tokens')
+        finally:
+            close_old_connections()
+        time.sleep(interval)
+
+
+def start_token_purger():
+    """
+    设置了 TOKEN_PURGE_INTERVAL 时，在当前进程中启动定期清理过期令牌的后台线程
+    由 WSGI / ASGI 入口在服务进程启动时调用，每个进程只启动一次
+    """
+    global _token_purger
+    interval = getattr(settings, 'TOKEN_PURGE_INTERVAL', None)
+    if not interval or _token_purger is not None:
+        return
+    with _token_purger_lock:
+        if _token_purger is None:
+            _token_purger = threading.Thread(
+                target=_run_token_purger, args=(interval,), name='token-purger', daemon=True
+            )
+            _token_purger.start()
+
@@ -0,0 +1,12 @@
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+
+
+def cache_is_shared(alias='default'):
+    """
+    缓存后端是否在进程之间共享
+    进程内缓存（LocMemCache）的失效只对当前进程生效，其他进程会一直读到旧值；
+    依赖缓存失效才能保证正确的数据（封禁状态、auth_version、黑名单版本）在这种后端下直接查询数据库
+    """
+    return not isinstance(caches[alias], (LocMemCache, DummyCache))
@@ -0,0 +1,298 @@
+import random
+import time
+
+from django.core.cache import cache
+from django.db import transaction, IntegrityError
+from django.db.models import Count, F, Sum
+
+from .models import SubForum, Post, Comment, ModeratorAssignment, PostVote, CommentVote, PostRanking, CounterShard
+from .ranking import record_post_activity
+
+RECONCILE_CHUNK_SIZE = 1000
+
+# 分片计数参数：一个统计窗口内写入次数达到阈值的对象，之后的计数写入随机分片
+COUNTER_SHARD_SLOTS = 16
+SHARD_RATE_WINDOW = 60  # 秒
+SHARD_PROMOTE_WRITES = 120
+
+TARGET_MODELS = {'post': Post, 'comment': Comment}
+
+
+def _target_type(obj):
+    return 'post' if isinstance(obj, Post) else 'comment'
+
+
+def _should_shard(obj, target_type):
+    """
+    统计对象在当前窗口内的计数写入次数，超过阈值时切换为分片模式
+    """
+    if obj.counters_sharded:
+        return True
+
+    key = f'counter-writes:{target_type}:{obj.pk}:{int(time.time() // SHARD_RATE_WINDOW)}'
+    cache.add(key, 0, timeout=SHARD_RATE_WINDOW * 2)
+    try:
+        writes = cache.incr(key)
+    except ValueError:  # 键刚好过期
+        return False
+    if writes < SHARD_PROMOTE_WRITES:
+        return False
+
+    type(obj).objects.filter(pk=obj.pk).update(counters_sharded=True)
+    obj.counters_sharded = True
+    return True
+
+
+def increment_counter(obj, field, delta=1):
+    """
+    原子地修改帖子或评论的计数字段
+    普通对象直接 F() 更新计数列；热门对象写入随机的分片槽位，不再竞争同一行
+    返回 True 表示写入了分片，热度由 fold_counter_shards 合并时统一更新
+    """
+    target_type = _target_type(obj)
+    if not _should_shard(obj, target_type):
+        type(obj).objects.filter(pk=obj.pk).update(**{field: F(field) + delta})
+        return False
+
+    _write_shard(target_type, obj.pk, field, delta)
+    return True
+
+
+def _write_shard(target_type, target_id, field, delta):
+    add_to_row(CounterShard, {
+        'target_type': target_type,
+        'target_id': target_id,
+        'field': field,
+        'slot': random.randrange(COUNTER_SHARD_SLOTS),
+    }, 'delta', delta)
+
+
+def add_to_row(model, lookup, field, delta, defaults=None):
+    """
+    对 lookup 唯一确定的行执行 field += delta，行不存在时创建
+    """
+    if model.objects.filter(**lookup).update(**{field: F(field) + delta}):
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(**{field: delta}, **lookup, **(defaults or {}))
+    except IntegrityError:
+        # 并发写入者先创建了这一行
+        model.objects.filter(**lookup).update(**{field: F(field) + delta})
+
+
+def increment_counters(objs, field, delta=1):
+    """
+    批量修改同一类型对象的计数字段，普通对象合并为一条 UPDATE
+    返回写入了分片的对象 pk 集合
+    """
+    if not objs:
+        return set()
+    model = type(objs[0])
+    sharded = set()
+    plain = []
+    for obj in objs:
+        # 每次写入只统计一次写入速率
+        target_type = _target_type(obj)
+        if _should_shard(obj, target_type):
+            _write_shard(target_type, obj.pk, field, delta)
+            sharded.add(obj.pk)
+        else:
+            plain.append(obj.pk)
+    if plain:
+        model.objects.filter(pk__in=plain).update(**{field: F(field) + delta})
+    return sharded
+
+
+def read_counter(obj, field):
+    """
+    读取计数的精确值：计数列中已合并的总数加上尚未合并的分片增量
+    """
+    value = getattr(obj, field)
+    if not obj.counters_sharded:
+        return value
+    pending = CounterShard.objects.filter(
+        target_type=_target_type(obj), target_id=obj.pk, field=field
+    ).aggregate(n=Sum('delta'))['n']
+    return value + (pending or 0)
+
+
+def fold_counter_shards():
+    """
+    把分片中的增量合并回计数列，并一次性更新帖子热度
+    返回合并的对象数
+    """
+    folded = 0
+    targets = list(
+        CounterShard.objects.exclude(delta=0).values_list('target_type', 'target_id').distinct()
+    )
+    for target_type, target_id in targets:
+        model = TARGET_MODELS[target_type]
+        with transaction.atomic():
+            shards = list(
+                CounterShard.objects.select_for_update()
+                .filter(target_type=target_type, target_id=target_id)
+                .exclude(delta=0)
+            )
+            totals = {}
+            for shard in shards:
+                totals[shard.field] = totals.get(shard.field, 0) + shard.delta
+                # 减去已合并的部分而不是删除，保留合并期间并发写入的增量
+                CounterShard.objects.filter(pk=shard.pk).update(delta=F('delta') - shard.delta)
+            model.objects.filter(pk=target_id).update(
+                **{field: F(field) + total for field, total in totals.items()}
+            )
+
+        if target_type == 'post':
+            post = Post.objects.filter(pk=target_id).only('id', 'sub_forum_id', 'created_at').first()
+            if post is not None:
+                record_post_activity(
+                    post,
+                    likes=totals.get('like_count', 0),
+                    comments=totals.get('comment_count', 0)
+                )
+        folded += 1
+
+    # 清理已合并完的槽位，以及目标已被删除的分片
+    CounterShard.objects.filter(delta=0).delete()
+    for target_type, model in TARGET_MODELS.items():
+        CounterShard.objects.filter(target_type=target_type).exclude(
+            target_id__in=model.objects.values('id')
+        ).delete()
+    return folded
+
+
+def _count_by(queryset, field, ids):
+    """
+    按 field 分组统计 ids 范围内的行数，返回 {id: count}
+    """
+    return dict(
+        queryset.filter(**{f'{field}__in': ids})
+        .values(field).annotate(n=Count('id')).values_list(field, 'n')
+    )
+
+
+def _reconcile(queryset, fields, compute, chunk_size, after_chunk=None):
+    """
+    按主键分块遍历 queryset，compute(ids) 返回 {field: {id: count}}
+    只写回与真实值不一致的行，每块一个短事务，避免长时间占用 SQLite 写锁
+    返回 (检查的行数, 修正的行数)
+    """
+    model = queryset.model
+    checked = fixed = 0
+    last_id = 0
+    while True:
+        with transaction.atomic():
+            objs = list(queryset.filter(id__gt=last_id).order_by('id').only('id', *fields)[:chunk_size])
+            if not objs:
+                break
+            ids = [obj.id for obj in objs]
+            counts = compute(ids)
+
+            changed = []
+            for obj in objs:
+                dirty = False
+                for field in fields:
+                    value = counts[field].get(obj.id, 0)
+                    if getattr(obj, field) != value:
+                        setattr(obj, field, value)
+                        dirty = True
+                if dirty:
+                    changed.append(obj)
+            if changed:
+                model.objects.bulk_update(changed, fields)
+            if after_chunk is not None:
+                after_chunk(ids, counts)
+        last_id = objs[-1].id
+        checked += len(objs)
+        fixed += len(changed)
+    return checked, fixed
+
+
+def _sync_rankings(post_ids, counts):
+    """
+    热度记录中的计数与帖子保持一致，分数由 refresh_hot_scores 重新计算
+    """
+    rankings = list(PostRanking.objects.filter(post_id__in=post_ids).only('id', 'post_id', 'like_count', 'comment_count'))
+    changed = []
+    for ranking in rankings:
+        like_count = counts['like_count'].get(ranking.post_id, 0)
+        comment_count = counts['comment_count'].get(ranking.post_id, 0)
+        if ranking.like_count != like_count or ranking.comment_count != comment_count:
+            ranking.like_count = like_count
+            ranking.comment_count = comment_count
+            changed.append(ranking)
+    if changed:
+        PostRanking.objects.bulk_update(changed, ['like_count', 'comment_count'])
+
+
+def _discard_shards(target_type):
+    """
+    计数已按源数据重新统计，尚未合并的分片增量随之作废
+    """
+    def discard(ids, counts):
+        CounterShard.objects.filter(target_type=target_type, target_id__in=ids).delete()
+    return discard
+
+
+def reconcile_post_counters(subforum_id=None, since=None, chunk_size=RECONCILE_CHUNK_SIZE):
+    """
+    重新统计帖子的 comment_count 和 like_count，并同步热度记录中的计数
+    """
+    posts = Post.objects.all()
+    if subforum_id is not None:
+        posts = posts.filter(sub_forum_id=subforum_id)
+    if since is not None:
+        posts = posts.filter(created_at__gte=since)
+
+    likes = PostVote.objects.filter(value='like')
+
+    def compute(ids):
+        return {
+            'comment_count': _count_by(Comment.objects.all(), 'post_id', ids),
+            'like_count': _count_by(likes, 'post_id', ids),
+        }
+
+    discard_shards = _discard_shards('post')
+
+    def after_chunk(ids, counts):
+        discard_shards(ids, counts)
+        _sync_rankings(ids, counts)
+
+    return _reconcile(posts, ['comment_count', 'like_count'], compute, chunk_size, after_chunk=after_chunk)
+
+
+def reconcile_comment_counters(subforum_id=None, since=None, chunk_size=RECONCILE_CHUNK_SIZE):
+    """
+    重新统计评论的 like_count
+    """
+    comments = Comment.objects.all()
+    if subforum_id is not None:
+        comments = comments.filter(post__sub_forum_id=subforum_id)
+    if since is not None:
+        comments = comments.filter(created_at__gte=since)
+
+    likes = CommentVote.objects.filter(value='like')
+
+    def compute(ids):
+        return {'like_count': _count_by(likes, 'comment_id', ids)}
+
+    return _reconcile(comments, ['like_count'], compute, chunk_size, after_chunk=_discard_shards('comment'))
+
+
+def reconcile_subforum_counters(subforum_id=None, chunk_size=RECONCILE_CHUNK_SIZE):
+    """
+    重新统计子论坛的 post_count 和 moderator_count
+    """
+    subforums = SubForum.objects.all()
+    if subforum_id is not None:
+        subforums = subforums.filter(id=subforum_id)
+
+    def compute(ids):
+        # 两个计数分别聚合，避免两次 JOIN 相互放大行数
+        return {
+            'post_count': _count_by(Post.objects.all(), 'sub_forum_id', ids),
+            'moderator_count': _count_by(ModeratorAssignment.objects.all(), 'sub_forum_id', ids),
+        }
+
+    return _reconcile(subforums, ['post_count', 'moderator_count'], compute, chunk_size)
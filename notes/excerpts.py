@@ -0,0 +1,43 @@
+import html
+import re
+
+from django.utils.html import strip_tags
+from django.utils.text import Truncator
+
+EXCERPT_LENGTH = 200
+
+# Markdown 语法：代码块、图片、链接、标题、引用、列表、强调等
+_MARKDOWN_PATTERNS = [
+    (re.compile(r'```.*?```', re.S), ' '),
+    (re.compile(r'`([^`]*)`'), r'\1'),
+    (re.compile(r'!\[([^\]]*)\]\([^)]*\)'), r'\1'),
+    (re.compile(r'\[([^\]]*)\]\([^)]*\)'), r'\1'),
+    (re.compile(r'^\s{0,3}#{1,6}\s*', re.M), ''),
+    (re.compile(r'^\s{0,3}>\s?', re.M), ''),
+    (re.compile(r'^\s*(?:[-*+]|\d+\.)\s+', re.M), ''),
+    (re.compile(r'^\s*(?:-{3,}|\*{3,}|_{3,})\s*$', re.M), ' '),
+    (re.compile(r'(\*\*|__|~~|\*|_)(.+?)\1'), r'\2'),
+]
+# 块级标签结束处补一个空格，避免相邻段落的文字粘在一起
+_HTML_BLOCK_END = re.compile(r'<(?:br|/p|/div|/li|/h[1-6]|/blockquote)\b[^>]*>', re.I)
+_WHITESPACE = re.compile(r'\s+')
+
+
+def strip_markup(content, format='markdown'):
+    """
+    去掉 Markdown 或 HTML 标记，返回纯文本
+    """
+    text = content or ''
+    if format == 'markdown':
+        for pattern, replacement in _MARKDOWN_PATTERNS:
+            text = pattern.sub(replacement, text)
+    text = _HTML_BLOCK_END.sub(' ', text)
+    text = html.unescape(strip_tags(text))
+    return _WHITESPACE.sub(' ', text).strip()
+
+
+def make_excerpt(content, format='markdown', length=EXCERPT_LENGTH):
+    """
+    生成帖子列表使用的纯文本摘要
+    """
+    return Truncator(strip_markup(content, format)).chars(length)
@@ -0,0 +1,91 @@
+from datetime import timedelta, timezone as dt_timezone
+
+from django.db.models import Case, F, Sum, Value, When
+from django.utils import timezone
+
+from .models import LikeBucket, DailyLikeBucket
+
+# 排行榜支持的滚动时间窗口，点赞同时计入小时分桶和按天汇总的分桶
+LEADERBOARD_WINDOWS = {
+    '24h': timedelta(hours=24),
+    '7d': timedelta(days=7),
+    '30d': timedelta(days=30),
+}
+# 这些窗口读取按天汇总的分桶，按整天滚动（包含今天），每个对象每天只读一行
+DAILY_WINDOWS = ('7d', '30d')
+BUCKET_RETENTION = max(window for name, window in LEADERBOARD_WINDOWS.items() if name not in DAILY_WINDOWS)
+DAILY_BUCKET_RETENTION = max(LEADERBOARD_WINDOWS[name] for name in DAILY_WINDOWS)
+
+
+def bucket_hour(at):
+    return at.replace(minute=0, second=0, microsecond=0)
+
+
+def bucket_day(at):
+    return at.astimezone(dt_timezone.utc).date()
+
+
+def record_likes(target_type, likes, at=None):
+    """
+    把点赞计入所在小时和所在天的分桶
+    likes 为 [(target, n)]，target 需要有 sub_forum_id（评论通过注解提供）
+    每张分桶表固定两条语句：补齐缺失的分桶，再用一条 UPDATE 累加全部目标的点赞数
+    """
+    at = at or timezone.now()
+    totals = {}
+    sub_forums = {}
+    for target, n in likes:
+        totals[target.pk] = totals.get(target.pk, 0) + n
+        sub_forums[target.pk] = target.sub_forum_id
+    if not totals:
+        return
+    _add_to_buckets(LikeBucket, {'hour': bucket_hour(at)}, target_type, totals, sub_forums)
+    _add_to_buckets(DailyLikeBucket, {'day': bucket_day(at)}, target_type, totals, sub_forums)
+
+
+def _add_to_buckets(model, period, target_type, totals, sub_forums):
+    model.objects.bulk_create([
+        model(target_type=target_type, target_id=target_id, sub_forum_id=sub_forums[target_id], likes=0, **period)
+        for target_id in totals
+    ], ignore_conflicts=True)
+    # 增量在数据库中累加，并发写入者不会互相覆盖
+    model.objects.filter(target_type=target_type, target_id__in=list(totals), **period).update(
+        likes=F('likes') + Case(
+            *[When(target_id=target_id, then=Value(n)) for target_id, n in totals.items()],
+            default=Value(0),
+        )
+    )
+
+
+def top_liked(target_type, window, subforum_id=None, limit=10, now=None):
+    """
+    返回时间窗口内点赞最多的 [(target_id, likes)]
+    只读取窗口内的分桶，不扫描 votes 表：24h 读取小时分桶，7d、30d 读取按天汇总的分桶
+    """
+    if now is None:
+        now = timezone.now()
+    if window in DAILY_WINDOWS:
+        # 今天的分桶也计入，窗口按整天向前滚动
+        since = bucket_day(now) - LEADERBOARD_WINDOWS[window] + timedelta(days=1)
+        buckets = DailyLikeBucket.objects.filter(target_type=target_type, day__gte=since)
+    else:
+        # 当前小时的分桶也计入，窗口按整小时向前滚动
+        since = bucket_hour(now) - LEADERBOARD_WINDOWS[window] + timedelta(hours=1)
+        buckets = LikeBucket.objects.filter(target_type=target_type, hour__gte=since)
+    if subforum_id is not None:
+        buckets = buckets.filter(sub_forum_id=subforum_id)
+    return list(
+        buckets.values('target_id').annotate(total=Sum('likes'))
+        .order_by('-total', '-target_id').values_list('target_id', 'total')[:limit]
+    )
+
+
+def prune_like_buckets(now=None):
+    """
+    删除超出对应时间窗口的小时分桶和按天分桶，返回删除的行数
+    """
+    if now is None:
+        now = timezone.now()
+    deleted, _ = LikeBucket.objects.filter(hour__lt=bucket_hour(now) - BUCKET_RETENTION).delete()
+    deleted_daily, _ = DailyLikeBucket.objects.filter(day__lt=bucket_day(now) - DAILY_BUCKET_RETENTION).delete()
+    return deleted + deleted_daily
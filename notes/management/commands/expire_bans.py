@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from ...models import SubForumBan
+
+
+class Command(BaseCommand):
+    help = 'Mark expired subforum bans as inactive in bounded batches (run periodically, e.g. from cron)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000, help='Number of bans updated per transaction')
+
+    def handle(self, *args, **options):
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size must be a positive integer')
+        expired = SubForumBan.expire_due(chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(f'Expired {expired} subforum bans'))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from ...counters import fold_counter_shards
+
+
+class Command(BaseCommand):
+    help = 'Fold pending sharded counter deltas into post and comment counters (run periodically, e.g. from cron)'
+
+    def handle(self, *args, **options):
+        folded = fold_counter_shards()
+        self.stdout.write(self.style.SUCCESS(f'Folded counters for {folded} objects'))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from ...leaderboards import prune_like_buckets
+
+
+class Command(BaseCommand):
+    help = 'Delete hourly and daily like buckets older than the leaderboard windows that read them (run daily, e.g. from cron)'
+
+    def handle(self, *args, **options):
+        deleted = prune_like_buckets()
+        self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} like buckets'))
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from ...blacklist import purge_expired_tokens, TOKEN_PURGE_CHUNK_SIZE
+
+
+class Command(BaseCommand):
+    help = 'Delete expired outstanding and blacklisted JWT refresh tokens in bounded batches (run daily, e.g. from cron)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=TOKEN_PURGE_CHUNK_SIZE,
+            help='Number of outstanding tokens deleted per transaction'
+        )
+
+    def handle(self, *args, **options):
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size must be a positive integer')
+        outstanding, blacklisted = purge_expired_tokens(chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Deleted {outstanding} outstanding tokens and {blacklisted} blacklisted tokens'
+        ))
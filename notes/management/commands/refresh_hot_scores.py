@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from ...ranking import backfill_rankings, refresh_hot_scores, REFRESH_CHUNK_SIZE
+
+
+class Command(BaseCommand):
+    help = 'Recompute hot scores for all posts (after reconciling counters or changing the formula)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=REFRESH_CHUNK_SIZE,
+            help='Number of ranking rows updated per transaction'
+        )
+        parser.add_argument(
+            '--backfill',
+            action='store_true',
+            help='Create missing ranking rows for posts that have none'
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        if options['backfill']:
+            created = backfill_rankings(chunk_size=chunk_size)
+            self.stdout.write(f'Created {created} ranking rows')
+
+        updated = refresh_hot_scores(chunk_size=chunk_size)
+        self.stdout.write(self.style.SUCCESS(f'Refreshed {updated} hot scores'))
@@ -0,0 +1,23 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from ...voting import replay_spool
+
+
+class Command(BaseCommand):
+    help = 'Write votes left in vote buffer spool files after a crash (run before starting workers)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--spool-path',
+            default=getattr(settings, 'VOTE_BUFFER_SPOOL_PATH', None),
+            help='Spool path prefix (defaults to VOTE_BUFFER_SPOOL_PATH)'
+        )
+
+    def handle(self, *args, **options):
+        spool_path = options['spool_path']
+        if not spool_path:
+            raise CommandError('No spool path configured')
+
+        created = replay_spool(str(spool_path))
+        self.stdout.write(self.style.SUCCESS(f'Replayed spool files, created {created} votes'))
@@ -0,0 +1,17 @@
+# Generated by Django 5.2 on 2026-10-17 06:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0002_post_cursor_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['sub_forum', 'created_at', 'id'], name='posts_subforum_created_idx'),
+        ),
+    ]
@@ -0,0 +1,84 @@
+# Generated by Django 5.2 on 2026-10-17 06:33
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+from django.db.models import Count
+
+# 与迁移时的 notes.ranking.hot_score 相同，冻结在迁移中
+COMMENT_WEIGHT = 2.0
+AGE_OFFSET_HOURS = 2.0
+GRAVITY = 1.8
+
+
+def hot_score(like_count, comment_count, created_at, now):
+    age_hours = max((now - created_at).total_seconds(), 0) / 3600
+    activity = like_count + comment_count * COMMENT_WEIGHT + 1
+    return activity / (age_hours + AGE_OFFSET_HOURS) ** GRAVITY
+
+
+def backfill_rankings(apps, schema_editor):
+    # 已有帖子的计数从 Vote 和 Comment 表聚合
+    Post = apps.get_model('notes', 'Post')
+    Vote = apps.get_model('notes', 'Vote')
+    Comment = apps.get_model('notes', 'Comment')
+    PostRanking = apps.get_model('notes', 'PostRanking')
+    now = django.utils.timezone.now()
+    last_id = 0
+    while True:
+        rows = list(
+            Post.objects.filter(id__gt=last_id).order_by('id')
+            .values_list('id', 'sub_forum_id', 'created_at')[:1000]
+        )
+        if not rows:
+            break
+        last_id = rows[-1][0]
+        post_ids = [row[0] for row in rows]
+        likes = dict(
+            Vote.objects.filter(target_type='post', target_id__in=post_ids, value='like')
+            .values('target_id').annotate(n=Count('id')).values_list('target_id', 'n')
+        )
+        comments = dict(
+            Comment.objects.filter(post_id__in=post_ids)
+            .values('post_id').annotate(n=Count('id')).values_list('post_id', 'n')
+        )
+        PostRanking.objects.bulk_create([
+            PostRanking(
+                post_id=post_id,
+                sub_forum_id=sub_forum_id,
+                like_count=likes.get(post_id, 0),
+                comment_count=comments.get(post_id, 0),
+                post_created_at=created_at,
+                score=hot_score(likes.get(post_id, 0), comments.get(post_id, 0), created_at, now),
+                updated_at=now,
+            )
+            for post_id, sub_forum_id, created_at in rows
+        ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0004_comment_cursor_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostRanking',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('like_count', models.IntegerField(default=0)),
+                ('comment_count', models.IntegerField(default=0)),
+                ('score', models.FloatField(default=0)),
+                ('post_created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('post', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='ranking', to='notes.post')),
+                ('sub_forum', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='post_rankings', to='notes.subforum')),
+            ],
+            options={
+                'db_table': 'post_rankings',
+                'indexes': [models.Index(fields=['sub_forum', '-score', '-post'], name='post_rankings_hot_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_rankings, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2 on 2026-10-17 06:35
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0005_post_ranking'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SubForumSubscription',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('sub_forum', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='subscriptions', to='notes.subforum')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='subscriptions', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'subforum_subscriptions',
+                'unique_together': {('user', 'sub_forum')},
+            },
+        ),
+    ]
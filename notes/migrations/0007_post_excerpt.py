@@ -0,0 +1,63 @@
+# Generated by Django 5.2 on 2026-10-17 06:37
+
+import html
+import re
+
+from django.db import migrations, models
+from django.utils.html import strip_tags
+from django.utils.text import Truncator
+
+# 与迁移时的 notes.excerpts.make_excerpt 相同，冻结在迁移中，之后修改摘要规则不会影响本迁移
+EXCERPT_LENGTH = 200
+MARKDOWN_PATTERNS = [
+    (re.compile(r'```.*?```', re.S), ' '),
+    (re.compile(r'`([^`]*)`'), r'\1'),
+    (re.compile(r'!\[([^\]]*)\]\([^)]*\)'), r'\1'),
+    (re.compile(r'\[([^\]]*)\]\([^)]*\)'), r'\1'),
+    (re.compile(r'^\s{0,3}#{1,6}\s*', re.M), ''),
+    (re.compile(r'^\s{0,3}>\s?', re.M), ''),
+    (re.compile(r'^\s*(?:[-*+]|\d+\.)\s+', re.M), ''),
+    (re.compile(r'^\s*(?:-{3,}|\*{3,}|_{3,})\s*$', re.M), ' '),
+    (re.compile(r'(\*\*|__|~~|\*|_)(.+?)\1'), r'\2'),
+]
+HTML_BLOCK_END = re.compile(r'<(?:br|/p|/div|/li|/h[1-6]|/blockquote)\b[^>]*>', re.I)
+WHITESPACE = re.compile(r'\s+')
+
+
+def make_excerpt(content, format):
+    text = content or ''
+    if format == 'markdown':
+        for pattern, replacement in MARKDOWN_PATTERNS:
+            text = pattern.sub(replacement, text)
+    text = HTML_BLOCK_END.sub(' ', text)
+    text = html.unescape(strip_tags(text))
+    return Truncator(WHITESPACE.sub(' ', text).strip()).chars(EXCERPT_LENGTH)
+
+
+def backfill_excerpts(apps, schema_editor):
+    Post = apps.get_model('notes', 'Post')
+    last_id = 0
+    while True:
+        posts = list(Post.objects.filter(id__gt=last_id).order_by('id').only('id', 'content', 'format')[:1000])
+        if not posts:
+            break
+        for post in posts:
+            post.excerpt = make_excerpt(post.content, post.format)
+        Post.objects.bulk_update(posts, ['excerpt'])
+        last_id = posts[-1].id
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0006_subforum_subscription'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='excerpt',
+            field=models.CharField(blank=True, default='', help_text='Plain-text preview of content for list views', max_length=255),
+        ),
+        migrations.RunPython(backfill_excerpts, migrations.RunPython.noop),
+    ]
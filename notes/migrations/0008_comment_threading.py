@@ -0,0 +1,65 @@
+# Generated by Django 5.2 on 2026-10-17 06:39
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# 与迁移时的 notes.models.encode_path_segment 相同，冻结在迁移中
+COMMENT_PATH_STEP = 8
+BASE36 = '0123456789abcdefghijklmnopqrstuvwxyz'
+
+
+def encode_path_segment(pk):
+    segment = ''
+    while pk:
+        pk, remainder = divmod(pk, 36)
+        segment = BASE36[remainder] + segment
+    return segment.rjust(COMMENT_PATH_STEP, '0')
+
+
+def backfill_paths(apps, schema_editor):
+    # 已有评论都没有父评论，作为根评论处理
+    Comment = apps.get_model('notes', 'Comment')
+    last_id = 0
+    while True:
+        comments = list(Comment.objects.filter(id__gt=last_id).order_by('id').only('id')[:1000])
+        if not comments:
+            break
+        for comment in comments:
+            comment.path = encode_path_segment(comment.id)
+            comment.depth = 0
+        Comment.objects.bulk_update(comments, ['path', 'depth'])
+        last_id = comments[-1].id
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0007_post_excerpt'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='depth',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='parent',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='replies', to='notes.comment'),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='path',
+            field=models.CharField(blank=True, default='', help_text='Materialized path of base36 comment ids', max_length=255),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['post', 'path'], name='comments_post_path_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['post', 'depth', 'path'], name='comments_post_depth_path_idx'),
+        ),
+        migrations.RunPython(backfill_paths, migrations.RunPython.noop),
+    ]
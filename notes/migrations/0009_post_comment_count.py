@@ -0,0 +1,38 @@
+# Generated by Django 5.2 on 2026-10-17 06:40
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def backfill_comment_counts(apps, schema_editor):
+    Post = apps.get_model('notes', 'Post')
+    Comment = apps.get_model('notes', 'Comment')
+    last_id = 0
+    while True:
+        posts = list(Post.objects.filter(id__gt=last_id).order_by('id').only('id')[:1000])
+        if not posts:
+            break
+        counts = dict(
+            Comment.objects.filter(post_id__in=[post.id for post in posts])
+            .values('post_id').annotate(n=Count('id')).values_list('post_id', 'n')
+        )
+        for post in posts:
+            post.comment_count = counts.get(post.id, 0)
+        Post.objects.bulk_update(posts, ['comment_count'])
+        last_id = posts[-1].id
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0008_comment_threading'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='comment_count',
+            field=models.IntegerField(default=0, help_text='Denormalized number of comments, maintained with F() updates'),
+        ),
+        migrations.RunPython(backfill_comment_counts, migrations.RunPython.noop),
+    ]
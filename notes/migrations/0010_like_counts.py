@@ -0,0 +1,44 @@
+# Generated by Django 5.2 on 2026-10-17 06:42
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def backfill_like_counts(apps, schema_editor):
+    Vote = apps.get_model('notes', 'Vote')
+    for target_type, model_name in (('post', 'Post'), ('comment', 'Comment')):
+        Model = apps.get_model('notes', model_name)
+        last_id = 0
+        while True:
+            objs = list(Model.objects.filter(id__gt=last_id).order_by('id').only('id')[:1000])
+            if not objs:
+                break
+            counts = dict(
+                Vote.objects.filter(target_type=target_type, target_id__in=[obj.id for obj in objs], value='like')
+                .values('target_id').annotate(n=Count('id')).values_list('target_id', 'n')
+            )
+            for obj in objs:
+                obj.like_count = counts.get(obj.id, 0)
+            Model.objects.bulk_update(objs, ['like_count'])
+            last_id = objs[-1].id
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0009_post_comment_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='like_count',
+            field=models.IntegerField(default=0, help_text='Denormalized number of likes, maintained with F() updates'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='like_count',
+            field=models.IntegerField(default=0, help_text='Denormalized number of likes, maintained with F() updates'),
+        ),
+        migrations.RunPython(backfill_like_counts, migrations.RunPython.noop),
+    ]
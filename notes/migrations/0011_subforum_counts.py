@@ -0,0 +1,51 @@
+# Generated by Django 5.2 on 2026-10-17 06:43
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def backfill_subforum_counts(apps, schema_editor):
+    SubForum = apps.get_model('notes', 'SubForum')
+    Post = apps.get_model('notes', 'Post')
+    ModeratorAssignment = apps.get_model('notes', 'ModeratorAssignment')
+    last_id = 0
+    while True:
+        subforums = list(SubForum.objects.filter(id__gt=last_id).order_by('id').only('id')[:1000])
+        if not subforums:
+            break
+        ids = [subforum.id for subforum in subforums]
+        # 两个计数分别聚合，避免两次 JOIN 相互放大行数
+        posts = dict(
+            Post.objects.filter(sub_forum_id__in=ids)
+            .values('sub_forum_id').annotate(n=Count('id')).values_list('sub_forum_id', 'n')
+        )
+        moderators = dict(
+            ModeratorAssignment.objects.filter(sub_forum_id__in=ids)
+            .values('sub_forum_id').annotate(n=Count('id')).values_list('sub_forum_id', 'n')
+        )
+        for subforum in subforums:
+            subforum.post_count = posts.get(subforum.id, 0)
+            subforum.moderator_count = moderators.get(subforum.id, 0)
+        SubForum.objects.bulk_update(subforums, ['post_count', 'moderator_count'])
+        last_id = subforums[-1].id
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0010_like_counts'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='subforum',
+            name='moderator_count',
+            field=models.IntegerField(default=0, help_text='Denormalized number of moderator assignments, maintained with F() updates'),
+        ),
+        migrations.AddField(
+            model_name='subforum',
+            name='post_count',
+            field=models.IntegerField(default=0, help_text='Denormalized number of posts, maintained with F() updates'),
+        ),
+        migrations.RunPython(backfill_subforum_counts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2 on 2026-10-17 06:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0011_subforum_counts'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='counters_sharded',
+            field=models.BooleanField(default=False, help_text='Counter writes go to CounterShard slots and are folded in periodically'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='counters_sharded',
+            field=models.BooleanField(default=False, help_text='Counter writes go to CounterShard slots and are folded in periodically'),
+        ),
+        migrations.CreateModel(
+            name='CounterShard',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('target_type', models.CharField(choices=[('post', 'Post'), ('comment', 'Comment')], max_length=10)),
+                ('target_id', models.IntegerField()),
+                ('field', models.CharField(help_text='Name of the counter column on the target', max_length=20)),
+                ('slot', models.PositiveSmallIntegerField()),
+                ('delta', models.IntegerField(default=0, help_text='Not yet folded into the target counter column')),
+            ],
+            options={
+                'db_table': 'counter_shards',
+                'unique_together': {('target_type', 'target_id', 'field', 'slot')},
+            },
+        ),
+    ]
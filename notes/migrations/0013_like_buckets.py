@@ -0,0 +1,84 @@
+# Generated by Django 5.2 on 2026-10-17 07:03
+
+from collections import Counter
+from datetime import timedelta
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import F
+from django.utils import timezone
+
+
+def backfill_like_buckets(apps, schema_editor):
+    Vote = apps.get_model('notes', 'Vote')
+    Post = apps.get_model('notes', 'Post')
+    Comment = apps.get_model('notes', 'Comment')
+    LikeBucket = apps.get_model('notes', 'LikeBucket')
+
+    # 排行榜最长的时间窗口是 30 天，更早的点赞不需要分桶
+    since = timezone.now() - timedelta(days=30)
+    buckets = Counter()
+    last_id = 0
+    while True:
+        votes = list(
+            Vote.objects.filter(id__gt=last_id, created_at__gte=since, value='like')
+            .order_by('id').values_list('id', 'target_type', 'target_id', 'created_at')[:1000]
+        )
+        if not votes:
+            break
+        for _, target_type, target_id, created_at in votes:
+            hour = created_at.replace(minute=0, second=0, microsecond=0)
+            buckets[(target_type, target_id, hour)] += 1
+        last_id = votes[-1][0]
+
+    keys = list(buckets)
+    for start in range(0, len(keys), 1000):
+        chunk = keys[start:start + 1000]
+        subforums = {
+            'post': dict(
+                Post.objects.filter(id__in={k[1] for k in chunk if k[0] == 'post'})
+                .values_list('id', 'sub_forum_id')
+            ),
+            'comment': dict(
+                Comment.objects.filter(id__in={k[1] for k in chunk if k[0] == 'comment'})
+                .annotate(sub_forum_id=F('post__sub_forum_id')).values_list('id', 'sub_forum_id')
+            ),
+        }
+        LikeBucket.objects.bulk_create([
+            LikeBucket(
+                target_type=target_type,
+                target_id=target_id,
+                sub_forum_id=subforums[target_type][target_id],
+                hour=hour,
+                likes=buckets[(target_type, target_id, hour)]
+            )
+            for target_type, target_id, hour in chunk
+            if target_id in subforums.get(target_type, {})
+        ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0012_counter_shards'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LikeBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('target_type', models.CharField(choices=[('post', 'Post'), ('comment', 'Comment')], max_length=10)),
+                ('target_id', models.IntegerField()),
+                ('hour', models.DateTimeField(help_text='Start of the hour the likes were received in')),
+                ('likes', models.IntegerField(default=0)),
+                ('sub_forum', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='like_buckets', to='notes.subforum')),
+            ],
+            options={
+                'db_table': 'like_buckets',
+                'indexes': [models.Index(fields=['target_type', 'hour'], name='like_buckets_hour_idx'), models.Index(fields=['sub_forum', 'target_type', 'hour'], name='like_buckets_subforum_hour_idx')],
+                'unique_together': {('target_type', 'target_id', 'hour')},
+            },
+        ),
+        migrations.RunPython(backfill_like_buckets, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,94 @@
+# Generated by Django 5.2 on 2026-10-17 07:05
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+TARGETS = (('post', 'Post', 'PostVote', 'post'), ('comment', 'Comment', 'CommentVote', 'comment'))
+
+
+def split_votes(apps, schema_editor):
+    Vote = apps.get_model('notes', 'Vote')
+    for target_type, target_model, vote_model, field in TARGETS:
+        Target = apps.get_model('notes', target_model)
+        TypedVote = apps.get_model('notes', vote_model)
+        last_id = 0
+        while True:
+            votes = list(
+                Vote.objects.filter(id__gt=last_id, target_type=target_type).order_by('id')
+                .values_list('id', 'user_id', 'target_id', 'value', 'created_at')[:1000]
+            )
+            if not votes:
+                break
+            # 目标已被删除的点赞无法建立外键，直接丢弃
+            existing = set(
+                Target.objects.filter(id__in={vote[2] for vote in votes}).values_list('id', flat=True)
+            )
+            TypedVote.objects.bulk_create([
+                TypedVote(user_id=user_id, value=value, created_at=created_at, **{f'{field}_id': target_id})
+                for _, user_id, target_id, value, created_at in votes
+                if target_id in existing
+            ], ignore_conflicts=True)
+            last_id = votes[-1][0]
+
+
+def merge_votes(apps, schema_editor):
+    Vote = apps.get_model('notes', 'Vote')
+    for target_type, target_model, vote_model, field in TARGETS:
+        TypedVote = apps.get_model('notes', vote_model)
+        last_id = 0
+        while True:
+            votes = list(
+                TypedVote.objects.filter(id__gt=last_id).order_by('id')
+                .values_list('id', 'user_id', f'{field}_id', 'value', 'created_at')[:1000]
+            )
+            if not votes:
+                break
+            Vote.objects.bulk_create([
+                Vote(user_id=user_id, target_type=target_type, target_id=target_id, value=value, created_at=created_at)
+                for _, user_id, target_id, value, created_at in votes
+            ])
+            last_id = votes[-1][0]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0013_like_buckets'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CommentVote',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('value', models.CharField(choices=[('like', 'Like'), ('dislike', 'Dislike')], max_length=10)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('comment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='votes', to='notes.comment')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='comment_votes', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'comment_votes',
+                'unique_together': {('user', 'comment')},
+            },
+        ),
+        migrations.CreateModel(
+            name='PostVote',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('value', models.CharField(choices=[('like', 'Like'), ('dislike', 'Dislike')], max_length=10)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='votes', to='notes.post')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='post_votes', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'post_votes',
+                'unique_together': {('user', 'post')},
+            },
+        ),
+        migrations.RunPython(split_votes, merge_votes),
+        migrations.DeleteModel(
+            name='Vote',
+        ),
+    ]
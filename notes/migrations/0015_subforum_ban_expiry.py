@@ -0,0 +1,21 @@
+# Generated by Django 5.2 on 2026-10-17 07:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0014_typed_votes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='subforumban',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['user', 'expires_at'], name='subforum_bans_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='subforumban',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['expires_at'], name='subforum_bans_expiry_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-17 07:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0015_subforum_ban_expiry'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='auth_version',
+            field=models.PositiveIntegerField(default=0, help_text='Bumped on role or global ban changes to revoke tokens carrying older claims'),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2 on 2026-10-17 09:02
+
+import math
+from datetime import datetime, timezone
+
+from django.db import migrations
+
+# 与迁移时的 notes.ranking.hot_score 相同，冻结在迁移中
+COMMENT_WEIGHT = 2.0
+DECAY_SECONDS = 45000
+SCORE_EPOCH = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+
+def hot_score(like_count, comment_count, created_at):
+    activity = like_count + comment_count * COMMENT_WEIGHT + 1
+    return math.log10(max(activity, 1)) + (created_at - SCORE_EPOCH).total_seconds() / DECAY_SECONDS
+
+
+def recompute_hot_scores(apps, schema_editor):
+    PostRanking = apps.get_model('notes', 'PostRanking')
+    last_id = 0
+    while True:
+        rankings = list(
+            PostRanking.objects.filter(id__gt=last_id).order_by('id')
+            .only('id', 'like_count', 'comment_count', 'post_created_at')[:1000]
+        )
+        if not rankings:
+            break
+        for ranking in rankings:
+            ranking.score = hot_score(ranking.like_count, ranking.comment_count, ranking.post_created_at)
+        PostRanking.objects.bulk_update(rankings, ['score'])
+        last_id = rankings[-1].id
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0016_user_auth_version'),
+    ]
+
+    operations = [
+        migrations.RunPython(recompute_hot_scores, migrations.RunPython.noop),
+    ]
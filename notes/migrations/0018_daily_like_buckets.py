@@ -0,0 +1,67 @@
+# Generated by Django 5.2 on 2026-10-17 07:57
+
+from collections import Counter
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_daily_buckets(apps, schema_editor):
+    # 从已有的小时分桶按天汇总
+    LikeBucket = apps.get_model('notes', 'LikeBucket')
+    DailyLikeBucket = apps.get_model('notes', 'DailyLikeBucket')
+    days = Counter()
+    subforums = {}
+    last_id = 0
+    while True:
+        buckets = list(
+            LikeBucket.objects.filter(id__gt=last_id).order_by('id')
+            .values_list('id', 'target_type', 'target_id', 'sub_forum_id', 'hour', 'likes')[:1000]
+        )
+        if not buckets:
+            break
+        for _, target_type, target_id, sub_forum_id, hour, likes in buckets:
+            key = (target_type, target_id, hour.date())
+            days[key] += likes
+            subforums[key] = sub_forum_id
+        last_id = buckets[-1][0]
+
+    keys = list(days)
+    for start in range(0, len(keys), 1000):
+        DailyLikeBucket.objects.bulk_create([
+            DailyLikeBucket(
+                target_type=target_type,
+                target_id=target_id,
+                sub_forum_id=subforums[(target_type, target_id, day)],
+                day=day,
+                likes=days[(target_type, target_id, day)]
+            )
+            for target_type, target_id, day in keys[start:start + 1000]
+        ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0017_recompute_hot_scores'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyLikeBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('target_type', models.CharField(choices=[('post', 'Post'), ('comment', 'Comment')], max_length=10)),
+                ('target_id', models.IntegerField()),
+                ('day', models.DateField(help_text='UTC day the likes were received on')),
+                ('likes', models.IntegerField(default=0)),
+                ('sub_forum', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_like_buckets', to='notes.subforum')),
+            ],
+            options={
+                'db_table': 'daily_like_buckets',
+                'indexes': [models.Index(fields=['target_type', 'day'], name='daily_like_buckets_day_idx'), models.Index(fields=['sub_forum', 'target_type', 'day'], name='daily_like_buckets_sf_day_idx')],
+                'unique_together': {('target_type', 'target_id', 'day')},
+            },
+        ),
+        migrations.RunPython(backfill_daily_buckets, migrations.RunPython.noop),
+    ]
@@ -1,8 +1,31 @@
-from django.db import models
+from django.core.cache import cache
+from django.db import models, transaction
+from django.db.models import F, Q
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
 from django.contrib.auth.models import AbstractUser
 from django.utils import timezone
 
-class User(AbstractUser):
+from .caching import cache_is_shared
+
+class AtomicFieldsMixin:
+    """
+    ATOMIC_FIELDS 中的字段（计数、auth_version 等）只通过 F() 原子更新，
+    整行保存时不写回，避免覆盖并发的增量
+    """
+    ATOMIC_FIELDS = ()
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            deferred = self.get_deferred_fields()
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.ATOMIC_FIELDS
+                and field.attname not in deferred
+            ]
+        super().save(*args, **kwargs)
+
+class User(AtomicFieldsMixin, AbstractUser):
     ROLE_CHOICES = [
         ('user', 'User'),
         ('moderator', 'Moderator'),
@@ -20,20 +43,64 @@ class User(AbstractUser):
     ban_reason = models.TextField(null=True, blank=True, help_text='Reason for global ban')
     banned_at = models.DateTimeField(null=True, blank=True, help_text='When the global ban was applied')
     created_at = models.DateTimeField(default=timezone.now, null=False)
+    auth_version = models.PositiveIntegerField(default=0, null=False, help_text='Bumped on role or global ban changes to revoke tokens carrying older claims')
+
+    ATOMIC_FIELDS = ('auth_version',)
+    # 当前 auth_version 在共享缓存中保存的秒数
+    AUTH_VERSION_CACHE_TIMEOUT = 300
+
+    @staticmethod
+    def auth_version_cache_key(user_id):
+        return f'auth_version:{user_id}'
+
+    @classmethod
+    def current_auth_version(cls, user_id):
+        """
+        返回用户当前的 auth_version，优先从共享缓存读取；用户不存在时返回 None
+        缓存后端不在进程间共享时每次查询数据库，否则吊销要等缓存过期才在其他进程生效
+        """
+        key = cls.auth_version_cache_key(user_id)
+        shared = cache_is_shared()
+        version = cache.get(key) if shared else None
+        if version is None:
+            version = cls.objects.filter(pk=user_id).values_list('auth_version', flat=True).first()
+            if version is not None and shared:
+                cache.set(key, version, cls.AUTH_VERSION_CACHE_TIMEOUT)
+        return version
 
-    def is_banned_in_subforum(self, subforum):
+    def save(self, *args, **kwargs):
+        # 停用用户时增加 auth_version，已签发的令牌立即失效
+        deactivated = (
+            not self._state.adding and not self.is_active
+            and User.objects.filter(pk=self.pk, is_active=True).exists()
+        )
+        super().save(*args, **kwargs)
+        if deactivated:
+            self.bump_auth_version()
+
+    def bump_auth_version(self):
+        """
+        角色或全局封禁状态变化后调用，使带有旧声明的令牌失效
+        """
+        User.objects.filter(pk=self.pk).update(auth_version=F('auth_version') + 1)
+        self.refresh_from_db(fields=['auth_version'])
+        key = self.auth_version_cache_key(self.pk)
+        cache.delete(key)
+        transaction.on_commit(lambda: cache.delete(key))
+
+    def is_banned_in_subforum(self, subforum, context=None):
         """
         Check if user is banned in a specific subforum
+        Pass the request's PermissionContext to answer from its preloaded bans
         """
-        return self.is_banned or self.subforum_bans.filter(
-            subforum=subforum,
-            is_active=True
-        ).exists()
+        if context is not None and context.user.pk == self.pk:
+            return context.is_banned_in(subforum)
+        return self.is_banned or getattr(subforum, 'pk', subforum) in SubForumBan.active_subforum_ids(self.pk)
 
     class Meta:
         db_table = 'users'
 
-class SubForum(models.Model):
+class SubForum(AtomicFieldsMixin, models.Model):
     name = models.CharField(max_length=255, unique=True, null=False)
     description = models.TextField(null=True, blank=True)
     rules = models.TextField(null=True, blank=True)
@@ -44,6 +111,10 @@ class SubForum(models.Model):
         null=False
     )
     created_at = models.DateTimeField(default=timezone.now, null=False)
+    post_count = models.IntegerField(default=0, null=False, help_text='Denormalized number of posts, maintained with F() updates')
+    moderator_count = models.IntegerField(default=0, null=False, help_text='Denormalized number of moderator assignments, maintained with F() updates')
+
+    ATOMIC_FIELDS = ('post_count', 'moderator_count')
 
     class Meta:
         db_table = 'sub_forums'
@@ -70,11 +141,28 @@ class ModeratorAssignment(models.Model):
     is_admin = models.BooleanField(default=False, null=False)
     created_at = models.DateTimeField(default=timezone.now, null=False)
 
+    def save(self, *args, **kwargs):
+        # post_save 中的版主数更新与插入在同一事务中
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
     class Meta:
         db_table = 'moderator_assignments'
         unique_together = ('user', 'sub_forum')
 
-class Post(models.Model):
+# 子论坛的版主数和帖子数在 post_save / post_delete 中成对维护：
+# 逐行创建和删除（包括级联删除、queryset 删除）都会更新计数；bulk_create 和 raw SQL 不发送信号，
+# 这样写入的行需要运行 reconcile_counters 修正
+@receiver(post_save, sender=ModeratorAssignment)
+def increment_moderator_count(sender, instance, created, **kwargs):
+    if created:
+        SubForum.objects.filter(pk=instance.sub_forum_id).update(moderator_count=F('moderator_count') + 1)
+
+@receiver(post_delete, sender=ModeratorAssignment)
+def decrement_moderator_count(sender, instance, **kwargs):
+    SubForum.objects.filter(pk=instance.sub_forum_id).update(moderator_count=F('moderator_count') - 1)
+
+class Post(AtomicFieldsMixin, models.Model):
     FORMAT_CHOICES = [
         ('markdown', 'Markdown'),
         ('wysiwyg', 'WYSIWYG'),
@@ -94,6 +182,7 @@ class Post(models.Model):
     )
     title = models.CharField(max_length=255, null=False)
     content = models.TextField(null=False)
+    excerpt = models.CharField(max_length=255, blank=True, default='', help_text='Plain-text preview of content for list views')
     format = models.CharField(
         max_length=10,
         choices=FORMAT_CHOICES,
@@ -102,6 +191,11 @@ class Post(models.Model):
     )
     created_at = models.DateTimeField(default=timezone.now, null=False)
     updated_at = models.DateTimeField(null=True, blank=True)
+    comment_count = models.IntegerField(default=0, null=False, help_text='Denormalized number of comments, maintained with F() updates')
+    like_count = models.IntegerField(default=0, null=False, help_text='Denormalized number of likes, maintained with F() updates')
+    counters_sharded = models.BooleanField(default=False, help_text='Counter writes go to CounterShard slots and are folded in periodically')
+
+    ATOMIC_FIELDS = ('comment_count', 'like_count', 'counters_sharded')
 
     def save(self, *args, **kwargs):
         # 检查是否是更新操作
@@ -111,12 +205,53 @@ class Post(models.Model):
             # 只有当内容发生变化时才更新updated_at
             if original.content != self.content:
                 self.updated_at = timezone.now()
-        super().save(*args, **kwargs)
+            super().save(*args, **kwargs)
+            return
+
+        # 新帖子，同一事务内增加子论坛的帖子数（post_save）并创建热度记录，
+        # 不经过 API 创建的帖子（后台、shell、fixtures）同样出现在热门列表中
+        from .ranking import hot_score
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            PostRanking.objects.create(
+                post=self,
+                sub_forum_id=self.sub_forum_id,
+                post_created_at=self.created_at,
+                score=hot_score(self.like_count, self.comment_count, self.created_at)
+            )
 
     class Meta:
         db_table = 'posts'
+        indexes = [
+            # 帖子列表的游标分页按 (created_at, id) 定位
+            models.Index(fields=['created_at', 'id'], name='posts_created_idx'),
+            models.Index(fields=['author', 'created_at', 'id'], name='posts_author_created_idx'),
+            models.Index(fields=['sub_forum', 'created_at', 'id'], name='posts_subforum_created_idx'),
+        ]
+
+@receiver(post_save, sender=Post)
+def increment_post_count(sender, instance, created, **kwargs):
+    if created:
+        SubForum.objects.filter(pk=instance.sub_forum_id).update(post_count=F('post_count') + 1)
+
+@receiver(post_delete, sender=Post)
+def decrement_post_count(sender, instance, **kwargs):
+    SubForum.objects.filter(pk=instance.sub_forum_id).update(post_count=F('post_count') - 1)
+
+# 评论的物化路径：每一层是定长的 base36 评论 id，字典序即线程顺序
+COMMENT_PATH_STEP = 8
+COMMENT_PATH_END = '~'  # 比任何 base36 字符都大，用作子树范围查询的上界
+COMMENT_MAX_DEPTH = 30
+_BASE36 = '0123456789abcdefghijklmnopqrstuvwxyz'
 
-class Comment(models.Model):
+def encode_path_segment(pk):
+    segment = ''
+    while pk:
+        pk, remainder = divmod(pk, 36)
+        segment = _BASE36[remainder] + segment
+    return segment.rjust(COMMENT_PATH_STEP, '0')
+
+class Comment(AtomicFieldsMixin, models.Model):
     post = models.ForeignKey(
         Post,
         on_delete=models.CASCADE,
@@ -135,20 +270,51 @@ class Comment(models.Model):
         related_name='replied_comments',
         null=True
     )
+    parent = models.ForeignKey(
+        'self',
+        on_delete=models.CASCADE,
+        related_name='replies',
+        null=True,
+        blank=True
+    )
+    path = models.CharField(max_length=255, blank=True, default='', help_text='Materialized path of base36 comment ids')
+    depth = models.PositiveSmallIntegerField(default=0, null=False)
     content = models.TextField(null=False)
+    like_count = models.IntegerField(default=0, null=False, help_text='Denormalized number of likes, maintained with F() updates')
+    counters_sharded = models.BooleanField(default=False, help_text='Counter writes go to CounterShard slots and are folded in periodically')
     created_at = models.DateTimeField(default=timezone.now, null=False)
 
+    ATOMIC_FIELDS = ('like_count', 'counters_sharded')
+
     def save(self, *args, **kwargs):
+        is_new = not self.pk
         # 如果是新评论，更新帖子的updated_at
-        if not self.pk:
+        if is_new:
             self.post.updated_at = timezone.now()
             self.post.save(update_fields=['updated_at'])
+            self.depth = self.parent.depth + 1 if self.parent_id else 0
         super().save(*args, **kwargs)
 
+        # 路径中包含自己的 id，需要插入后再写入
+        if is_new and not self.path:
+            self.path = (self.parent.path if self.parent_id else '') + encode_path_segment(self.pk)
+            super().save(update_fields=['path'])
+
     class Meta:
         db_table = 'comments'
+        indexes = [
+            # 帖子评论的游标分页按 (post, created_at, id) 定位
+            models.Index(fields=['post', 'created_at', 'id'], name='comments_post_created_idx'),
+            # 子树查询是 (post, path) 上的范围读取
+            models.Index(fields=['post', 'path'], name='comments_post_path_idx'),
+            models.Index(fields=['post', 'depth', 'path'], name='comments_post_depth_path_idx'),
+        ]
 
 class Vote(models.Model):
+    """
+    Abstract base for likes; each target type has its own table with a real
+    foreign key, so votes cascade with their target and index on integers
+    """
     TARGET_TYPE_CHOICES = [
         ('post', 'Post'),
         ('comment', 'Comment'),
@@ -158,28 +324,214 @@ class Vote(models.Model):
         ('dislike', 'Dislike'),
     ]
 
+    value = models.CharField(
+        max_length=10,
+        choices=VALUE_CHOICES,
+        null=False
+    )
+    created_at = models.DateTimeField(default=timezone.now, null=False)
+
+    # 子类的目标类型和指向目标的外键字段名
+    target_type = None
+    target_field = None
+
+    @property
+    def target_id(self):
+        return getattr(self, f'{self.target_field}_id')
+
+    class Meta:
+        abstract = True
+
+class PostVote(Vote):
     user = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
+        related_name='post_votes',
+        null=False
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
         related_name='votes',
         null=False
     )
+
+    target_type = 'post'
+    target_field = 'post'
+
+    class Meta:
+        db_table = 'post_votes'
+        unique_together = ('user', 'post')
+
+class CommentVote(Vote):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='comment_votes',
+        null=False
+    )
+    comment = models.ForeignKey(
+        Comment,
+        on_delete=models.CASCADE,
+        related_name='votes',
+        null=False
+    )
+
+    target_type = 'comment'
+    target_field = 'comment'
+
+    class Meta:
+        db_table = 'comment_votes'
+        unique_together = ('user', 'comment')
+
+VOTE_MODELS = {'post': PostVote, 'comment': CommentVote}
+
+class CounterShard(models.Model):
+    """
+    Pending counter delta for a hot post or comment, spread over several slots
+    so concurrent writers do not contend on the same row
+    """
+    TARGET_TYPE_CHOICES = Vote.TARGET_TYPE_CHOICES
+
     target_type = models.CharField(
         max_length=10,
         choices=TARGET_TYPE_CHOICES,
         null=False
     )
     target_id = models.IntegerField(null=False)
-    value = models.CharField(
+    field = models.CharField(max_length=20, null=False, help_text='Name of the counter column on the target')
+    slot = models.PositiveSmallIntegerField(null=False)
+    delta = models.IntegerField(default=0, null=False, help_text='Not yet folded into the target counter column')
+
+    class Meta:
+        db_table = 'counter_shards'
+        unique_together = ('target_type', 'target_id', 'field', 'slot')
+
+class LikeBucket(models.Model):
+    """
+    Number of likes a post or comment received in one hour, read by the
+    rolling-window leaderboards instead of scanning votes
+    """
+    TARGET_TYPE_CHOICES = Vote.TARGET_TYPE_CHOICES
+
+    target_type = models.CharField(
         max_length=10,
-        choices=VALUE_CHOICES,
+        choices=TARGET_TYPE_CHOICES,
+        null=False
+    )
+    target_id = models.IntegerField(null=False)
+    sub_forum = models.ForeignKey(
+        'SubForum',
+        on_delete=models.CASCADE,
+        related_name='like_buckets',
+        null=False
+    )
+    hour = models.DateTimeField(null=False, help_text='Start of the hour the likes were received in')
+    likes = models.IntegerField(default=0, null=False)
+
+    class Meta:
+        db_table = 'like_buckets'
+        unique_together = ('target_type', 'target_id', 'hour')
+        indexes = [
+            # 全站和子论坛排行榜按时间窗口范围读取
+            models.Index(fields=['target_type', 'hour'], name='like_buckets_hour_idx'),
+            models.Index(fields=['sub_forum', 'target_type', 'hour'], name='like_buckets_subforum_hour_idx'),
+        ]
+
+class DailyLikeBucket(models.Model):
+    """
+    Number of likes a post or comment received in one day, a rollup of
+    LikeBucket read by the 7d and 30d leaderboards
+    """
+    TARGET_TYPE_CHOICES = Vote.TARGET_TYPE_CHOICES
+
+    target_type = models.CharField(
+        max_length=10,
+        choices=TARGET_TYPE_CHOICES,
+        null=False
+    )
+    target_id = models.IntegerField(null=False)
+    sub_forum = models.ForeignKey(
+        'SubForum',
+        on_delete=models.CASCADE,
+        related_name='daily_like_buckets',
+        null=False
+    )
+    day = models.DateField(null=False, help_text='UTC day the likes were received on')
+    likes = models.IntegerField(default=0, null=False)
+
+    class Meta:
+        db_table = 'daily_like_buckets'
+        unique_together = ('target_type', 'target_id', 'day')
+        indexes = [
+            models.Index(fields=['target_type', 'day'], name='daily_like_buckets_day_idx'),
+            models.Index(fields=['sub_forum', 'target_type', 'day'], name='daily_like_buckets_sf_day_idx'),
+        ]
+
+class SubForumSubscription(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='subscriptions',
+        null=False
+    )
+    sub_forum = models.ForeignKey(
+        SubForum,
+        on_delete=models.CASCADE,
+        related_name='subscriptions',
         null=False
     )
     created_at = models.DateTimeField(default=timezone.now, null=False)
 
     class Meta:
-        db_table = 'votes'
-        unique_together = ('user', 'target_type', 'target_id')
+        db_table = 'subforum_subscriptions'
+        unique_together = ('user', 'sub_forum')
+
+class PostRanking(models.Model):
+    """
+    Precomputed hot score for a post, read by the per-subforum hot feed
+    """
+    post = models.OneToOneField(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='ranking',
+        null=False
+    )
+    sub_forum = models.ForeignKey(
+        SubForum,
+        on_delete=models.CASCADE,
+        related_name='post_rankings',
+        null=False
+    )
+    like_count = models.IntegerField(default=0, null=False)
+    comment_count = models.IntegerField(default=0, null=False)
+    score = models.FloatField(default=0, null=False)
+    post_created_at = models.DateTimeField(null=False)
+    updated_at = models.DateTimeField(default=timezone.now, null=False)
+
+    class Meta:
+        db_table = 'post_rankings'
+        indexes = [
+            # 热门列表按 (sub_forum, score) 做范围读取
+            models.Index(fields=['sub_forum', '-score', '-post'], name='post_rankings_hot_idx'),
+        ]
+
+class SubForumBanQuerySet(models.QuerySet):
+    def active(self, now=None):
+        """
+        生效中的封禁：is_active 且未过期（expires_at 为空表示永久封禁）
+        """
+        if now is None:
+            now = timezone.now()
+        return self.filter(Q(expires_at__isnull=True) | Q(expires_at__gt=now), is_active=True)
+
+    def expired(self, now=None):
+        """
+        已过期但还没有被 expire_bans 标记为失效的封禁
+        """
+        if now is None:
+            now = timezone.now()
+        return self.filter(is_active=True, expires_at__lte=now)
 
 class SubForumBan(models.Model):
     user = models.ForeignKey(
@@ -205,6 +557,75 @@ class SubForumBan(models.Model):
     created_at = models.DateTimeField(default=timezone.now, null=False)
     expires_at = models.DateTimeField(null=True, blank=True)
 
+    objects = SubForumBanQuerySet.as_manager()
+
+    # 用户被封禁的子论坛集合在共享缓存中保存的秒数，未被封禁（空集合）同样缓存
+    CACHE_TIMEOUT = 300
+
+    @staticmethod
+    def cache_key(user_id):
+        return f'subforum_bans:{user_id}'
+
+    @classmethod
+    def active_subforum_ids(cls, user_id):
+        """
+        返回用户当前被封禁的子论坛 ID 集合，优先从共享缓存读取
+        缓存中保存 (subforum_id, expires_at)，读取时过滤掉已过期的封禁；
+        缓存后端不在进程间共享时每次查询数据库，否则其他进程的封禁要等缓存过期才生效
+        """
+        key = cls.cache_key(user_id)
+        now = timezone.now()
+        shared = cache_is_shared()
+        bans = cache.get(key) if shared else None
+        if bans is None:
+            bans = list(cls.objects.active(now).filter(user_id=user_id).values_list('subforum_id', 'expires_at'))
+            if shared:
+                cache.set(key, bans, cls.CACHE_TIMEOUT)
+        return {subforum_id for subforum_id, expires_at in bans if expires_at is None or expires_at > now}
+
+    @classmethod
+    def invalidate_cache(cls, user_id):
+        """
+        清除用户的封禁缓存；事务提交后再清除一次，避免并发请求在提交前读到旧数据并写回缓存
+        """
+        key = cls.cache_key(user_id)
+        cache.delete(key)
+        transaction.on_commit(lambda: cache.delete(key))
+
+    @classmethod
+    def expire_due(cls, now=None, chunk_size=1000):
+        """
+        把已过期的封禁批量标记为失效，返回处理的行数
+        每批在单独的短事务中更新，避免长时间持有写锁
+        """
+        if now is None:
+            now = timezone.now()
+        expired = 0
+        while True:
+            with transaction.atomic():
+                rows = list(cls.objects.expired(now).values_list('id', 'user_id')[:chunk_size])
+                if not rows:
+                    break
+                cls.objects.filter(id__in=[ban_id for ban_id, _ in rows]).update(is_active=False)
+                for user_id in {user_id for _, user_id in rows}:
+                    cls.invalidate_cache(user_id)
+            expired += len(rows)
+        return expired
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self.invalidate_cache(self.user_id)
+
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        self.invalidate_cache(self.user_id)
+        return result
+
     class Meta:
         db_table = 'subforum_bans'
         unique_together = ('user', 'subforum')
+        indexes = [
+            # 部分索引只包含生效中的封禁，查询用户封禁和清理过期封禁都只扫描很小的索引
+            models.Index(fields=['user', 'expires_at'], condition=Q(is_active=True), name='subforum_bans_active_idx'),
+            models.Index(fields=['expires_at'], condition=Q(is_active=True), name='subforum_bans_expiry_idx'),
+        ]
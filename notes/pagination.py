@@ -0,0 +1,217 @@
+import base64
+import heapq
+from itertools import islice
+from urllib import parse
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import BasePagination, _positive_int
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetCursorPagination(BasePagination):
+    """
+    基于 (created_at, id) 的游标分页
+    游标中保存当前页边界行的 created_at 和 id，
+    下一页直接用 WHERE (created_at, id) < (c, i) 定位，不使用 OFFSET
+    """
+    cursor_query_param = 'cursor'
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    # True 表示按 (created_at, id) 倒序（最新在前）
+    descending = True
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+
+        position, reverse = self.get_position(queryset, request)
+
+        # 反向翻页时临时翻转排序方向，取出后再倒回来
+        descending = self.descending != reverse
+
+        # 多取一行用来判断是否还有更多数据
+        results = self.fetch_rows(queryset, position, descending, self.page_size + 1)
+        has_more = len(results) > self.page_size
+        self.page = results[:self.page_size]
+        if reverse:
+            self.page.reverse()
+
+        if reverse:
+            self.has_next = position is not None
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = position is not None
+
+        return self.page
+
+    def order_and_seek(self, queryset, position, descending):
+        """
+        按 (created_at, id) 排序，并定位到游标之后
+        """
+        if descending:
+            queryset = queryset.order_by('-created_at', '-id')
+        else:
+            queryset = queryset.order_by('created_at', 'id')
+
+        if position is not None:
+            queryset = queryset.filter(self.get_seek_filter(position, descending))
+        return queryset
+
+    def fetch_rows(self, queryset, position, descending, limit):
+        return list(self.order_and_seek(queryset, position, descending)[:limit])
+
+    def get_position(self, queryset, request):
+        """
+        返回 ((created_at, id), reverse)，没有游标时返回 (None, False)
+        """
+        cursor = self.decode_cursor(request)
+        if cursor is None:
+            return None, False
+        return cursor
+
+    def get_seek_filter(self, position, descending):
+        created_at, pk = position
+        if descending:
+            return Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk)
+        return Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=pk)
+
+    def get_page_size(self, request):
+        if self.page_size_query_param:
+            try:
+                return _positive_int(
+                    request.query_params[self.page_size_query_param],
+                    strict=True,
+                    cutoff=self.max_page_size
+                )
+            except (KeyError, ValueError):
+                pass
+        return self.page_size
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+
+        try:
+            querystring = base64.urlsafe_b64decode(encoded.encode('ascii')).decode('ascii')
+            tokens = parse.parse_qs(querystring, keep_blank_values=True)
+            created_at = parse_datetime(tokens['c'][0])
+            pk = int(tokens['i'][0])
+            reverse = bool(int(tokens.get('r', ['0'])[0]))
+        except (TypeError, ValueError, KeyError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+
+        if created_at is None:
+            raise NotFound(self.invalid_cursor_message)
+        return (created_at, pk), reverse
+
+    def encode_cursor(self, instance, reverse):
+        tokens = {
+            'c': instance.created_at.isoformat(),
+            'i': str(instance.pk),
+        }
+        if reverse:
+            tokens['r'] = '1'
+        querystring = parse.urlencode(tokens, doseq=True)
+        encoded = base64.urlsafe_b64encode(querystring.encode('ascii')).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+
+class PostCursorPagination(KeysetCursorPagination):
+    """
+    帖子列表分页，最新的帖子在前
+    """
+    page_size = 20
+    max_page_size = 100
+
+
+class SubForumPostPagination(KeysetCursorPagination):
+    """
+    子论坛帖子列表分页
+    配合 (sub_forum, created_at, id) 索引，每页成本与子论坛帖子总数无关
+    """
+    page_size = 20
+    max_page_size = 50
+
+
+class CommentCursorPagination(KeysetCursorPagination):
+    """
+    帖子评论分页，最早的评论在前
+    支持 after=<comment_id>，只返回该评论之后的新评论
+    """
+    page_size = 50
+    max_page_size = 200
+    descending = False
+    after_query_param = 'after'
+
+    def get_position(self, queryset, request):
+        after = request.query_params.get(self.after_query_param)
+        if after is None or self.cursor_query_param in request.query_params:
+            return super().get_position(queryset, request)
+
+        try:
+            anchor = queryset.filter(id=int(after)).values('created_at', 'id').get()
+        except (ValueError, queryset.model.DoesNotExist):
+            raise ValidationError({self.after_query_param: 'Invalid comment ID.'})
+        return (anchor['created_at'], anchor['id']), False
+
+
+class FeedCursorPagination(KeysetCursorPagination):
+    """
+    首页信息流分页，合并多个子论坛的最新帖子
+    每个子论坛沿 (sub_forum, created_at, id) 索引各取一页的键，
+    在内存中做 k 路堆归并，再一次性加载这一页的帖子
+    """
+    page_size = 20
+    max_page_size = 50
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.partition_ids = view.get_subforum_ids() if view is not None else []
+        return super().paginate_queryset(queryset, request, view)
+
+    def fetch_rows(self, queryset, position, descending, limit):
+        streams = []
+        for subforum_id in self.partition_ids:
+            keys = self.order_and_seek(
+                queryset.filter(sub_forum_id=subforum_id), position, descending
+            ).values_list('created_at', 'id')[:limit]
+            streams.append(list(keys))
+
+        merged = list(islice(heapq.merge(*streams, reverse=descending), limit))
+        posts = queryset.in_bulk([pk for _, pk in merged])
+        return [posts[pk] for _, pk in merged if pk in posts]
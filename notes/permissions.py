@@ -1,4 +1,80 @@
 from rest_framework import permissions
+from .models import ModeratorAssignment, SubForumBan
+
+def _subforum_id(subforum):
+    return getattr(subforum, 'pk', subforum)
+
+class PermissionContext:
+    """
+    单个请求内当前用户的权限上下文
+    第一次用到时各用一次查询加载用户的全部版主任命和生效中的子论坛封禁（封禁优先从共享缓存读取），
+    之后的权限判断和序列化都从内存中读取，不再逐行查询
+    """
+    def __init__(self, user):
+        self.user = user
+        self._assignments = None
+        self._banned_subforum_ids = None
+
+    @property
+    def assignments(self):
+        """
+        {sub_forum_id: is_admin}
+        """
+        if self._assignments is None:
+            self._assignments = {}
+            if self.user.is_authenticated:
+                self._assignments = dict(
+                    ModeratorAssignment.objects.filter(user=self.user).values_list('sub_forum_id', 'is_admin')
+                )
+        return self._assignments
+
+    @property
+    def banned_subforum_ids(self):
+        if self._banned_subforum_ids is None:
+            self._banned_subforum_ids = set()
+            if self.user.is_authenticated:
+                self._banned_subforum_ids = SubForumBan.active_subforum_ids(self.user.pk)
+        return self._banned_subforum_ids
+
+    @property
+    def is_super_admin(self):
+        return self.user.is_authenticated and self.user.role == 'super_admin'
+
+    def is_moderator(self, subforum):
+        """
+        是否是该子论坛的版主或子论坛管理员
+        """
+        return _subforum_id(subforum) in self.assignments
+
+    def is_admin(self, subforum):
+        """
+        是否是该子论坛的管理员
+        """
+        return self.assignments.get(_subforum_id(subforum), False)
+
+    def can_moderate(self, subforum):
+        """
+        超级管理员，或该子论坛的版主/管理员
+        """
+        return self.is_super_admin or self.is_moderator(subforum)
+
+    def is_banned_in(self, subforum):
+        """
+        是否被全局封禁或在该子论坛被封禁
+        """
+        if not self.user.is_authenticated:
+            return False
+        return self.user.is_banned or _subforum_id(subforum) in self.banned_subforum_ids
+
+def get_permission_context(request):
+    """
+    返回当前请求的权限上下文，同一个请求内只创建一次
+    """
+    context = getattr(request, '_permission_context', None)
+    if context is None or context.user is not request.user:
+        context = PermissionContext(request.user)
+        request._permission_context = context
+    return context
 
 class IsSubForumAdminOrSuperAdmin(permissions.BasePermission):
     """
@@ -37,10 +113,7 @@ class IsPostAuthorOrModeratorOrHigher(permissions.BasePermission):
         if request.user.role in ['moderator', 'subforum_admin', 'super_admin']:
             # 如果是版主，检查是否是该子论坛的版主
             if request.user.role == 'moderator':
-                return obj.sub_forum.moderator_assignments.filter(
-                    user=request.user,
-                    is_active=True
-                ).exists()
+                return get_permission_context(request).is_moderator(obj.sub_forum_id)
             return True
         
         return False
@@ -61,10 +134,7 @@ class IsCommentAuthorOrModeratorOrHigher(permissions.BasePermission):
         if request.user.role in ['moderator', 'subforum_admin', 'super_admin']:
             # 如果是版主，检查是否是该子论坛的版主
             if request.user.role == 'moderator':
-                return obj.post.sub_forum.moderator_assignments.filter(
-                    user=request.user,
-                    is_active=True
-                ).exists()
+                return get_permission_context(request).is_moderator(obj.post.sub_forum_id)
             return True
         
         return False
@@ -87,11 +157,11 @@ class IsNotBanned(permissions.BasePermission):
             return False
         
         # 检查子论坛禁止状态
-        if hasattr(obj, 'sub_forum'):
-            subforum = obj.sub_forum
+        if hasattr(obj, 'sub_forum_id'):
+            subforum_id = obj.sub_forum_id
         elif hasattr(obj, 'post'):
-            subforum = obj.post.sub_forum
+            subforum_id = obj.post.sub_forum_id
         else:
             return True
         
-        return not request.user.is_banned_in_subforum(subforum) 
\ No newline at end of file
+        return not request.user.is_banned_in_subforum(subforum_id, get_permission_context(request))
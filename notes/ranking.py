@@ -0,0 +1,149 @@
+import math
+from datetime import datetime, timezone as dt_timezone
+
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from .models import Post, Comment, PostVote, PostRanking
+
+# 热度公式参数：score = log10(likes + comments * COMMENT_WEIGHT + 1) + (created_at - SCORE_EPOCH) / DECAY_SECONDS
+# 分数只取决于计数和发帖时间，与计算时刻无关：增量更新的分数与其他帖子的旧分数始终可以直接比较，
+# 发帖时间每晚 DECAY_SECONDS 秒（12.5 小时），需要 10 倍的互动量才能与新帖子持平
+COMMENT_WEIGHT = 2.0
+DECAY_SECONDS = 45000
+SCORE_EPOCH = datetime(2025, 1, 1, tzinfo=dt_timezone.utc)
+REFRESH_CHUNK_SIZE = 1000
+
+
+def hot_score(like_count, comment_count, created_at):
+    """
+    计算帖子热度，越新的帖子基础分越高
+    """
+    activity = like_count + comment_count * COMMENT_WEIGHT + 1
+    return math.log10(max(activity, 1)) + (created_at - SCORE_EPOCH).total_seconds() / DECAY_SECONDS
+
+
+def record_post_activity(post, likes=0, comments=0):
+    """
+    增量更新帖子的热度记录
+    新帖子调用时 likes/comments 为 0，仅创建排名记录
+    """
+    with transaction.atomic():
+        ranking, created = PostRanking.objects.select_for_update().get_or_create(
+            post=post,
+            defaults={
+                'sub_forum_id': post.sub_forum_id,
+                'post_created_at': post.created_at,
+            }
+        )
+        ranking.like_count = max(ranking.like_count + likes, 0)
+        ranking.comment_count = max(ranking.comment_count + comments, 0)
+        ranking.updated_at = timezone.now()
+        ranking.score = hot_score(ranking.like_count, ranking.comment_count, ranking.post_created_at)
+        ranking.save()
+    return ranking
+
+
+def record_posts_likes(likes):
+    """
+    批量增量更新多个帖子的热度记录，likes 为 [(post, n)]
+    缺失的记录用一条 bulk_create 补齐，锁定后在 Python 中重算分数并一次 bulk_update
+    需要在调用方的事务中执行
+    """
+    if not likes:
+        return
+    now = timezone.now()
+    deltas = {post.pk: n for post, n in likes}
+    PostRanking.objects.bulk_create([
+        PostRanking(
+            post_id=post.pk,
+            sub_forum_id=post.sub_forum_id,
+            post_created_at=post.created_at,
+            score=hot_score(0, 0, post.created_at),
+            updated_at=now,
+        )
+        for post, _ in likes
+    ], ignore_conflicts=True)
+    rankings = list(
+        PostRanking.objects.select_for_update().filter(post_id__in=deltas).only(
+            'id', 'post_id', 'like_count', 'comment_count', 'post_created_at'
+        )
+    )
+    for ranking in rankings:
+        ranking.like_count = max(ranking.like_count + deltas[ranking.post_id], 0)
+        ranking.score = hot_score(ranking.like_count, ranking.comment_count, ranking.post_created_at)
+        ranking.updated_at = now
+    PostRanking.objects.bulk_update(rankings, ['like_count', 'score', 'updated_at'])
+
+
+def backfill_rankings(chunk_size=REFRESH_CHUNK_SIZE):
+    """
+    为还没有排名记录的帖子创建记录，计数从 PostVote 和 Comment 表聚合
+    返回创建的记录数
+    """
+    created = 0
+    missing = Post.objects.filter(ranking__isnull=True).order_by('id').values_list(
+        'id', 'sub_forum_id', 'created_at'
+    )
+    last_id = 0
+    while True:
+        rows = list(missing.filter(id__gt=last_id)[:chunk_size])
+        if not rows:
+            break
+        last_id = rows[-1][0]
+        post_ids = [row[0] for row in rows]
+
+        likes = dict(
+            PostVote.objects.filter(post_id__in=post_ids, value='like')
+            .values('post_id').annotate(n=Count('id')).values_list('post_id', 'n')
+        )
+        comments = dict(
+            Comment.objects.filter(post_id__in=post_ids)
+            .values('post_id').annotate(n=Count('id')).values_list('post_id', 'n')
+        )
+
+        now = timezone.now()
+        PostRanking.objects.bulk_create([
+            PostRanking(
+                post_id=post_id,
+                sub_forum_id=sub_forum_id,
+                like_count=likes.get(post_id, 0),
+                comment_count=comments.get(post_id, 0),
+                post_created_at=created_at,
+                score=hot_score(likes.get(post_id, 0), comments.get(post_id, 0), created_at),
+                updated_at=now,
+            )
+            for post_id, sub_forum_id, created_at in rows
+        ], ignore_conflicts=True)
+        created += len(rows)
+    return created
+
+
+def refresh_hot_scores(chunk_size=REFRESH_CHUNK_SIZE, now=None):
+    """
+    按记录中的计数重新计算全部热度，分块 bulk_update
+    热度与计算时刻无关，只在修正计数或调整公式参数后需要运行
+    返回更新的记录数
+    """
+    if now is None:
+        now = timezone.now()
+    updated = 0
+    last_id = 0
+    while True:
+        # 每块一个短事务，避免长时间占用 SQLite 写锁
+        with transaction.atomic():
+            rankings = list(
+                PostRanking.objects.filter(id__gt=last_id).order_by('id').only(
+                    'id', 'like_count', 'comment_count', 'post_created_at'
+                )[:chunk_size]
+            )
+            if not rankings:
+                break
+            for ranking in rankings:
+                ranking.score = hot_score(ranking.like_count, ranking.comment_count, ranking.post_created_at)
+                ranking.updated_at = now
+            PostRanking.objects.bulk_update(rankings, ['score', 'updated_at'])
+        last_id = rankings[-1].id
+        updated += len(rankings)
+    return updated
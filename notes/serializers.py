@@ -1,6 +1,102 @@
 from rest_framework import serializers
+from django.db import models
 from django.contrib.auth.password_validation import validate_password
-from .models import User, SubForum, Post, Comment, Vote, SubForumBan, ModeratorAssignment
+from .models import User, SubForum, Post, Comment, SubForumBan, ModeratorAssignment, VOTE_MODELS
+from .permissions import get_permission_context
+
+def get_sparse_fieldset(request):
+    """
+    从 ?fields= / ?omit= 中解析需要保留或去掉的字段
+    返回可以直接传给 SparseFieldsetMixin 序列化器的关键字参数
+    """
+    if request is None or request.method not in ('GET', 'HEAD'):
+        return {}
+    params = getattr(request, 'query_params', request.GET)
+    sparse = {}
+    for key in ('fields', 'omit'):
+        value = params.get(key)
+        if value:
+            sparse[key] = {name.strip() for name in value.split(',') if name.strip()}
+    return sparse
+
+def get_deferred_fields(serializer_class, request):
+    """
+    返回 Meta.deferrable_fields 中序列化器不输出或本次请求不需要的大字段
+    """
+    sparse = get_sparse_fieldset(request)
+    fields = sparse.get('fields')
+    omit = sparse.get('omit', set())
+    return [
+        name for name in getattr(serializer_class.Meta, 'deferrable_fields', ())
+        if name not in serializer_class.Meta.fields
+        or name in omit
+        or (fields is not None and name not in fields)
+    ]
+
+def defer_sparse_fields(queryset, serializer_class, request):
+    """
+    对没有被请求的大字段调用 .defer()，这些列不会从数据库读取
+    """
+    deferred = get_deferred_fields(serializer_class, request)
+    return queryset.defer(*deferred) if deferred else queryset
+
+class SparseFieldsetMixin:
+    """
+    支持按需裁剪输出字段
+    可以显式传入 fields / omit，否则从 context 中的 request 解析
+    """
+    def __init__(self, *args, **kwargs):
+        explicit = {key: kwargs.pop(key) for key in ('fields', 'omit') if key in kwargs}
+        super().__init__(*args, **kwargs)
+        sparse = explicit or get_sparse_fieldset(self.context.get('request'))
+
+        fields = sparse.get('fields')
+        omit = sparse.get('omit', set())
+        for name in list(self.fields):
+            if name in omit or (fields is not None and name not in fields):
+                self.fields.pop(name)
+
+def get_viewer_likes(context, target_type, objs):
+    """
+    返回 {id: 是否点赞}，表示当前用户是否点赞过 objs 中的对象
+    结果缓存在序列化器 context 中，已经查过的 id 不会重复查询
+    """
+    known = context.setdefault('viewer_likes', {}).setdefault(target_type, {})
+    missing = [obj.pk for obj in objs if obj.pk not in known]
+    if missing:
+        request = context.get('request')
+        user = getattr(request, 'user', None)
+        liked = set()
+        if user is not None and user.is_authenticated:
+            vote_model = VOTE_MODELS[target_type]
+            target_column = f'{vote_model.target_field}_id'
+            liked = set(vote_model.objects.filter(
+                user=user,
+                value='like',
+                **{f'{target_column}__in': missing}
+            ).values_list(target_column, flat=True))
+        for pk in missing:
+            known[pk] = pk in liked
+    return known
+
+class ViewerLikesListSerializer(serializers.ListSerializer):
+    """
+    序列化一页数据之前，用一次点赞表查询得到当前用户对整页对象的点赞状态
+    """
+    def to_representation(self, data):
+        items = list(data.all() if isinstance(data, models.manager.BaseManager) else data)
+        if 'viewer_has_liked' in self.child.fields:
+            get_viewer_likes(self.context, self.child.vote_target_type, items)
+        return super().to_representation(items)
+
+class ViewerLikesMixin:
+    """
+    为帖子和评论提供 viewer_has_liked 字段，整页的结果由 ViewerLikesListSerializer 预先查出
+    """
+    vote_target_type = None
+
+    def get_viewer_has_liked(self, obj):
+        return get_viewer_likes(self.context, self.vote_target_type, [obj])[obj.pk]
 
 class UserRegistrationSerializer(serializers.ModelSerializer):
     password = serializers.CharField(write_only=True, required=True, validators=[validate_password])
@@ -30,79 +126,67 @@ class UserSerializer(serializers.ModelSerializer):
         fields = ['id', 'username', 'role', 'created_at']
         read_only_fields = fields
 
-class SubForumSerializer(serializers.ModelSerializer):
+class SubForumSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     created_by = serializers.ReadOnlyField(source='created_by.username')
-    moderator_count = serializers.IntegerField(read_only=True)
-    post_count = serializers.IntegerField(read_only=True)
     
     class Meta:
         model = SubForum
         fields = ('id', 'name', 'description', 'rules', 'created_by', 'created_at', 'moderator_count', 'post_count')
         read_only_fields = ('id', 'created_by', 'created_at', 'moderator_count', 'post_count')
+        deferrable_fields = ('description', 'rules')
         extra_kwargs = {
             'name': {'read_only': True},  # name 字段在更新时是只读的
             'description': {'required': False, 'allow_blank': True},  # description 可以为空
             'rules': {'required': False, 'allow_blank': True}  # rules 可以为空
         }
 
-class PostSerializer(serializers.ModelSerializer):
+class PostSerializer(ViewerLikesMixin, SparseFieldsetMixin, serializers.ModelSerializer):
     author = serializers.ReadOnlyField(source='author.username')
     sub_forum = serializers.SerializerMethodField()
-    comment_count = serializers.SerializerMethodField()
+    viewer_has_liked = serializers.SerializerMethodField()
+
+    vote_target_type = 'post'
     
     class Meta:
         model = Post
-        fields = ('id', 'title', 'content', 'format', 'author', 'sub_forum', 'created_at', 'updated_at', 'comment_count')
-        read_only_fields = ('author', 'created_at', 'updated_at', 'comment_count')
+        fields = ('id', 'title', 'content', 'excerpt', 'format', 'author', 'sub_forum', 'created_at', 'updated_at', 'comment_count', 'like_count', 'viewer_has_liked')
+        read_only_fields = ('author', 'excerpt', 'created_at', 'updated_at', 'comment_count', 'like_count')
+        deferrable_fields = ('content',)
+        list_serializer_class = ViewerLikesListSerializer
     
     def get_sub_forum(self, obj):
-        from .models import ModeratorAssignment  # 导入 ModeratorAssignment 模型
-        
-        # 获取当前用户
+        # 版主身份从请求的权限上下文中读取，整页帖子只查询一次
         request = self.context.get('request')
-        user = request.user if request and hasattr(request, 'user') else None
-
-        # 检查用户是否是这个子论坛的版主
         is_moderator = False
-        if user and user.is_authenticated:
-            # 检查是否是超级管理员
-            if user.role == 'super_admin':
-                is_moderator = True
-            else:
-                # 检查是否是版主或子论坛管理员
-                moderator_assignment = ModeratorAssignment.objects.filter(
-                    user=user,
-                    sub_forum=obj.sub_forum
-                ).first()
-                
-                is_moderator = bool(moderator_assignment)
-
-                print(f"Moderator check for user {user.username} in subforum {obj.sub_forum.name}:")
-                print(f"- User role: {user.role}")
-                print(f"- Has moderator assignment: {bool(moderator_assignment)}")
-                print(f"- Final is_moderator value: {is_moderator}")
-
-        result = {
+        if request is not None and request.user.is_authenticated:
+            is_moderator = get_permission_context(request).can_moderate(obj.sub_forum_id)
+
+        return {
             'id': obj.sub_forum.id,
             'name': obj.sub_forum.name,
             'is_moderator': is_moderator
         }
-        
-        print(f"Returning subforum data: {result}")
-        return result
-    
-    def get_comment_count(self, obj):
-        return obj.comments.count()
 
-class CommentSerializer(serializers.ModelSerializer):
+class PostListSerializer(PostSerializer):
+    """
+    帖子列表使用的序列化器，用预先生成的 excerpt 代替完整的 content
+    """
+    class Meta(PostSerializer.Meta):
+        fields = ('id', 'title', 'excerpt', 'format', 'author', 'sub_forum', 'created_at', 'updated_at', 'comment_count', 'like_count', 'viewer_has_liked')
+
+class CommentSerializer(ViewerLikesMixin, serializers.ModelSerializer):
     author = serializers.ReadOnlyField(source='author.username')
     reply_to_user = serializers.ReadOnlyField(source='reply_to_user.username', allow_null=True)
     post = serializers.SerializerMethodField()
+    viewer_has_liked = serializers.SerializerMethodField()
+
+    vote_target_type = 'comment'
 
     class Meta:
         model = Comment
-        fields = ('id', 'content', 'author', 'reply_to_user', 'post', 'created_at')
-        read_only_fields = ('author', 'created_at')
+        fields = ('id', 'content', 'author', 'reply_to_user', 'post', 'parent', 'depth', 'like_count', 'viewer_has_liked', 'created_at')
+        read_only_fields = ('author', 'parent', 'depth', 'like_count', 'created_at')
+        list_serializer_class = ViewerLikesListSerializer
 
     def get_post(self, obj):
         return {
@@ -114,21 +198,34 @@ class CommentSerializer(serializers.ModelSerializer):
             }
         }
 
-class VoteSerializer(serializers.ModelSerializer):
-    class Meta:
-        model = Vote
-        fields = ['id', 'user', 'target_type', 'target_id', 'value', 'created_at']
-        read_only_fields = ['user', 'value', 'created_at']
+class VoteSerializer(serializers.Serializer):
+    """
+    PostVote 和 CommentVote 共用的表示，对外仍是 target_type + target_id
+    """
+    id = serializers.IntegerField(read_only=True)
+    user = serializers.PrimaryKeyRelatedField(read_only=True)
+    target_type = serializers.CharField(max_length=10)
+    target_id = serializers.IntegerField()
+    value = serializers.CharField(read_only=True)
+    created_at = serializers.DateTimeField(read_only=True)
 
     def validate_target_type(self, value):
-        if value not in ['post', 'comment']:
+        if value not in VOTE_MODELS:
             raise serializers.ValidationError("Invalid target type. Must be either 'post' or 'comment'.")
         return value
 
-    def create(self, validated_data):
-        # Force value to be 'like'
-        validated_data['value'] = 'like'
-        return super().create(validated_data)
+VOTE_BATCH_MAX_SIZE = 200
+
+class VoteBatchItemSerializer(serializers.Serializer):
+    target_type = serializers.ChoiceField(choices=['post', 'comment'])
+    target_id = serializers.IntegerField()
+
+class VoteBatchSerializer(serializers.Serializer):
+    votes = serializers.ListField(
+        child=VoteBatchItemSerializer(),
+        allow_empty=False,
+        max_length=VOTE_BATCH_MAX_SIZE
+    )
 
 class GlobalBanSerializer(serializers.Serializer):
     user_id = serializers.IntegerField()
@@ -191,18 +288,14 @@ class PostSearchSerializer(serializers.ModelSerializer):
     
     class Meta:
         model = Post
-        fields = ('id', 'title', 'content', 'author', 'sub_forum_name', 'created_at', 'updated_at')
+        fields = ('id', 'title', 'excerpt', 'author', 'sub_forum_name', 'created_at', 'updated_at')
 
 class SubForumSearchSerializer(serializers.ModelSerializer):
     created_by = serializers.ReadOnlyField(source='created_by.username')
-    post_count = serializers.SerializerMethodField()
     
     class Meta:
         model = SubForum
         fields = ('id', 'name', 'description', 'created_by', 'created_at', 'post_count')
-    
-    def get_post_count(self, obj):
-        return obj.posts.count()
 
 class UserSearchSerializer(serializers.ModelSerializer):
     class Meta:
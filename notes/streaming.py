@@ -0,0 +1,64 @@
+from django.http import StreamingHttpResponse
+from rest_framework.utils.encoders import JSONEncoder
+
+STREAM_QUERY_PARAM = 'stream'
+STREAM_CHUNK_SIZE = 500
+
+
+def can_stream(user):
+    """
+    流式输出不受分页上限约束，只开放给超级管理员和 staff（导出、后台工具）
+    """
+    return user.is_authenticated and (user.role == 'super_admin' or user.is_staff)
+
+
+def wants_stream(request):
+    """
+    请求是否要求流式输出（?stream=1 / ?stream=true）
+    没有权限的用户忽略该参数，仍然按分页返回
+    """
+    if request.query_params.get(STREAM_QUERY_PARAM, '').lower() not in ('1', 'true', 'yes'):
+        return False
+    return can_stream(request.user)
+
+
+def iter_json_array(queryset, serializer_class, context=None, chunk_size=STREAM_CHUNK_SIZE):
+    """
+    按块序列化 queryset，产出 JSON 数组的文本片段
+    queryset 通过 .iterator() 读取，内存占用与结果集大小无关；
+    每块整体交给 many=True 的序列化器，按页预取的数据（如点赞状态）每块只查询一次
+    """
+    if context is None:
+        context = {}
+    encoder = JSONEncoder(ensure_ascii=False)
+
+    def encode(rows):
+        # 每块使用独立的 context，块之间的缓存不会累积
+        data = serializer_class(rows, many=True, context=dict(context)).data
+        return ','.join(encoder.encode(item) for item in data)
+
+    opened = False
+    rows = []
+    for obj in queryset.iterator(chunk_size=chunk_size):
+        rows.append(obj)
+        # 每读完一块数据库结果就输出一次，避免产生大量很小的分块
+        if len(rows) >= chunk_size:
+            yield (',' if opened else '[') + encode(rows)
+            opened = True
+            rows = []
+
+    tail = encode(rows) if rows else ''
+    if not opened:
+        yield '[' + tail + ']'
+    else:
+        yield (',' + tail if tail else '') + ']'
+
+
+def stream_serialized(queryset, serializer_class, context=None, chunk_size=STREAM_CHUNK_SIZE):
+    """
+    将 queryset 以 JSON 数组的形式通过 StreamingHttpResponse 返回
+    """
+    return StreamingHttpResponse(
+        iter_json_array(queryset, serializer_class, context=context, chunk_size=chunk_size),
+        content_type='application/json'
+    )
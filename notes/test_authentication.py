@@ -0,0 +1,139 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+from .models import User, SubForum, Post
+from .testing import CacheIsolatedTestCase, use_shared_cache
+
+def user_queries(queries):
+    return [q for q in queries.captured_queries if 'FROM "users"' in q['sql']]
+
+class ClaimsAuthenticationTests(CacheIsolatedTestCase):
+    def setUp(self):
+        """创建用户、超级管理员和子论坛，并登录普通用户"""
+        super().setUp()
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.super_admin = User.objects.create_user(username='super_admin', password='testpass123', role='super_admin')
+        self.subforum = SubForum.objects.create(name='Test Forum', created_by=self.super_admin)
+        self.post = Post.objects.create(sub_forum=self.subforum, author=self.super_admin, title='Post', content='Content')
+        self.tokens = self.login('testuser')
+
+    def login(self, username):
+        response = self.client.post('/api/auth/login/', {'username': username, 'password': 'testpass123'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def vote(self, access):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {access}')
+        response = self.client.post('/api/votes/', {'target_type': 'post', 'target_id': self.post.id})
+        self.client.credentials()
+        return response
+
+    def test_login_token_carries_claims(self):
+        """测试登录返回的令牌包含角色、封禁状态和 auth_version"""
+        self.assertEqual(self.tokens['role'], 'user')
+        payload = AccessToken(self.tokens['access']).payload
+        self.assertEqual(payload['role'], 'user')
+        self.assertFalse(payload['is_banned'])
+        self.assertEqual(payload['auth_version'], 0)
+
+    def test_request_does_not_query_users(self):
+        """测试配置了共享缓存时，认证不再查询 users 表"""
+        use_shared_cache(self)
+        self.vote(self.tokens['access'])
+        with CaptureQueriesContext(connection) as queries:
+            response = self.vote(self.tokens['access'])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(user_queries(queries), [])
+
+    def test_process_local_cache_reads_auth_version(self):
+        """测试进程内缓存不保存 auth_version，其他进程的吊销立即生效"""
+        self.assertEqual(self.vote(self.tokens['access']).status_code, status.HTTP_201_CREATED)
+        # 模拟其他进程增加版本：不清除本进程的缓存
+        User.objects.filter(pk=self.user.pk).update(auth_version=5)
+        self.assertEqual(self.vote(self.tokens['access']).status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deactivated_user_is_rejected(self):
+        """测试停用用户后旧令牌失效，刷新后的令牌同样被拒绝"""
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.vote(self.tokens['access']).status_code, status.HTTP_401_UNAUTHORIZED)
+
+        refresh = RefreshToken(self.tokens['refresh'])
+        access = refresh.access_token
+        access['auth_version'] = User.current_auth_version(self.user.pk)
+        access['is_active'] = False
+        self.assertEqual(self.vote(str(access)).status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deferred_fields_load_on_access(self):
+        """测试声明之外的字段在访问时才读取"""
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.tokens["access"]}')
+        response = self.client.get('/api/user/detail/')
+        self.assertEqual(response.data['username'], 'testuser')
+        self.assertEqual(response.data['created_at'], self.user.created_at)
+
+    def test_global_ban_revokes_token(self):
+        """测试全局封禁后旧令牌立即失效，刷新后的令牌带有封禁状态"""
+        admin_tokens = self.login('super_admin')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {admin_tokens["access"]}')
+        self.client.post('/api/admin/ban/', {'user_id': self.user.id, 'action': 'ban', 'reason': 'Spam'})
+        self.client.credentials()
+
+        response = self.vote(self.tokens['access'])
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        response = self.client.post('/api/auth/token/refresh/', {'refresh': self.tokens['refresh']})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        payload = AccessToken(response.data['access']).payload
+        self.assertTrue(payload['is_banned'])
+        self.assertEqual(payload['auth_version'], 1)
+
+    def test_role_change_revokes_token(self):
+        """测试任命版主后旧令牌失效，刷新后的令牌带有新角色"""
+        admin_tokens = self.login('super_admin')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {admin_tokens["access"]}')
+        response = self.client.post(
+            f'/api/subforums/{self.subforum.id}/assign-moderator/', {'user_id': self.user.id}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.client.credentials()
+
+        response = self.vote(self.tokens['access'])
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(response.data['code'], 'token_revoked')
+
+        response = self.client.post('/api/auth/token/refresh/', {'refresh': self.tokens['refresh']})
+        access = response.data['access']
+        self.assertEqual(AccessToken(access).payload['role'], 'moderator')
+        self.assertEqual(self.vote(access).status_code, status.HTTP_201_CREATED)
+
+    def test_create_subforum_returns_fresh_tokens(self):
+        """测试创建子论坛改变角色后，响应中返回带有新角色的令牌"""
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.tokens["access"]}')
+        response = self.client.post('/api/subforums/', {'name': 'New Forum', 'description': 'Description'})
+        self.client.credentials()
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        self.assertEqual(self.vote(self.tokens['access']).status_code, status.HTTP_401_UNAUTHORIZED)
+        access = response.data['tokens']['access']
+        self.assertEqual(AccessToken(access).payload['role'], 'subforum_admin')
+        self.assertEqual(self.vote(access).status_code, status.HTTP_201_CREATED)
+
+    def test_token_without_claims_falls_back(self):
+        """测试不带声明的旧令牌回退为查询数据库"""
+        access = str(RefreshToken.for_user(self.user).access_token)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.vote(access)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(user_queries(queries)), 1)
+
+    def test_save_does_not_overwrite_auth_version(self):
+        """测试整行保存用户时不会覆盖并发增加的 auth_version"""
+        stale = User.objects.get(pk=self.user.pk)
+        self.user.bump_auth_version()
+        stale.first_name = 'Test'
+        stale.save()
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.auth_version, 1)
@@ -1,4 +1,7 @@
-from django.test import TestCase
+from io import StringIO
+from unittest import mock
+from django.core.cache import cache
+from django.core.management import call_command
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APIClient
@@ -6,9 +9,12 @@ from django.utils import timezone
 from datetime import timedelta
 
 from .models import User, SubForum, SubForumBan, ModeratorAssignment
+from .testing import CacheIsolatedTestCase, use_shared_cache
 
-class BanTests(TestCase):
+class BanTests(CacheIsolatedTestCase):
     def setUp(self):
+        super().setUp()
+
         # Create test users with different roles
         self.super_admin = User.objects.create_user(
             username='super_admin',
@@ -357,4 +363,118 @@ class BanTests(TestCase):
         })
         
         self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
-        self.assertIn('you are banned from posting in this subforum', response.data['detail'].lower()) 
\ No newline at end of file
+        self.assertIn('you are banned from posting in this subforum', response.data['detail'].lower())
+
+    def post_as_target(self):
+        self.client.force_authenticate(user=self.target_user)
+        return self.client.post(reverse('post-list'), {
+            'title': 'Test Post',
+            'content': 'Test Content',
+            'subforum_id': self.subforum.id
+        })
+
+    def test_ban_status_is_cached(self):
+        """Test that "not banned" is cached and later posts skip the ban query"""
+        use_shared_cache(self)
+        self.assertEqual(self.post_as_target().status_code, status.HTTP_201_CREATED)
+        self.assertEqual(cache.get(SubForumBan.cache_key(self.target_user.id)), [])
+
+        with self.assertNumQueries(0):
+            self.assertFalse(self.target_user.is_banned_in_subforum(self.subforum))
+
+    def test_ban_status_not_cached_per_process(self):
+        """Test that a process-local cache is never trusted for ban status"""
+        self.assertEqual(self.post_as_target().status_code, status.HTTP_201_CREATED)
+        self.assertIsNone(cache.get(SubForumBan.cache_key(self.target_user.id)))
+
+        # A ban written by another process is seen immediately
+        SubForumBan.objects.filter(user=self.target_user).delete()
+        SubForumBan.objects.bulk_create([SubForumBan(user=self.target_user, subforum=self.subforum)])
+        self.assertTrue(self.target_user.is_banned_in_subforum(self.subforum))
+
+    def test_ban_and_unban_invalidate_cache(self):
+        """Test that subforum ban and unban take effect immediately despite the cache"""
+        use_shared_cache(self)
+        self.assertEqual(self.post_as_target().status_code, status.HTTP_201_CREATED)
+
+        self.client.force_authenticate(user=self.subforum_admin)
+        self.client.post(reverse('subforum-ban-user'), {
+            'user_id': self.target_user.id,
+            'subforum_id': self.subforum.id,
+            'duration_days': 7
+        })
+        self.assertEqual(self.post_as_target().status_code, status.HTTP_403_FORBIDDEN)
+
+        self.client.force_authenticate(user=self.subforum_admin)
+        self.client.post(reverse('subforum-unban-user'), {
+            'user_id': self.target_user.id,
+            'subforum_id': self.subforum.id
+        })
+        self.assertEqual(self.post_as_target().status_code, status.HTTP_201_CREATED)
+
+    def test_global_ban_invalidates_cache(self):
+        """Test that a global ban clears the user's cached ban status"""
+        use_shared_cache(self)
+        self.assertEqual(self.post_as_target().status_code, status.HTTP_201_CREATED)
+        self.client.force_authenticate(user=self.super_admin)
+        self.client.post(reverse('global-ban-user'), {
+            'user_id': self.target_user.id,
+            'action': 'ban',
+            'reason': 'Test'
+        })
+        self.assertIsNone(cache.get(SubForumBan.cache_key(self.target_user.id)))
+
+    def create_ban(self, expires_at):
+        return SubForumBan.objects.create(
+            user=self.target_user,
+            subforum=self.subforum,
+            banned_by=self.subforum_admin,
+            reason='Test subforum ban',
+            expires_at=expires_at,
+            is_active=True
+        )
+
+    def test_expired_ban_is_inactive(self):
+        """Test that a ban past its expires_at no longer blocks posting"""
+        self.create_ban(timezone.now() - timedelta(minutes=1))
+        self.assertEqual(self.post_as_target().status_code, status.HTTP_201_CREATED)
+
+        self.client.force_authenticate(user=self.subforum_admin)
+        response = self.client.post(reverse('subforum-unban-user'), {
+            'user_id': self.target_user.id,
+            'subforum_id': self.subforum.id
+        })
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_cached_ban_expires(self):
+        """Test that a cached ban stops applying once it expires"""
+        use_shared_cache(self)
+        self.create_ban(timezone.now() + timedelta(days=1))
+        self.assertTrue(self.target_user.is_banned_in_subforum(self.subforum))
+
+        later = timezone.now() + timedelta(days=2)
+        with mock.patch('django.utils.timezone.now', return_value=later), self.assertNumQueries(0):
+            self.assertFalse(self.target_user.is_banned_in_subforum(self.subforum))
+
+    def test_expire_bans_command(self):
+        """Test that expire_bans flips expired rows in batches and keeps active ones"""
+        expired = self.create_ban(timezone.now() - timedelta(minutes=1))
+        other_subforum = SubForum.objects.create(name='Other Forum', created_by=self.super_admin)
+        active = SubForumBan.objects.create(
+            user=self.target_user,
+            subforum=other_subforum,
+            banned_by=self.super_admin,
+            expires_at=timezone.now() + timedelta(days=1)
+        )
+        permanent = SubForumBan.objects.create(user=self.normal_user, subforum=self.subforum, banned_by=self.super_admin)
+
+        out = StringIO()
+        call_command('expire_bans', '--chunk-size', '1', stdout=out)
+        self.assertIn('Expired 1 subforum bans', out.getvalue())
+
+        expired.refresh_from_db()
+        self.assertFalse(expired.is_active)
+        active.refresh_from_db()
+        self.assertTrue(active.is_active)
+        permanent.refresh_from_db()
+        self.assertTrue(permanent.is_active)
@@ -1,16 +1,17 @@
-from django.test import TestCase
 from django.contrib.auth import get_user_model
 from rest_framework.test import APIClient
 from rest_framework import status
 from django.utils import timezone
 from datetime import timedelta
 from .models import SubForum, Post, Comment, SubForumBan
+from .testing import CacheIsolatedTestCase
 
 User = get_user_model()
 
-class TestComment(TestCase):
+class TestComment(CacheIsolatedTestCase):
     def setUp(self):
         """测试前创建必要的数据"""
+        super().setUp()
         self.client = APIClient()
         
         # 创建两个用户：发帖者和评论者
@@ -120,15 +121,16 @@ class TestComment(TestCase):
         
         response = self.client.get(f'/api/posts/{self.test_post.id}/comments/')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 2)  # 应该有两个评论
+        results = response.data['results']
+        self.assertEqual(len(results), 2)  # 应该有两个评论
         
         # 验证返回的数据格式和内容
-        self.assertEqual(response.data[0]['content'], 'Test Comment')
-        self.assertEqual(response.data[1]['content'], 'Second Comment')
+        self.assertEqual(results[0]['content'], 'Test Comment')
+        self.assertEqual(results[1]['content'], 'Second Comment')
         
         # 验证返回的字段
-        comment_data = response.data[0]
-        expected_fields = {'id', 'content', 'author', 'reply_to_user', 'created_at'}
+        comment_data = results[0]
+        expected_fields = {'id', 'content', 'author', 'reply_to_user', 'post', 'parent', 'depth', 'like_count', 'viewer_has_liked', 'created_at'}
         self.assertEqual(set(comment_data.keys()), expected_fields)
 
     def test_list_comments_nonexistent_post(self):
@@ -0,0 +1,267 @@
+from io import StringIO
+from unittest import mock
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework import status
+from .models import User, SubForum, Post, Comment, ModeratorAssignment, CounterShard, PostRanking
+from .counters import increment_counters
+from .testing import CacheIsolatedTestCase
+
+class CommentCountTests(CacheIsolatedTestCase):
+    def setUp(self):
+        """创建测试用户、子论坛和帖子"""
+        super().setUp()
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='author1', password='testpass123')
+        self.subforum = SubForum.objects.create(name='Test Forum', created_by=self.user)
+        self.post = Post.objects.create(
+            sub_forum=self.subforum,
+            author=self.user,
+            title='Test Post',
+            content='Content'
+        )
+        self.client.force_authenticate(user=self.user)
+
+    def create_comment(self, **extra):
+        data = {'post_id': self.post.id, 'content': 'Comment'}
+        data.update(extra)
+        response = self.client.post('/api/comments/', data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return response.data['id']
+
+    def test_create_and_delete_update_count(self):
+        """测试创建和删除评论时维护评论数"""
+        first = self.create_comment()
+        self.create_comment()
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comment_count, 2)
+
+        response = self.client.delete(f'/api/comments/{first}/')
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comment_count, 1)
+
+    def test_delete_thread_removes_replies_from_count(self):
+        """测试删除父评论时级联删除的回复也被扣减"""
+        parent = self.create_comment()
+        self.create_comment(parent_id=parent)
+        self.client.delete(f'/api/comments/{parent}/')
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comment_count, 0)
+        self.assertEqual(Comment.objects.count(), 0)
+
+    def test_post_detail_returns_stored_count(self):
+        """测试帖子详情返回存储的评论数"""
+        self.create_comment()
+        response = self.client.get(f'/api/posts/{self.post.id}/')
+        self.assertEqual(response.data['comment_count'], 1)
+
+    def test_post_list_has_no_count_queries(self):
+        """测试帖子列表不会逐行执行 COUNT 查询"""
+        for i in range(5):
+            Post.objects.create(sub_forum=self.subforum, author=self.user, title=f'Post {i}', content='Content')
+        self.client.force_authenticate(user=None)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(f'/api/subforums/{self.subforum.id}/posts/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 6)
+        self.assertFalse(any('COUNT(' in q['sql'].upper() for q in queries.captured_queries))
+
+    def test_edit_does_not_overwrite_count(self):
+        """测试编辑帖子时不会用旧值覆盖评论数"""
+        stale = Post.objects.get(pk=self.post.pk)
+        self.create_comment()
+        stale.title = 'Edited'
+        stale.save()
+        stale.refresh_from_db()
+        self.assertEqual(stale.title, 'Edited')
+        self.assertEqual(stale.comment_count, 1)
+
+class SubForumCountTests(CacheIsolatedTestCase):
+    def setUp(self):
+        """创建子论坛管理员和子论坛"""
+        super().setUp()
+        self.client = APIClient()
+        self.admin = User.objects.create_user(username='admin1', password='testpass123')
+        self.other = User.objects.create_user(username='other', password='testpass123')
+        self.admin.role = 'subforum_admin'
+        self.admin.save()
+        self.client.force_authenticate(user=self.admin)
+        self.subforum = SubForum.objects.create(name='Counted Forum', created_by=self.admin)
+        ModeratorAssignment.objects.create(
+            user=self.admin,
+            sub_forum=self.subforum,
+            assigned_by=self.admin,
+            is_admin=True
+        )
+        self.subforum.refresh_from_db()
+
+    def test_moderator_count(self):
+        """测试任命和移除版主时维护版主数"""
+        self.assertEqual(self.subforum.moderator_count, 1)
+
+        self.client.post(f'/api/subforums/{self.subforum.id}/assign-moderator/', {'user_id': self.other.id})
+        self.subforum.refresh_from_db()
+        self.assertEqual(self.subforum.moderator_count, 2)
+
+        self.client.post(f'/api/subforums/{self.subforum.id}/remove-moderator/', {'user_id': self.other.id})
+        self.subforum.refresh_from_db()
+        self.assertEqual(self.subforum.moderator_count, 1)
+
+    def test_post_count(self):
+        """测试发帖和删帖时维护帖子数"""
+        response = self.client.post('/api/posts/', {
+            'subforum_id': self.subforum.id,
+            'title': 'Post',
+            'content': 'Content'
+        }, format='json')
+        self.subforum.refresh_from_db()
+        self.assertEqual(self.subforum.post_count, 1)
+
+        self.client.delete(f'/api/posts/{response.data["id"]}/')
+        self.subforum.refresh_from_db()
+        self.assertEqual(self.subforum.post_count, 0)
+
+    def test_cascade_and_queryset_deletes_update_counts(self):
+        """测试删除用户级联删除帖子和任命、queryset 批量删除时同样维护计数"""
+        Post.objects.create(sub_forum=self.subforum, author=self.admin, title='Admin Post', content='Content')
+        Post.objects.create(sub_forum=self.subforum, author=self.other, title='Other Post', content='Content')
+        ModeratorAssignment.objects.create(user=self.other, sub_forum=self.subforum, assigned_by=self.admin)
+        self.subforum.refresh_from_db()
+        self.assertEqual((self.subforum.post_count, self.subforum.moderator_count), (2, 2))
+
+        self.other.delete()
+        self.subforum.refresh_from_db()
+        self.assertEqual((self.subforum.post_count, self.subforum.moderator_count), (1, 1))
+
+        Post.objects.filter(sub_forum=self.subforum).delete()
+        self.subforum.refresh_from_db()
+        self.assertEqual(self.subforum.post_count, 0)
+
+        ModeratorAssignment.objects.filter(sub_forum=self.subforum).delete()
+        self.subforum.refresh_from_db()
+        self.assertEqual(self.subforum.moderator_count, 0)
+
+    def test_update_does_not_overwrite_counts(self):
+        """测试编辑子论坛时不会用旧值覆盖计数"""
+        Post.objects.create(sub_forum=self.subforum, author=self.admin, title='Post', content='Content')
+        response = self.client.put(f'/api/subforums/{self.subforum.id}/', {'description': 'New'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.subforum.refresh_from_db()
+        self.assertEqual(self.subforum.description, 'New')
+        self.assertEqual(self.subforum.post_count, 1)
+
+    def test_listings_are_single_queries(self):
+        """测试子论坛列表返回计数且只执行一次查询"""
+        Post.objects.create(sub_forum=self.subforum, author=self.admin, title='Post', content='Content')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/subforums/')
+        self.assertEqual(response.data[0]['post_count'], 1)
+        self.assertEqual(response.data[0]['moderator_count'], 1)
+        self.assertEqual(len(queries.captured_queries), 1)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/moderator/my-subforums/')
+        self.assertEqual(response.data[0]['post_count'], 1)
+        self.assertEqual(len(queries.captured_queries), 1)
+
+class ShardedCounterTests(CacheIsolatedTestCase):
+    def setUp(self):
+        """创建测试用户、子论坛和帖子"""
+        super().setUp()
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='author1', password='testpass123')
+        self.voters = [
+            User.objects.create_user(username=f'voter{i}', password='testpass123')
+            for i in range(3)
+        ]
+        self.subforum = SubForum.objects.create(name='Test Forum', created_by=self.user)
+        self.post = Post.objects.create(
+            sub_forum=self.subforum,
+            author=self.user,
+            title='Viral Post',
+            content='Content'
+        )
+
+    def like(self, user):
+        self.client.force_authenticate(user=user)
+        response = self.client.post('/api/votes/', {'target_type': 'post', 'target_id': self.post.id}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return response
+
+    def pending(self, field):
+        return sum(CounterShard.objects.filter(
+            target_type='post', target_id=self.post.id, field=field
+        ).values_list('delta', flat=True))
+
+    @mock.patch('notes.counters.SHARD_PROMOTE_WRITES', 3)
+    def test_promoted_after_write_threshold(self):
+        """测试写入速率达到阈值后切换为分片计数"""
+        self.like(self.voters[0])
+        self.like(self.voters[1])
+        self.post.refresh_from_db()
+        self.assertFalse(self.post.counters_sharded)
+        self.assertEqual(self.post.like_count, 2)
+
+        response = self.like(self.voters[2])
+        self.assertEqual(response.data['like_count'], 3)
+        self.post.refresh_from_db()
+        self.assertTrue(self.post.counters_sharded)
+        self.assertEqual(self.post.like_count, 2)
+        self.assertEqual(self.pending('like_count'), 1)
+
+    @mock.patch('notes.counters.SHARD_PROMOTE_WRITES', 3)
+    def test_batch_writes_counted_once(self):
+        """测试批量写入对每个对象只统计一次写入速率"""
+        for i in range(2):
+            self.assertEqual(increment_counters([Post.objects.get(pk=self.post.pk)], 'like_count'), set())
+        self.post.refresh_from_db()
+        self.assertFalse(self.post.counters_sharded)
+        self.assertEqual(self.post.like_count, 2)
+
+        self.assertEqual(increment_counters([self.post], 'like_count'), {self.post.pk})
+        self.post.refresh_from_db()
+        self.assertTrue(self.post.counters_sharded)
+        self.assertEqual(self.pending('like_count'), 1)
+
+    def test_fold_shards(self):
+        """测试合并分片后计数列和热度记录得到更新"""
+        Post.objects.filter(pk=self.post.pk).update(counters_sharded=True)
+        self.client.force_authenticate(user=self.user)
+        for i in range(2):
+            response = self.client.post('/api/comments/', {'post_id': self.post.id, 'content': 'Comment'}, format='json')
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.like(self.voters[0])
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comment_count, 0)
+        self.assertEqual(self.pending('comment_count'), 2)
+
+        call_command('fold_counter_shards', stdout=StringIO())
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comment_count, 2)
+        self.assertEqual(self.post.like_count, 1)
+        self.assertFalse(CounterShard.objects.exists())
+
+        ranking = PostRanking.objects.get(post=self.post)
+        self.assertEqual(ranking.comment_count, 2)
+        self.assertEqual(ranking.like_count, 1)
+
+    def test_edit_keeps_sharded_flag(self):
+        """测试编辑帖子时不会用旧值覆盖分片标记"""
+        stale = Post.objects.get(pk=self.post.pk)
+        Post.objects.filter(pk=self.post.pk).update(counters_sharded=True)
+        stale.title = 'Edited'
+        stale.save()
+        stale.refresh_from_db()
+        self.assertTrue(stale.counters_sharded)
+
+    def test_reconcile_discards_pending_shards(self):
+        """测试重新统计计数时丢弃尚未合并的分片"""
+        Post.objects.filter(pk=self.post.pk).update(counters_sharded=True)
+        self.like(self.voters[0])
+        call_command('reconcile_counters', stdout=StringIO())
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.like_count, 1)
+        self.assertFalse(CounterShard.objects.exists())
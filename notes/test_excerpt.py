@@ -0,0 +1,64 @@
+from django.test import TestCase
+from rest_framework.test import APIClient
+from rest_framework import status
+from .models import User, SubForum, Post
+from .excerpts import make_excerpt, EXCERPT_LENGTH
+
+class PostExcerptTests(TestCase):
+    def setUp(self):
+        """创建测试用户和子论坛"""
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='author1', password='testpass123')
+        self.subforum = SubForum.objects.create(name='Test Forum', created_by=self.user)
+        self.client.force_authenticate(user=self.user)
+
+    def test_strip_markdown(self):
+        """测试去掉 Markdown 标记"""
+        content = '# Title\n\nSome **bold** and [a link](http://example.com).\n\n```\ncode\n```\n- item'
+        self.assertEqual(make_excerpt(content, 'markdown'), 'Title Some bold and a link. item')
+
+    def test_strip_html(self):
+        """测试去掉 WYSIWYG 的 HTML 标记"""
+        content = '<p>Hello&nbsp;<b>world</b></p><p>again</p>'
+        self.assertEqual(make_excerpt(content, 'wysiwyg'), 'Hello world again')
+
+    def test_truncate(self):
+        """测试摘要被截断"""
+        excerpt = make_excerpt('word ' * 200)
+        self.assertLessEqual(len(excerpt), EXCERPT_LENGTH)
+        self.assertTrue(excerpt.endswith('…'))
+
+    def test_excerpt_on_create_and_update(self):
+        """测试发帖和编辑时生成摘要"""
+        response = self.client.post('/api/posts/', {
+            'subforum_id': self.subforum.id,
+            'title': 'New Post',
+            'content': '**Hello** world'
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        post = Post.objects.get(id=response.data['id'])
+        self.assertEqual(post.excerpt, 'Hello world')
+
+        response = self.client.patch(f'/api/posts/{post.id}/', {'content': '_Edited_ text'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        post.refresh_from_db()
+        self.assertEqual(post.excerpt, 'Edited text')
+
+    def test_list_returns_excerpt(self):
+        """测试列表返回摘要而不是完整内容，详情返回完整内容"""
+        self.client.post('/api/posts/', {
+            'subforum_id': self.subforum.id,
+            'title': 'New Post',
+            'content': '**Hello** world'
+        }, format='json')
+        response = self.client.get('/api/posts/')
+        self.assertNotIn('content', response.data['results'][0])
+        self.assertEqual(response.data['results'][0]['excerpt'], 'Hello world')
+
+        post_id = response.data['results'][0]['id']
+        response = self.client.get(f'/api/posts/{post_id}/')
+        self.assertEqual(response.data['content'], '**Hello** world')
+
+        response = self.client.get('/api/search/posts/', {'q': 'Hello'})
+        self.assertEqual(response.data['results'][0]['excerpt'], 'Hello world')
+        self.assertNotIn('content', response.data['results'][0])
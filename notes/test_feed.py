@@ -0,0 +1,68 @@
+from datetime import timedelta
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework import status
+from .models import User, SubForum, Post, SubForumSubscription
+
+class HomeFeedTests(TestCase):
+    def setUp(self):
+        """创建三个子论坛，交错发布帖子"""
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='reader', password='testpass123')
+        self.author = User.objects.create_user(username='author1', password='testpass123')
+        self.forums = [
+            SubForum.objects.create(name=f'Forum {i}', created_by=self.author)
+            for i in range(3)
+        ]
+        base_time = timezone.now() - timedelta(days=1)
+        for i in range(9):
+            Post.objects.create(
+                sub_forum=self.forums[i % 3],
+                author=self.author,
+                title=f'Post {i}',
+                content='Content',
+                created_at=base_time + timedelta(minutes=i)
+            )
+        self.client.force_authenticate(user=self.user)
+
+    def test_subscribe_and_unsubscribe(self):
+        """测试订阅和取消订阅"""
+        url = f'/api/subforums/{self.forums[0].id}/subscribe/'
+        response = self.client.post(url)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        response = self.client.post(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(SubForumSubscription.objects.filter(user=self.user).count(), 1)
+
+        response = self.client.post(f'/api/subforums/{self.forums[0].id}/unsubscribe/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = self.client.post(f'/api/subforums/{self.forums[0].id}/unsubscribe/')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_subscribe_unauthenticated(self):
+        """测试未登录用户不能订阅"""
+        self.client.force_authenticate(user=None)
+        response = self.client.post(f'/api/subforums/{self.forums[0].id}/subscribe/')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_feed_merges_subscribed_forums(self):
+        """测试信息流合并订阅的子论坛，并按时间倒序翻页"""
+        SubForumSubscription.objects.create(user=self.user, sub_forum=self.forums[0])
+        SubForumSubscription.objects.create(user=self.user, sub_forum=self.forums[2])
+
+        titles = []
+        url = '/api/feed/?page_size=4'
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            titles.extend(p['title'] for p in response.data['results'])
+            url = response.data['next']
+        self.assertEqual(titles, ['Post 8', 'Post 6', 'Post 5', 'Post 3', 'Post 2', 'Post 0'])
+
+    def test_feed_without_subscriptions(self):
+        """测试没有订阅时信息流为空"""
+        response = self.client.get('/api/feed/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['results'], [])
+        self.assertIsNone(response.data['next'])
@@ -139,15 +139,17 @@ class TestForum(TestCase):
         
         response = self.client.get(f'/api/subforums/{self.test_forum.id}/posts/')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 2)  # 应该有两个帖子
+        results = response.data['results']
+        self.assertEqual(len(results), 2)  # 应该有两个帖子
+        self.assertIsNone(response.data['next'])
         
         # 验证返回的数据格式和内容
-        self.assertEqual(response.data[0]['title'], 'Second Post')  # 最新的帖子应该在前面
-        self.assertEqual(response.data[1]['title'], 'Test Post')
+        self.assertEqual(results[0]['title'], 'Second Post')  # 最新的帖子应该在前面
+        self.assertEqual(results[1]['title'], 'Test Post')
         
         # 验证返回的字段
-        post_data = response.data[0]
-        expected_fields = {'id', 'title', 'content', 'format', 'author', 'created_at', 'updated_at'}
+        post_data = results[0]
+        expected_fields = {'id', 'title', 'excerpt', 'format', 'author', 'sub_forum', 'created_at', 'updated_at', 'comment_count', 'like_count', 'viewer_has_liked'}
         self.assertEqual(set(post_data.keys()), expected_fields)
 
     def test_list_posts_nonexistent_subforum(self):
@@ -0,0 +1,143 @@
+from datetime import timedelta
+from io import StringIO
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework import status
+from .models import User, SubForum, Post, Comment, LikeBucket, DailyLikeBucket
+from .leaderboards import record_likes
+
+class LeaderboardTests(TestCase):
+    def setUp(self):
+        """创建两个子论坛和若干帖子"""
+        self.client = APIClient()
+        self.author = User.objects.create_user(username='author1', password='testpass123')
+        self.voters = [User.objects.create_user(username=f'voter{i}', password='testpass123') for i in range(3)]
+        self.subforum = SubForum.objects.create(name='Test Forum', created_by=self.author)
+        self.other_subforum = SubForum.objects.create(name='Other Forum', created_by=self.author)
+        self.posts = [
+            Post.objects.create(sub_forum=self.subforum, author=self.author, title=f'Post {i}', content='Content')
+            for i in range(3)
+        ]
+        self.other_post = Post.objects.create(sub_forum=self.other_subforum, author=self.author, title='Other', content='Content')
+        self.comment = Comment.objects.create(post=self.posts[0], author=self.author, content='Comment')
+
+    def like(self, user, target_type, target_id):
+        self.client.force_authenticate(user=user)
+        response = self.client.post('/api/votes/', {'target_type': target_type, 'target_id': target_id}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.client.force_authenticate(user=None)
+
+    def add_bucket(self, post, hours_ago, likes):
+        record_likes('post', [(post, likes)], at=timezone.now() - timedelta(hours=hours_ago))
+
+    def test_likes_are_bucketed(self):
+        """测试点赞计入当前小时的分桶，同一小时的点赞累加到同一行"""
+        for voter in self.voters:
+            self.like(voter, 'post', self.posts[1].id)
+        self.like(self.voters[0], 'comment', self.comment.id)
+
+        bucket = LikeBucket.objects.get(target_type='post', target_id=self.posts[1].id)
+        self.assertEqual(bucket.likes, 3)
+        self.assertEqual(bucket.sub_forum, self.subforum)
+        self.assertEqual(DailyLikeBucket.objects.get(target_type='post', target_id=self.posts[1].id).likes, 3)
+        self.assertEqual(LikeBucket.objects.get(target_type='comment').sub_forum, self.subforum)
+
+    def test_batch_votes_are_bucketed(self):
+        """测试批量点赞同样计入分桶"""
+        self.client.force_authenticate(user=self.voters[0])
+        self.client.post('/api/votes/batch/', {'votes': [
+            {'target_type': 'post', 'target_id': self.posts[0].id},
+            {'target_type': 'comment', 'target_id': self.comment.id},
+        ]}, format='json')
+        self.assertEqual(LikeBucket.objects.count(), 2)
+
+    def test_record_likes_in_bulk(self):
+        """测试批量记录点赞时每张分桶表只执行固定条数的语句，已有分桶累加"""
+        record_likes('post', [(self.posts[0], 2)])
+        with CaptureQueriesContext(connection) as ctx:
+            record_likes('post', [(post, i + 1) for i, post in enumerate(self.posts)] + [(self.posts[1], 1)])
+        self.assertEqual(len(ctx.captured_queries), 4)
+        self.assertEqual(
+            dict(LikeBucket.objects.values_list('target_id', 'likes')),
+            {self.posts[0].id: 3, self.posts[1].id: 3, self.posts[2].id: 3}
+        )
+        self.assertEqual(
+            dict(DailyLikeBucket.objects.values_list('target_id', 'likes')),
+            {self.posts[0].id: 3, self.posts[1].id: 3, self.posts[2].id: 3}
+        )
+
+    def test_top_posts_by_window(self):
+        """测试按时间窗口统计点赞最多的帖子"""
+        self.add_bucket(self.posts[0], 1, 5)
+        self.add_bucket(self.posts[1], 2, 3)
+        self.add_bucket(self.posts[1], 3, 3)
+        self.add_bucket(self.posts[2], 72, 20)
+
+        response = self.client.get('/api/leaderboards/', {'window': '24h'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [(p['title'], p['window_likes']) for p in response.data['results']],
+            [('Post 1', 6), ('Post 0', 5)]
+        )
+
+        response = self.client.get('/api/leaderboards/', {'window': '7d', 'limit': 1})
+        self.assertEqual([p['title'] for p in response.data['results']], ['Post 2'])
+
+    def test_subforum_leaderboard(self):
+        """测试子论坛排行榜只统计该子论坛"""
+        self.add_bucket(self.posts[0], 1, 1)
+        self.add_bucket(self.other_post, 1, 10)
+
+        response = self.client.get('/api/leaderboards/', {'subforum': self.subforum.id})
+        self.assertEqual([p['title'] for p in response.data['results']], ['Post 0'])
+
+        response = self.client.get('/api/leaderboards/')
+        self.assertEqual([p['title'] for p in response.data['results']], ['Other', 'Post 0'])
+
+    def test_top_comments(self):
+        """测试评论排行榜"""
+        self.like(self.voters[0], 'comment', self.comment.id)
+        response = self.client.get('/api/leaderboards/', {'type': 'comment', 'window': '30d'})
+        self.assertEqual(response.data['results'][0]['content'], 'Comment')
+        self.assertEqual(response.data['results'][0]['window_likes'], 1)
+
+    def test_does_not_scan_votes(self):
+        """测试排行榜只读取分桶，不查询点赞表"""
+        self.like(self.voters[0], 'post', self.posts[0].id)
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get('/api/leaderboards/', {'window': '7d'})
+        self.assertFalse(any('_votes"' in q['sql'] for q in queries.captured_queries))
+
+    def test_long_windows_read_daily_buckets(self):
+        """测试 7d、30d 窗口只读取按天汇总的分桶，每个对象每天一行"""
+        for hours_ago in range(0, 24 * 5, 6):
+            self.add_bucket(self.posts[0], hours_ago, 1)
+        self.assertLessEqual(DailyLikeBucket.objects.filter(target_id=self.posts[0].id).count(), 6)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/leaderboards/', {'window': '30d'})
+        self.assertEqual(response.data['results'][0]['window_likes'], 20)
+        self.assertFalse(any('"like_buckets"' in q['sql'] for q in queries.captured_queries))
+
+    def test_invalid_params(self):
+        """测试无效的参数返回400"""
+        self.assertEqual(self.client.get('/api/leaderboards/', {'window': '1y'}).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get('/api/leaderboards/', {'type': 'user'}).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get('/api/leaderboards/', {'limit': 'ten'}).status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_prune_old_buckets(self):
+        """测试清理超出最长时间窗口的分桶"""
+        self.add_bucket(self.posts[0], 1, 1)
+        self.add_bucket(self.posts[1], 24 * 40, 1)
+        self.add_bucket(self.posts[2], 72, 1)
+        call_command('prune_like_buckets', stdout=StringIO())
+        # 小时分桶只保留 24 小时，按天分桶保留 30 天
+        self.assertEqual(list(LikeBucket.objects.values_list('target_id', flat=True)), [self.posts[0].id])
+        self.assertEqual(
+            sorted(DailyLikeBucket.objects.values_list('target_id', flat=True)),
+            [self.posts[0].id, self.posts[2].id]
+        )
@@ -1,13 +1,32 @@
-from django.test import TestCase
+import importlib
+import time
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+from django.apps import apps
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
 from django.urls import reverse
 from rest_framework.test import APIClient
 from rest_framework import status
+from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from .models import User
 from .serializers import UserLoginSerializer
+from . import blacklist
+from .authentication import ClaimsRefreshToken
+from .blacklist import BlacklistFilter, BloomFilter, blacklist_filter
+from .testing import use_shared_cache
 
 class LogoutTests(TestCase):
     def setUp(self):
         """Set up test data"""
+        # The blacklist filter is process-wide, rebuild it from this test's rows
+        blacklist_filter.reset()
+        self.addCleanup(blacklist_filter.reset)
         self.client = APIClient()
         self.logout_url = reverse('logout')
         self.login_url = reverse('login')
@@ -178,3 +197,124 @@ class LogoutTests(TestCase):
             format='json'
         )
         self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def logout(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.access_token}')
+        response = self.client.post(self.logout_url, {'refresh_token': self.refresh_token}, format='json')
+        self.client.credentials()
+        return response
+
+    def test_refresh_skips_blacklist_query(self):
+        """Test that refreshing a token that is not blacklisted does not query the blacklist"""
+        use_shared_cache(self)
+        self.client.post(reverse('token_refresh'), {'refresh': self.refresh_token}, format='json')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(reverse('token_refresh'), {'refresh': self.refresh_token}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(any('token_blacklist_blacklistedtoken' in q['sql'] for q in queries.captured_queries))
+
+    def test_process_local_cache_checks_database(self):
+        """Test that without a shared cache every refresh checks the blacklist table"""
+        jti = RefreshToken(self.refresh_token)['jti']
+        self.assertTrue(blacklist_filter.might_contain(jti))
+        # Blacklisted by another process: this process never hears about it
+        BlacklistedToken.objects.create(token=OutstandingToken.objects.get(jti=jti))
+        response = self.client.post(reverse('token_refresh'), {'refresh': self.refresh_token}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_blacklisted_token_cannot_refresh(self):
+        """Test that a logged out refresh token is rejected by the refresh endpoint"""
+        self.assertEqual(self.logout().status_code, status.HTTP_200_OK)
+        response = self.client.post(reverse('token_refresh'), {'refresh': self.refresh_token}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_other_process_filter_syncs(self):
+        """Test that a filter in another process picks up new blacklist entries"""
+        use_shared_cache(self)
+        other = BlacklistFilter()
+        jti = RefreshToken(self.refresh_token)['jti']
+        self.assertFalse(other.might_contain(jti))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.logout()
+        self.assertTrue(other.might_contain(jti))
+
+        # The filter is rebuilt from the table after a restart
+        self.assertTrue(BlacklistFilter().might_contain(jti))
+
+    def test_sync_picks_up_rows_committed_out_of_order(self):
+        """Test that a row with a lower id than the last one synced is still picked up"""
+        use_shared_cache(self)
+        tokens = [RefreshToken.for_user(self.user2) for _ in range(2)]
+        outstanding = [OutstandingToken.objects.get(jti=token['jti']) for token in tokens]
+        # Allocate an id for a transaction that has not committed yet
+        early = BlacklistedToken.objects.create(token=outstanding[0])
+        early_id = early.id
+        early.delete()
+
+        other = BlacklistFilter()
+        self.assertFalse(other.might_contain(tokens[0]['jti']))
+        # A later row commits first and is synced before the earlier one becomes visible
+        with self.captureOnCommitCallbacks(execute=True):
+            blacklist_filter.add(tokens[1]['jti'])
+            BlacklistedToken.objects.create(token=outstanding[1])
+        self.assertTrue(other.might_contain(tokens[1]['jti']))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            BlacklistedToken.objects.create(id=early_id, token=outstanding[0])
+            blacklist_filter.add(tokens[0]['jti'])
+        self.assertTrue(other.might_contain(tokens[0]['jti']))
+
+    def test_filter_is_rebuilt_periodically(self):
+        """Test that the filter is rebuilt from the table once it is older than the rebuild interval"""
+        use_shared_cache(self)
+        jti = RefreshToken(self.refresh_token)['jti']
+        other = BlacklistFilter()
+        self.assertFalse(other.might_contain(jti))
+        # Blacklisted without notifying other processes
+        BlacklistedToken.objects.create(token=OutstandingToken.objects.get(jti=jti))
+        self.assertFalse(other.might_contain(jti))
+
+        later = time.monotonic() + blacklist.BLACKLIST_REBUILD_INTERVAL + 1
+        with mock.patch('notes.blacklist.time.monotonic', return_value=later):
+            self.assertTrue(other.might_contain(jti))
+
+    def test_bloom_filter_has_no_false_negatives(self):
+        """Test that every added item is reported as present"""
+        bloom = BloomFilter(1000)
+        items = [f'jti-{i}' for i in range(1000)]
+        for item in items:
+            bloom.add(item)
+        self.assertTrue(all(item in bloom for item in items))
+        false_positives = sum(f'other-{i}' in bloom for i in range(10000))
+        self.assertLess(false_positives, 100)
+
+class TokenPurgeTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.tokens = [ClaimsRefreshToken.for_user(self.user) for _ in range(3)]
+        self.tokens[0].blacklist()
+        # Expire the first two tokens
+        expired = [token['jti'] for token in self.tokens[:2]]
+        OutstandingToken.objects.filter(jti__in=expired).update(expires_at=timezone.now() - timedelta(days=1))
+
+    def test_purge_expired_tokens(self):
+        """Test that expired tokens are deleted in batches and valid ones are kept"""
+        out = StringIO()
+        call_command('purge_expired_tokens', '--chunk-size', '1', stdout=out)
+        self.assertIn('Deleted 2 outstanding tokens and 1 blacklisted tokens', out.getvalue())
+        self.assertEqual(list(OutstandingToken.objects.values_list('jti', flat=True)), [self.tokens[2]['jti']])
+        self.assertEqual(BlacklistedToken.objects.count(), 0)
+
+    @override_settings(TOKEN_PURGE_INTERVAL=3600)
+    def test_purger_started_when_configured(self):
+        """Test that the WSGI entry point starts the background purger once, and app setup and token issuing do not"""
+        self.addCleanup(setattr, blacklist, '_token_purger', None)
+        with mock.patch('notes.blacklist.threading.Thread') as thread:
+            ClaimsRefreshToken.for_user(self.user)
+            apps.get_app_config('notes').ready()
+            thread.assert_not_called()
+            importlib.reload(importlib.import_module('postly.wsgi'))
+            importlib.reload(importlib.import_module('postly.wsgi'))
+        thread.assert_called_once()
+        thread.return_value.start.assert_called_once()
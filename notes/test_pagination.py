@@ -0,0 +1,181 @@
+from datetime import timedelta
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework import status
+from .models import User, SubForum, Post, Comment
+
+class PostCursorPaginationTests(TestCase):
+    def setUp(self):
+        """创建测试用户、子论坛和一批帖子"""
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='author1', password='testpass123')
+        self.other_user = User.objects.create_user(username='author2', password='testpass123')
+        self.subforum = SubForum.objects.create(name='Test Forum', created_by=self.user)
+
+        # 前两条帖子使用相同的 created_at，用 id 区分先后
+        base_time = timezone.now() - timedelta(days=1)
+        self.posts = []
+        for i in range(5):
+            created_at = base_time if i < 2 else base_time + timedelta(minutes=i)
+            self.posts.append(Post.objects.create(
+                sub_forum=self.subforum,
+                author=self.user if i % 2 == 0 else self.other_user,
+                title=f'Post {i}',
+                content=f'Content {i}',
+                created_at=created_at
+            ))
+
+    def test_first_page(self):
+        """测试第一页返回最新的帖子"""
+        response = self.client.get('/api/posts/', {'page_size': 2})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([p['title'] for p in response.data['results']], ['Post 4', 'Post 3'])
+        self.assertIsNotNone(response.data['next'])
+        self.assertIsNone(response.data['previous'])
+
+    def test_walk_all_pages(self):
+        """测试沿着 next 链接可以不重不漏地遍历全部帖子"""
+        titles = []
+        url = '/api/posts/?page_size=2'
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            titles.extend(p['title'] for p in response.data['results'])
+            url = response.data['next']
+        self.assertEqual(titles, ['Post 4', 'Post 3', 'Post 2', 'Post 1', 'Post 0'])
+
+    def test_previous_link(self):
+        """测试 previous 链接返回上一页"""
+        first = self.client.get('/api/posts/', {'page_size': 2})
+        second = self.client.get(first.data['next'])
+        self.assertEqual([p['title'] for p in second.data['results']], ['Post 2', 'Post 1'])
+
+        previous = self.client.get(second.data['previous'])
+        self.assertEqual([p['title'] for p in previous.data['results']], ['Post 4', 'Post 3'])
+        self.assertIsNone(previous.data['previous'])
+
+    def test_author_filter_with_cursor(self):
+        """测试 author 过滤条件在翻页时保持有效"""
+        response = self.client.get('/api/posts/', {'author': 'author1', 'page_size': 2})
+        self.assertEqual([p['title'] for p in response.data['results']], ['Post 4', 'Post 2'])
+
+        response = self.client.get(response.data['next'])
+        self.assertEqual([p['title'] for p in response.data['results']], ['Post 0'])
+        self.assertIsNone(response.data['next'])
+
+    def test_page_size_is_bounded(self):
+        """测试 page_size 不能超过上限"""
+        response = self.client.get('/api/posts/', {'page_size': 100000})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 5)
+
+    def test_invalid_cursor(self):
+        """测试无效游标返回404"""
+        response = self.client.get('/api/posts/', {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+class SubForumPostPaginationTests(TestCase):
+    def setUp(self):
+        """创建两个子论坛，分别包含若干帖子"""
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='author1', password='testpass123')
+        self.subforum = SubForum.objects.create(name='Busy Forum', created_by=self.user)
+        self.other_subforum = SubForum.objects.create(name='Other Forum', created_by=self.user)
+
+        base_time = timezone.now() - timedelta(days=1)
+        for i in range(60):
+            Post.objects.create(
+                sub_forum=self.subforum,
+                author=self.user,
+                title=f'Post {i}',
+                content=f'Content {i}',
+                created_at=base_time + timedelta(minutes=i)
+            )
+        Post.objects.create(
+            sub_forum=self.other_subforum,
+            author=self.user,
+            title='Other Post',
+            content='Other Content'
+        )
+
+    def test_default_page_size(self):
+        """测试未指定 page_size 时使用默认分页大小"""
+        response = self.client.get(f'/api/subforums/{self.subforum.id}/posts/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 20)
+        self.assertEqual(response.data['results'][0]['title'], 'Post 59')
+        self.assertIsNotNone(response.data['next'])
+
+    def test_page_size_is_bounded(self):
+        """测试 page_size 超过上限时被截断"""
+        response = self.client.get(f'/api/subforums/{self.subforum.id}/posts/', {'page_size': 1000})
+        self.assertEqual(len(response.data['results']), 50)
+
+    def test_walk_pages_stays_in_subforum(self):
+        """测试翻页只返回当前子论坛的帖子"""
+        titles = []
+        url = f'/api/subforums/{self.subforum.id}/posts/?page_size=25'
+        while url:
+            response = self.client.get(url)
+            titles.extend(p['title'] for p in response.data['results'])
+            url = response.data['next']
+        self.assertEqual(len(titles), 60)
+        self.assertNotIn('Other Post', titles)
+
+class CommentCursorPaginationTests(TestCase):
+    def setUp(self):
+        """创建一个帖子和若干评论"""
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='author1', password='testpass123')
+        self.subforum = SubForum.objects.create(name='Test Forum', created_by=self.user)
+        self.post = Post.objects.create(
+            sub_forum=self.subforum,
+            author=self.user,
+            title='Megathread',
+            content='Content'
+        )
+        base_time = timezone.now() - timedelta(hours=1)
+        self.comments = [
+            Comment.objects.create(
+                post=self.post,
+                author=self.user,
+                content=f'Comment {i}',
+                created_at=base_time + timedelta(minutes=i)
+            )
+            for i in range(5)
+        ]
+        self.url = f'/api/posts/{self.post.id}/comments/'
+
+    def test_forward_and_backward(self):
+        """测试评论按时间正序分页，并可以向前翻页"""
+        first = self.client.get(self.url, {'page_size': 2})
+        self.assertEqual([c['content'] for c in first.data['results']], ['Comment 0', 'Comment 1'])
+
+        second = self.client.get(first.data['next'])
+        self.assertEqual([c['content'] for c in second.data['results']], ['Comment 2', 'Comment 3'])
+
+        back = self.client.get(second.data['previous'])
+        self.assertEqual([c['content'] for c in back.data['results']], ['Comment 0', 'Comment 1'])
+
+    def test_after_comment(self):
+        """测试 after 参数只返回更新的评论"""
+        response = self.client.get(self.url, {'after': self.comments[2].id})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([c['content'] for c in response.data['results']], ['Comment 3', 'Comment 4'])
+
+        response = self.client.get(self.url, {'after': self.comments[4].id})
+        self.assertEqual(response.data['results'], [])
+
+    def test_after_comment_from_other_post(self):
+        """测试 after 指向其他帖子的评论时返回400"""
+        other_post = Post.objects.create(
+            sub_forum=self.subforum,
+            author=self.user,
+            title='Other',
+            content='Other'
+        )
+        other_comment = Comment.objects.create(post=other_post, author=self.user, content='Other')
+        response = self.client.get(self.url, {'after': other_comment.id})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('after', response.data)
@@ -0,0 +1,65 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APIClient
+from .models import User, SubForum, Post, ModeratorAssignment, SubForumBan
+from .testing import CacheIsolatedTestCase
+
+def permission_queries(queries):
+    return [
+        q for q in queries.captured_queries
+        if '"moderator_assignments"' in q['sql'] or '"subforum_bans"' in q['sql']
+    ]
+
+class PermissionContextTests(CacheIsolatedTestCase):
+    def setUp(self):
+        """创建两个子论坛、一个版主和若干帖子"""
+        super().setUp()
+        self.client = APIClient()
+        self.author = User.objects.create_user(username='author1', password='testpass123')
+        self.moderator = User.objects.create_user(username='moderator1', password='testpass123', role='moderator')
+        self.subforum = SubForum.objects.create(name='Test Forum', created_by=self.author)
+        self.other_subforum = SubForum.objects.create(name='Other Forum', created_by=self.author)
+        ModeratorAssignment.objects.create(user=self.moderator, sub_forum=self.subforum, assigned_by=self.author)
+        self.post = Post.objects.create(sub_forum=self.subforum, author=self.author, title='Post', content='Content')
+        self.other_post = Post.objects.create(sub_forum=self.other_subforum, author=self.author, title='Other', content='Content')
+
+    def test_is_moderator_per_subforum(self):
+        """测试帖子中的 is_moderator 按子论坛区分"""
+        self.client.force_authenticate(user=self.moderator)
+        response = self.client.get('/api/posts/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        is_moderator = {p['title']: p['sub_forum']['is_moderator'] for p in response.data['results']}
+        self.assertEqual(is_moderator, {'Post': True, 'Other': False})
+
+    def test_list_loads_assignments_once(self):
+        """测试帖子列表只查询一次版主任命，与帖子数量无关"""
+        Post.objects.bulk_create([
+            Post(sub_forum=self.subforum, author=self.author, title=f'Post {i}', content='Content')
+            for i in range(20)
+        ])
+        self.client.force_authenticate(user=self.moderator)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/posts/')
+        self.assertEqual(len(response.data['results']), 20)
+        self.assertEqual(len(permission_queries(queries)), 1)
+
+    def test_moderator_can_delete_post(self):
+        """测试版主可以删除所管理子论坛的帖子，但不能删除其他子论坛的帖子"""
+        self.client.force_authenticate(user=self.moderator)
+        response = self.client.delete(f'/api/posts/{self.other_post.id}/')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        response = self.client.delete(f'/api/posts/{self.post.id}/')
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+
+    def test_ban_check_uses_preloaded_bans(self):
+        """测试封禁检查一次加载用户的全部封禁"""
+        SubForumBan.objects.create(user=self.author, subforum=self.other_subforum, banned_by=self.moderator)
+        self.client.force_authenticate(user=self.author)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post('/api/comments/', {'post_id': self.other_post.id, 'content': 'Hi'})
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(len(permission_queries(queries)), 1)
+
+        response = self.client.post('/api/comments/', {'post_id': self.post.id, 'content': 'Hi'})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
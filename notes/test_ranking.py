@@ -0,0 +1,105 @@
+from datetime import timedelta
+from io import StringIO
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework import status
+from .models import User, SubForum, Post, Comment, PostRanking
+from .ranking import hot_score
+
+class HotRankingTests(TestCase):
+    def setUp(self):
+        """创建测试用户和子论坛"""
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='author1', password='testpass123')
+        self.voter = User.objects.create_user(username='voter1', password='testpass123')
+        self.subforum = SubForum.objects.create(name='Test Forum', created_by=self.user)
+
+    def create_post(self, title):
+        self.client.force_authenticate(user=self.user)
+        response = self.client.post('/api/posts/', {
+            'subforum_id': self.subforum.id,
+            'title': title,
+            'content': 'Content'
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return Post.objects.get(id=response.data['id'])
+
+    def test_hot_score_decays_with_age(self):
+        """测试相同互动量下，越老的帖子热度越低"""
+        now = timezone.now()
+        fresh = hot_score(10, 2, now - timedelta(hours=1))
+        old = hot_score(10, 2, now - timedelta(days=2))
+        self.assertGreater(fresh, old)
+
+    def test_late_activity_never_demotes(self):
+        """测试增量更新的分数与其他帖子的旧分数可比：后来的点赞只会提升排名"""
+        created = timezone.now() - timedelta(hours=3)
+        liked = hot_score(5, 0, created)
+        untouched = hot_score(0, 0, created - timedelta(hours=1))
+        self.assertGreater(hot_score(6, 0, created), liked)
+        self.assertGreater(liked, untouched)
+
+    def test_new_post_creates_ranking(self):
+        """测试发帖时创建热度记录"""
+        post = self.create_post('New Post')
+        ranking = PostRanking.objects.get(post=post)
+        self.assertEqual(ranking.sub_forum, self.subforum)
+        self.assertEqual(ranking.like_count, 0)
+
+    def test_model_created_post_has_ranking(self):
+        """测试不经过 API 创建的帖子同样创建热度记录"""
+        post = Post.objects.create(sub_forum=self.subforum, author=self.user, title='Shell Post', content='Content')
+        ranking = PostRanking.objects.get(post=post)
+        self.assertEqual(ranking.sub_forum, self.subforum)
+        self.assertAlmostEqual(ranking.score, hot_score(0, 0, post.created_at))
+
+    def test_votes_and_comments_update_ranking(self):
+        """测试点赞和评论会增量更新热度"""
+        post = self.create_post('Liked Post')
+        before = PostRanking.objects.get(post=post).score
+
+        self.client.force_authenticate(user=self.voter)
+        self.client.post('/api/votes/', {'target_type': 'post', 'target_id': post.id})
+        self.client.post('/api/comments/', {'post_id': post.id, 'content': 'Nice'}, format='json')
+
+        ranking = PostRanking.objects.get(post=post)
+        self.assertEqual(ranking.like_count, 1)
+        self.assertEqual(ranking.comment_count, 1)
+        self.assertGreater(ranking.score, before)
+
+    def test_hot_feed_order(self):
+        """测试热门列表按热度排序"""
+        quiet = self.create_post('Quiet Post')
+        busy = self.create_post('Busy Post')
+        self.client.force_authenticate(user=self.voter)
+        self.client.post('/api/votes/', {'target_type': 'post', 'target_id': busy.id})
+
+        response = self.client.get(f'/api/subforums/{self.subforum.id}/hot/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([p['id'] for p in response.data], [busy.id, quiet.id])
+
+        response = self.client.get(f'/api/subforums/{self.subforum.id}/hot/', {'limit': 1})
+        self.assertEqual(len(response.data), 1)
+
+    def test_refresh_command(self):
+        """测试定期任务补齐缺失记录并重新衰减热度"""
+        old_post = Post.objects.create(
+            sub_forum=self.subforum,
+            author=self.user,
+            title='Legacy Post',
+            content='Content',
+            created_at=timezone.now() - timedelta(days=3)
+        )
+        Comment.objects.create(post=old_post, author=self.voter, content='Old comment')
+        # 模拟引入热度表之前的帖子
+        PostRanking.objects.filter(post=old_post).delete()
+
+        out = StringIO()
+        call_command('refresh_hot_scores', '--backfill', stdout=out)
+        self.assertIn('Created 1 ranking rows', out.getvalue())
+
+        ranking = PostRanking.objects.get(post=old_post)
+        self.assertEqual(ranking.comment_count, 1)
+        self.assertAlmostEqual(ranking.score, hot_score(0, 1, old_post.created_at))
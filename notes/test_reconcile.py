@@ -0,0 +1,101 @@
+from datetime import timedelta
+from io import StringIO
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from django.utils import timezone
+from .models import User, SubForum, Post, Comment, PostVote, CommentVote, ModeratorAssignment, PostRanking
+
+class ReconcileCountersTests(TestCase):
+    def setUp(self):
+        """创建两个子论坛、帖子、评论和点赞，然后人为制造计数偏差"""
+        self.user = User.objects.create_user(username='author1', password='testpass123')
+        self.voter = User.objects.create_user(username='voter1', password='testpass123')
+        self.subforum = SubForum.objects.create(name='Test Forum', created_by=self.user)
+        self.other_subforum = SubForum.objects.create(name='Other Forum', created_by=self.user)
+        ModeratorAssignment.objects.create(user=self.user, sub_forum=self.subforum, assigned_by=self.user)
+
+        self.post = Post.objects.create(sub_forum=self.subforum, author=self.user, title='Post', content='Content')
+        self.old_post = Post.objects.create(
+            sub_forum=self.subforum,
+            author=self.user,
+            title='Old Post',
+            content='Content',
+            created_at=timezone.now() - timedelta(days=30)
+        )
+        self.other_post = Post.objects.create(sub_forum=self.other_subforum, author=self.user, title='Other', content='Content')
+        self.comment = Comment.objects.create(post=self.post, author=self.user, content='Comment')
+        PostVote.objects.create(user=self.voter, post=self.post, value='like')
+        CommentVote.objects.create(user=self.voter, comment=self.comment, value='like')
+
+        # 模拟手工 SQL 或崩溃导致的计数漂移
+        Post.objects.update(comment_count=7, like_count=7)
+        Comment.objects.update(like_count=7)
+        SubForum.objects.update(post_count=7, moderator_count=7)
+
+    def reconcile(self, *args):
+        out = StringIO()
+        call_command('reconcile_counters', *args, stdout=out)
+        return out.getvalue()
+
+    def test_reconcile_all(self):
+        """测试重新统计全部计数"""
+        output = self.reconcile('--chunk-size', '1')
+        self.assertIn('Posts: checked 3, fixed 3', output)
+
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comment_count, 1)
+        self.assertEqual(self.post.like_count, 1)
+        self.old_post.refresh_from_db()
+        self.assertEqual(self.old_post.comment_count, 0)
+        self.assertEqual(self.old_post.like_count, 0)
+
+        self.comment.refresh_from_db()
+        self.assertEqual(self.comment.like_count, 1)
+
+        self.subforum.refresh_from_db()
+        self.assertEqual(self.subforum.post_count, 2)
+        self.assertEqual(self.subforum.moderator_count, 1)
+        self.other_subforum.refresh_from_db()
+        self.assertEqual(self.other_subforum.post_count, 1)
+        self.assertEqual(self.other_subforum.moderator_count, 0)
+
+        ranking = PostRanking.objects.get(post=self.post)
+        self.assertEqual(ranking.like_count, 1)
+        self.assertEqual(ranking.comment_count, 1)
+
+    def test_second_run_fixes_nothing(self):
+        """测试计数正确时不再写入"""
+        self.reconcile()
+        output = self.reconcile()
+        self.assertIn('Posts: checked 3, fixed 0', output)
+        self.assertIn('Comments: checked 1, fixed 0', output)
+        self.assertIn('Subforums: checked 2, fixed 0', output)
+
+    def test_subforum_scope(self):
+        """测试 --subforum 只修正指定子论坛"""
+        self.reconcile('--subforum', str(self.subforum.id))
+
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comment_count, 1)
+        self.other_post.refresh_from_db()
+        self.assertEqual(self.other_post.comment_count, 7)
+        self.other_subforum.refresh_from_db()
+        self.assertEqual(self.other_subforum.post_count, 7)
+
+    def test_since_scope(self):
+        """测试 --since 只修正该时间之后创建的帖子和评论"""
+        since = (timezone.now() - timedelta(days=1)).date().isoformat()
+        self.reconcile('--since', since)
+
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comment_count, 1)
+        self.old_post.refresh_from_db()
+        self.assertEqual(self.old_post.comment_count, 7)
+        self.comment.refresh_from_db()
+        self.assertEqual(self.comment.like_count, 1)
+
+    def test_invalid_since(self):
+        """测试无效的 --since 参数"""
+        with self.assertRaises(CommandError):
+            self.reconcile('--since', 'yesterday')
@@ -0,0 +1,65 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework import status
+from .models import User, SubForum, Post
+
+class SparseFieldsetTests(TestCase):
+    def setUp(self):
+        """创建测试用户、子论坛和帖子"""
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='author1', password='testpass123')
+        self.subforum = SubForum.objects.create(
+            name='Test Forum',
+            description='Long description',
+            rules='Long rules',
+            created_by=self.user
+        )
+        self.post = Post.objects.create(
+            sub_forum=self.subforum,
+            author=self.user,
+            title='Test Post',
+            content='Very long content'
+        )
+
+    def test_post_list_fields(self):
+        """测试 fields 只返回指定字段，且不读取 content 列"""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/posts/', {'fields': 'id,title'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(set(response.data['results'][0].keys()), {'id', 'title'})
+        self.assertFalse(any('"content"' in q['sql'] for q in queries.captured_queries))
+
+    def test_post_detail_omit(self):
+        """测试 omit 去掉指定字段"""
+        response = self.client.get(f'/api/posts/{self.post.id}/', {'omit': 'content,sub_forum'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn('content', response.data)
+        self.assertNotIn('sub_forum', response.data)
+        self.assertEqual(response.data['title'], 'Test Post')
+
+    def test_subforum_posts_fields(self):
+        """测试子论坛帖子列表支持 fields"""
+        response = self.client.get(f'/api/subforums/{self.subforum.id}/posts/', {'fields': 'id,title,author'})
+        self.assertEqual(set(response.data['results'][0].keys()), {'id', 'title', 'author'})
+
+    def test_subforum_list_omit(self):
+        """测试子论坛列表去掉 description 和 rules，且不读取这些列"""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/subforums/', {'omit': 'description,rules'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn('description', response.data[0])
+        self.assertNotIn('rules', response.data[0])
+        self.assertFalse(any('"rules"' in q['sql'] for q in queries.captured_queries))
+
+    def test_write_ignores_fields(self):
+        """测试写请求不受 fields 参数影响"""
+        self.client.force_authenticate(user=self.user)
+        response = self.client.post('/api/posts/?fields=id', {
+            'subforum_id': self.subforum.id,
+            'title': 'New Post',
+            'content': 'New Content'
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Post.objects.get(title='New Post').content, 'New Content')
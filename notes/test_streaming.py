@@ -0,0 +1,89 @@
+import json
+from django.test import TestCase
+from rest_framework.test import APIClient
+from rest_framework import status
+from .models import User, SubForum, Post, Comment, ModeratorAssignment
+from .streaming import iter_json_array
+from .serializers import PostSerializer
+
+class StreamingResponseTests(TestCase):
+    def setUp(self):
+        """创建测试用户、子论坛、帖子和评论"""
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='admin1',
+            password='testpass123',
+            role='subforum_admin'
+        )
+        self.subforum = SubForum.objects.create(name='Test Forum', created_by=self.user)
+        ModeratorAssignment.objects.create(
+            user=self.user,
+            sub_forum=self.subforum,
+            assigned_by=self.user,
+            is_admin=True
+        )
+        self.super_admin = User.objects.create_user(
+            username='superadmin',
+            password='testpass123',
+            role='super_admin'
+        )
+        self.posts = [
+            Post.objects.create(
+                sub_forum=self.subforum,
+                author=self.user,
+                title=f'Post {i}',
+                content=f'Content {i}'
+            )
+            for i in range(3)
+        ]
+        for i in range(3):
+            Comment.objects.create(post=self.posts[0], author=self.user, content=f'Comment {i}')
+
+    def read_stream(self, response):
+        self.assertTrue(response.streaming)
+        return json.loads(b''.join(response.streaming_content))
+
+    def test_stream_subforum_posts(self):
+        """测试流式获取子论坛帖子"""
+        self.client.force_authenticate(user=self.super_admin)
+        response = self.client.get(f'/api/subforums/{self.subforum.id}/posts/', {'stream': '1'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        data = self.read_stream(response)
+        self.assertEqual([p['title'] for p in data], ['Post 2', 'Post 1', 'Post 0'])
+
+    def test_stream_post_comments(self):
+        """测试流式获取帖子评论"""
+        self.client.force_authenticate(user=self.super_admin)
+        response = self.client.get(f'/api/posts/{self.posts[0].id}/comments/', {'stream': 'true'})
+        data = self.read_stream(response)
+        self.assertEqual([c['content'] for c in data], ['Comment 0', 'Comment 1', 'Comment 2'])
+
+    def test_stream_my_subforums(self):
+        """测试流式获取管理的子论坛"""
+        self.client.force_authenticate(user=self.super_admin)
+        response = self.client.get('/api/moderator/my-subforums/', {'stream': '1'})
+        data = self.read_stream(response)
+        self.assertEqual(len(data), 1)
+        self.assertEqual(data[0]['name'], 'Test Forum')
+
+    def test_stream_requires_super_admin(self):
+        """测试匿名用户和非超级管理员忽略 stream 参数，仍然分页返回"""
+        url = f'/api/subforums/{self.subforum.id}/posts/'
+        response = self.client.get(url, {'stream': '1', 'page_size': 2})
+        self.assertFalse(response.streaming)
+        self.assertEqual(len(response.data['results']), 2)
+
+        self.client.force_authenticate(user=self.user)
+        response = self.client.get(f'/api/posts/{self.posts[0].id}/comments/', {'stream': '1'})
+        self.assertFalse(response.streaming)
+        self.assertIn('results', response.data)
+
+    def test_iter_json_array_chunks(self):
+        """测试按块输出，且空结果返回空数组"""
+        chunks = list(iter_json_array(Post.objects.order_by('id'), PostSerializer, chunk_size=2))
+        self.assertEqual(len(chunks), 2)
+        self.assertEqual(len(json.loads(''.join(chunks))), 3)
+
+        chunks = list(iter_json_array(Post.objects.none(), PostSerializer))
+        self.assertEqual(''.join(chunks), '[]')
@@ -0,0 +1,107 @@
+from django.test import TestCase
+from rest_framework.test import APIClient
+from rest_framework import status
+from .models import User, SubForum, Post, Comment
+
+class CommentThreadTests(TestCase):
+    def setUp(self):
+        """创建帖子和一棵评论树"""
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='author1', password='testpass123')
+        self.replier = User.objects.create_user(username='replier', password='testpass123')
+        self.subforum = SubForum.objects.create(name='Test Forum', created_by=self.user)
+        self.post = Post.objects.create(
+            sub_forum=self.subforum,
+            author=self.user,
+            title='Thread',
+            content='Content'
+        )
+        # a
+        # ├── a1
+        # │   └── a1x
+        # ├── a2
+        # └── a3
+        # b
+        # └── b1
+        self.a = self.add('a')
+        self.a1 = self.add('a1', self.a)
+        self.a1x = self.add('a1x', self.a1)
+        self.a2 = self.add('a2', self.a)
+        self.a3 = self.add('a3', self.a)
+        self.b = self.add('b')
+        self.b1 = self.add('b1', self.b)
+        self.url = f'/api/posts/{self.post.id}/thread/'
+
+    def add(self, content, parent=None):
+        return Comment.objects.create(post=self.post, author=self.user, parent=parent, content=content)
+
+    def contents(self, response):
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [c['content'] for c in response.data]
+
+    def test_paths(self):
+        """测试路径包含所有祖先，深度正确"""
+        self.assertTrue(self.a1x.path.startswith(self.a1.path))
+        self.assertTrue(self.a1.path.startswith(self.a.path))
+        self.assertEqual(self.a1x.depth, 2)
+        self.assertEqual(self.b.depth, 0)
+
+    def test_subtree(self):
+        """测试获取子树"""
+        response = self.client.get(self.url, {'root': self.a.id})
+        self.assertEqual(self.contents(response), ['a', 'a1', 'a1x', 'a2', 'a3'])
+
+    def test_invalid_root(self):
+        """测试 root 不是整数时返回 400，不存在时返回 404"""
+        response = self.client.get(self.url, {'root': 'abc'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('root', response.data)
+
+        response = self.client.get(self.url, {'root': 99999})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_depth_limited_subtree(self):
+        """测试限制深度的子树"""
+        response = self.client.get(self.url, {'root': self.a.id, 'max_depth': 1})
+        self.assertEqual(self.contents(response), ['a', 'a1', 'a2', 'a3'])
+
+    def test_top_roots_with_replies(self):
+        """测试前 N 条根评论及其前 K 条回复"""
+        response = self.client.get(self.url, {'roots': 2, 'replies': 2})
+        self.assertEqual(self.contents(response), ['a', 'a1', 'a1x', 'b', 'b1'])
+
+        response = self.client.get(self.url, {'roots': 1, 'replies': 2, 'max_depth': 1})
+        self.assertEqual(self.contents(response), ['a', 'a1', 'a2'])
+
+    def test_create_reply(self):
+        """测试通过 parent_id 回复评论"""
+        self.client.force_authenticate(user=self.replier)
+        response = self.client.post('/api/comments/', {
+            'post_id': self.post.id,
+            'parent_id': self.b1.id,
+            'content': 'b1x'
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['parent'], self.b1.id)
+        self.assertEqual(response.data['depth'], 2)
+        self.assertEqual(response.data['reply_to_user'], 'author1')
+
+        response = self.client.get(self.url, {'root': self.b.id})
+        self.assertEqual(self.contents(response), ['b', 'b1', 'b1x'])
+
+    def test_parent_from_other_post(self):
+        """测试父评论必须属于同一个帖子"""
+        other_post = Post.objects.create(
+            sub_forum=self.subforum,
+            author=self.user,
+            title='Other',
+            content='Other'
+        )
+        self.client.force_authenticate(user=self.replier)
+        response = self.client.post('/api/comments/', {
+            'post_id': other_post.id,
+            'parent_id': self.a.id,
+            'content': 'Wrong thread'
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('parent_id', response.data)
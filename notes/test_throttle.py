@@ -1,12 +1,14 @@
-from django.test import TestCase
 from django.urls import reverse
 from rest_framework.test import APIClient
 from rest_framework import status
 from .models import User, SubForum, Post
+from .testing import CacheIsolatedTestCase
 import time
 
-class ThrottleTest(TestCase):
+class ThrottleTest(CacheIsolatedTestCase):
     def setUp(self):
+        super().setUp()
+
         # 创建测试用户
         self.user = User.objects.create_user(
             username='testuser',
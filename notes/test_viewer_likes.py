@@ -0,0 +1,84 @@
+import json
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework import status
+from .models import User, SubForum, Post, Comment, PostVote, SubForumSubscription, CommentVote
+
+def vote_queries(queries):
+    return [q for q in queries.captured_queries if '_votes"' in q['sql']]
+
+class ViewerHasLikedTests(TestCase):
+    def setUp(self):
+        """创建帖子和评论，当前用户点赞其中一部分"""
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='viewer', password='testpass123')
+        self.author = User.objects.create_user(username='author1', password='testpass123')
+        self.subforum = SubForum.objects.create(name='Test Forum', created_by=self.author)
+        self.posts = [
+            Post.objects.create(sub_forum=self.subforum, author=self.author, title=f'Post {i}', content='Content')
+            for i in range(4)
+        ]
+        self.comments = [
+            Comment.objects.create(post=self.posts[0], author=self.author, content=f'Comment {i}')
+            for i in range(3)
+        ]
+        PostVote.objects.create(user=self.user, post=self.posts[1], value='like')
+        PostVote.objects.create(user=self.user, post=self.posts[3], value='like')
+        PostVote.objects.create(user=self.author, post=self.posts[2], value='like')
+        CommentVote.objects.create(user=self.user, comment=self.comments[0], value='like')
+
+    def liked_titles(self, results):
+        return {item['title'] for item in results if item['viewer_has_liked']}
+
+    def test_post_list_single_vote_query(self):
+        """测试帖子列表的点赞状态只用一次点赞表查询得到"""
+        self.client.force_authenticate(user=self.user)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/posts/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.liked_titles(response.data['results']), {'Post 1', 'Post 3'})
+        self.assertEqual(len(vote_queries(queries)), 1)
+
+    def test_subforum_posts_and_feed(self):
+        """测试子论坛帖子列表和首页信息流返回点赞状态"""
+        self.client.force_authenticate(user=self.user)
+        response = self.client.get(f'/api/subforums/{self.subforum.id}/posts/')
+        self.assertEqual(self.liked_titles(response.data['results']), {'Post 1', 'Post 3'})
+
+        SubForumSubscription.objects.create(user=self.user, sub_forum=self.subforum)
+        response = self.client.get('/api/feed/')
+        self.assertEqual(self.liked_titles(response.data['results']), {'Post 1', 'Post 3'})
+
+    def test_post_detail(self):
+        """测试帖子详情返回点赞状态"""
+        self.client.force_authenticate(user=self.user)
+        response = self.client.get(f'/api/posts/{self.posts[1].id}/')
+        self.assertTrue(response.data['viewer_has_liked'])
+        response = self.client.get(f'/api/posts/{self.posts[2].id}/')
+        self.assertFalse(response.data['viewer_has_liked'])
+
+    def test_comment_list(self):
+        """测试评论列表返回点赞状态，且只查询一次"""
+        self.client.force_authenticate(user=self.user)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(f'/api/posts/{self.posts[0].id}/comments/')
+        liked = [c['content'] for c in response.data['results'] if c['viewer_has_liked']]
+        self.assertEqual(liked, ['Comment 0'])
+        self.assertEqual(len(vote_queries(queries)), 1)
+
+    def test_stream(self):
+        """测试流式输出同样包含点赞状态"""
+        self.user.role = 'super_admin'
+        self.client.force_authenticate(user=self.user)
+        response = self.client.get(f'/api/subforums/{self.subforum.id}/posts/', {'stream': '1'})
+        data = json.loads(b''.join(response.streaming_content))
+        self.assertEqual(self.liked_titles(data), {'Post 1', 'Post 3'})
+
+    def test_anonymous_viewer(self):
+        """测试未登录用户的点赞状态均为 False，且不查询点赞表"""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/posts/')
+        self.assertEqual(self.liked_titles(response.data['results']), set())
+        self.assertEqual(vote_queries(queries), [])
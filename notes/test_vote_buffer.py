@@ -0,0 +1,161 @@
+import glob
+import os
+import subprocess
+import sys
+import tempfile
+from io import StringIO
+from unittest import mock
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from rest_framework import status
+from rest_framework.test import APIClient
+from . import voting
+from .models import User, SubForum, Post, Comment, PostVote, CommentVote, PostRanking
+from .voting import VoteBuffer, write_votes
+
+class VoteBufferTests(TestCase):
+    def setUp(self):
+        """创建用户、帖子、评论和临时 spool 目录"""
+        self.users = [User.objects.create_user(username=f'user{i}', password='testpass123') for i in range(3)]
+        self.subforum = SubForum.objects.create(name='Test Forum', created_by=self.users[0])
+        self.post = Post.objects.create(sub_forum=self.subforum, author=self.users[0], title='Post', content='Content')
+        self.comment = Comment.objects.create(post=self.post, author=self.users[0], content='Comment')
+
+        self.spool_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.spool_dir.cleanup)
+        self.spool_path = os.path.join(self.spool_dir.name, 'votes.spool')
+
+    def test_write_votes(self):
+        """测试批量写入跳过重复点赞和不存在的目标，并合并计数增量"""
+        PostVote.objects.create(user=self.users[0], post=self.post, value='like')
+        created, found = write_votes([
+            (self.users[0].id, 'post', self.post.id),
+            (self.users[1].id, 'post', self.post.id),
+            (self.users[2].id, 'post', self.post.id),
+            (self.users[1].id, 'comment', self.comment.id),
+            (self.users[1].id, 'post', 99999),
+        ])
+        self.assertEqual(created, {
+            (self.users[1].id, 'post', self.post.id),
+            (self.users[2].id, 'post', self.post.id),
+            (self.users[1].id, 'comment', self.comment.id),
+        })
+        self.assertNotIn(('post', 99999), found)
+
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.like_count, 2)
+        self.comment.refresh_from_db()
+        self.assertEqual(self.comment.like_count, 1)
+        self.assertEqual(PostRanking.objects.get(post=self.post).like_count, 2)
+
+    def test_buffer_dedups_and_flushes(self):
+        """测试缓冲区去重，并在 flush 时批量写入"""
+        buffer = VoteBuffer()
+        self.assertTrue(buffer.add(self.users[0].id, 'post', self.post.id))
+        self.assertFalse(buffer.add(self.users[0].id, 'post', self.post.id))
+        buffer.add(self.users[1].id, 'post', self.post.id)
+        self.assertEqual(PostVote.objects.count(), 0)
+
+        self.assertEqual(buffer.flush(), 2)
+        self.assertEqual(buffer.flush(), 0)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.like_count, 2)
+
+    def test_spool_removed_after_flush(self):
+        """测试写入成功后删除 spool 文件"""
+        buffer = VoteBuffer(spool_path=self.spool_path)
+        buffer.add(self.users[0].id, 'post', self.post.id)
+        self.assertTrue(os.path.exists(self.spool_path))
+
+        buffer.flush()
+        self.assertEqual(glob.glob(f'{self.spool_path}*'), [])
+
+    def test_spool_kept_when_rotate_fails(self):
+        """测试 spool 文件改名失败时点赞留在缓冲区中"""
+        buffer = VoteBuffer(spool_path=self.spool_path)
+        buffer.add(self.users[0].id, 'post', self.post.id)
+        with mock.patch('notes.voting.os.replace', side_effect=OSError):
+            with self.assertRaises(OSError):
+                buffer.flush()
+        self.assertEqual(list(buffer.pending), [(self.users[0].id, 'post', self.post.id)])
+
+        self.assertEqual(buffer.flush(), 1)
+        self.assertEqual(glob.glob(f'{self.spool_path}*'), [])
+
+    def dead_pid(self):
+        process = subprocess.Popen([sys.executable, '-c', ''])
+        process.wait()
+        return process.pid
+
+    def test_replay_spool_after_crash(self):
+        """测试进程崩溃后重放 spool 文件中未写入的点赞"""
+        pid = self.dead_pid()
+        buffer = VoteBuffer(spool_path=f'{self.spool_path}.{pid}')
+        buffer.add(self.users[0].id, 'post', self.post.id)
+        buffer.add(self.users[1].id, 'comment', self.comment.id)
+        buffer.spool.close()
+        # 崩溃时写了一半的最后一行
+        with open(f'{self.spool_path}.{pid}', 'a', encoding='utf-8') as spool:
+            spool.write('[1, "po')
+
+        out = StringIO()
+        call_command('replay_vote_spool', '--spool-path', self.spool_path, stdout=out)
+        self.assertIn('created 2 votes', out.getvalue())
+        self.assertEqual(PostVote.objects.count(), 1)
+        self.assertEqual(CommentVote.objects.count(), 1)
+        self.assertEqual(glob.glob(f'{self.spool_path}*'), [])
+
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.like_count, 1)
+
+    def test_replay_skips_running_workers(self):
+        """测试重放跳过仍在运行的进程的 spool 文件，只处理已退出进程遗留的 .flushing 文件"""
+        live = VoteBuffer(spool_path=f'{self.spool_path}.{os.getpid()}')
+        live.add(self.users[0].id, 'post', self.post.id)
+        self.addCleanup(live.spool.close)
+        dead = VoteBuffer(spool_path=f'{self.spool_path}.{self.dead_pid()}')
+        dead.add(self.users[1].id, 'post', self.post.id)
+        flushing = dead.rotate_spool()
+
+        self.assertEqual(voting.replay_spool(self.spool_path), 1)
+        self.assertTrue(PostVote.objects.filter(user=self.users[1]).exists())
+        self.assertFalse(PostVote.objects.filter(user=self.users[0]).exists())
+        self.assertFalse(os.path.exists(flushing))
+        self.assertTrue(os.path.exists(live.spool_path))
+
+@override_settings(VOTE_BUFFER_ENABLED=True, VOTE_BUFFER_FLUSH_INTERVAL=None, VOTE_BUFFER_SPOOL_PATH=None)
+class BufferedVoteAPITests(TestCase):
+    def setUp(self):
+        voting._vote_buffer = None
+        self.addCleanup(setattr, voting, '_vote_buffer', None)
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.subforum = SubForum.objects.create(name='Test Forum', created_by=self.user)
+        self.post = Post.objects.create(sub_forum=self.subforum, author=self.user, title='Post', content='Content')
+        self.client.force_authenticate(user=self.user)
+
+    def test_buffered_vote(self):
+        """测试开启写缓冲时点赞先排队，flush 后写入数据库"""
+        data = {'target_type': 'post', 'target_id': self.post.id}
+        response = self.client.post('/api/votes/', data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.data['status'], 'queued')
+        self.assertEqual(PostVote.objects.count(), 0)
+
+        # 还在缓冲区中的重复点赞不会再次排队
+        response = self.client.post('/api/votes/', data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+
+        voting.get_vote_buffer().flush()
+        self.assertEqual(PostVote.objects.count(), 1)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.like_count, 1)
+
+        response = self.client.post('/api/votes/', data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['like_count'], 1)
+
+    def test_buffered_vote_missing_target(self):
+        """测试开启写缓冲时仍然校验目标是否存在"""
+        response = self.client.post('/api/votes/', {'target_type': 'post', 'target_id': 99999}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
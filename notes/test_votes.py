@@ -1,8 +1,10 @@
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APITestCase
-from .models import User, Post, Comment, Vote, SubForum
+from .models import User, Post, Comment, PostVote, CommentVote, SubForum, PostRanking
 
 class VoteTests(APITestCase):
     def setUp(self):
@@ -52,8 +54,8 @@ class VoteTests(APITestCase):
         }
         response = self.client.post(self.vote_url, data)
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
-        self.assertEqual(Vote.objects.count(), 1)
-        self.assertEqual(Vote.objects.first().value, 'like')
+        self.assertEqual(PostVote.objects.count(), 1)
+        self.assertEqual(PostVote.objects.first().value, 'like')
 
     def test_create_comment_vote_authenticated(self):
         """
@@ -66,8 +68,8 @@ class VoteTests(APITestCase):
         }
         response = self.client.post(self.vote_url, data)
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
-        self.assertEqual(Vote.objects.count(), 1)
-        self.assertEqual(Vote.objects.first().value, 'like')
+        self.assertEqual(CommentVote.objects.count(), 1)
+        self.assertEqual(CommentVote.objects.first().value, 'like')
 
     def test_vote_unauthenticated(self):
         """
@@ -79,7 +81,7 @@ class VoteTests(APITestCase):
         }
         response = self.client.post(self.vote_url, data)
         self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
-        self.assertEqual(Vote.objects.count(), 0)
+        self.assertEqual(PostVote.objects.count(), 0)
 
     def test_vote_idempotency(self):
         """
@@ -100,7 +102,7 @@ class VoteTests(APITestCase):
         self.assertEqual(response2.status_code, status.HTTP_200_OK)
         
         # Check that only one vote exists
-        self.assertEqual(Vote.objects.count(), 1)
+        self.assertEqual(PostVote.objects.count(), 1)
 
     def test_invalid_target_type(self):
         """
@@ -113,7 +115,7 @@ class VoteTests(APITestCase):
         }
         response = self.client.post(self.vote_url, data)
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
-        self.assertEqual(Vote.objects.count(), 0)
+        self.assertEqual(PostVote.objects.count(), 0)
 
     def test_nonexistent_target_id(self):
         """
@@ -126,4 +128,144 @@ class VoteTests(APITestCase):
         }
         response = self.client.post(self.vote_url, data)
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
-        self.assertEqual(Vote.objects.count(), 0) 
\ No newline at end of file
+        self.assertEqual(PostVote.objects.count(), 0)
+
+    def test_like_count_returned_and_stored(self):
+        """
+        Test that voting increments like_count once and returns the new tally
+        """
+        self.client.force_authenticate(user=self.user)
+        response = self.client.post(self.vote_url, {'target_type': 'post', 'target_id': self.post.id})
+        self.assertEqual(response.data['like_count'], 1)
+
+        response = self.client.post(self.vote_url, {'target_type': 'post', 'target_id': self.post.id})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['like_count'], 1)
+
+        self.client.force_authenticate(user=self.other_user)
+        response = self.client.post(self.vote_url, {'target_type': 'post', 'target_id': self.post.id})
+        self.assertEqual(response.data['like_count'], 2)
+
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.like_count, 2)
+        response = self.client.get(f'/api/posts/{self.post.id}/')
+        self.assertEqual(response.data['like_count'], 2)
+
+    def test_comment_like_count(self):
+        """
+        Test that comment likes are tallied and exposed by the comment serializer
+        """
+        self.client.force_authenticate(user=self.other_user)
+        response = self.client.post(self.vote_url, {'target_type': 'comment', 'target_id': self.comment.id})
+        self.assertEqual(response.data['like_count'], 1)
+
+        response = self.client.get(f'/api/comments/{self.comment.id}/')
+        self.assertEqual(response.data['like_count'], 1)
+
+    def test_vote_response_shape(self):
+        """
+        Test that the response still exposes target_type and target_id
+        """
+        self.client.force_authenticate(user=self.user)
+        response = self.client.post(self.vote_url, {'target_type': 'comment', 'target_id': self.comment.id})
+        self.assertEqual(response.data['target_type'], 'comment')
+        self.assertEqual(response.data['target_id'], self.comment.id)
+        self.assertEqual(response.data['user'], self.user.id)
+
+    def test_votes_deleted_with_target(self):
+        """
+        Test that deleting a post removes its votes and its comments' votes
+        """
+        PostVote.objects.create(user=self.user, post=self.post, value='like')
+        CommentVote.objects.create(user=self.user, comment=self.comment, value='like')
+        self.post.delete()
+        self.assertEqual(PostVote.objects.count(), 0)
+        self.assertEqual(CommentVote.objects.count(), 0)
+
+class VoteBatchTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.subforum = SubForum.objects.create(name='Test Forum', created_by=self.user)
+        self.posts = [
+            Post.objects.create(sub_forum=self.subforum, author=self.user, title=f'Post {i}', content='Content')
+            for i in range(3)
+        ]
+        self.comment = Comment.objects.create(post=self.posts[0], author=self.user, content='Test Comment')
+        self.batch_url = reverse('vote-batch')
+        self.client.force_authenticate(user=self.user)
+
+    def test_batch_vote(self):
+        """
+        Test that a batch creates missing votes and reports a status per item
+        """
+        PostVote.objects.create(user=self.user, post=self.posts[0], value='like')
+        votes = [
+            {'target_type': 'post', 'target_id': self.posts[0].id},
+            {'target_type': 'post', 'target_id': self.posts[1].id},
+            {'target_type': 'comment', 'target_id': self.comment.id},
+            {'target_type': 'post', 'target_id': 99999},
+            {'target_type': 'post', 'target_id': self.posts[1].id},
+        ]
+        response = self.client.post(self.batch_url, {'votes': votes}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [item['status'] for item in response.data['results']],
+            ['exists', 'created', 'created', 'not_found', 'exists']
+        )
+        self.assertEqual(PostVote.objects.count(), 2)
+        self.assertEqual(CommentVote.objects.count(), 1)
+
+        self.posts[1].refresh_from_db()
+        self.assertEqual(self.posts[1].like_count, 1)
+        self.comment.refresh_from_db()
+        self.assertEqual(self.comment.like_count, 1)
+
+    def test_batch_vote_is_idempotent(self):
+        """
+        Test that replaying the same batch does not create duplicate votes
+        """
+        votes = [{'target_type': 'post', 'target_id': post.id} for post in self.posts]
+        self.client.post(self.batch_url, {'votes': votes}, format='json')
+        response = self.client.post(self.batch_url, {'votes': votes}, format='json')
+        self.assertEqual([item['status'] for item in response.data['results']], ['exists'] * 3)
+        self.assertEqual(PostVote.objects.count(), 3)
+        self.assertEqual(sorted(Post.objects.values_list('like_count', flat=True)), [1, 1, 1])
+
+    def test_batch_vote_updates_rankings_in_bulk(self):
+        """
+        Test that a batch updates every post ranking with a fixed number of queries
+        """
+        PostRanking.objects.filter(post=self.posts[2]).delete()
+        votes = [{'target_type': 'post', 'target_id': post.id} for post in self.posts]
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post(self.batch_url, {'votes': votes}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        ranking_queries = [q for q in ctx.captured_queries if 'post_rankings' in q['sql']]
+        # One insert for missing rows, one locking select, one bulk update
+        self.assertEqual(len(ranking_queries), 3)
+        self.assertEqual(
+            sorted(PostRanking.objects.values_list('like_count', flat=True)), [1, 1, 1]
+        )
+
+    def test_batch_vote_validation(self):
+        """
+        Test that empty, oversized and malformed batches are rejected
+        """
+        response = self.client.post(self.batch_url, {'votes': []}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        votes = [{'target_type': 'post', 'target_id': self.posts[0].id}] * 201
+        response = self.client.post(self.batch_url, {'votes': votes}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.post(self.batch_url, {'votes': [{'target_type': 'user', 'target_id': 1}]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(PostVote.objects.count(), 0)
+
+    def test_batch_vote_unauthenticated(self):
+        """
+        Test that an unauthenticated user cannot batch vote
+        """
+        self.client.force_authenticate(user=None)
+        response = self.client.post(self.batch_url, {'votes': [{'target_type': 'post', 'target_id': self.posts[0].id}]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
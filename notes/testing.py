@@ -0,0 +1,34 @@
+import os
+import tempfile
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+# 文件缓存在同一台机器的进程之间共享，测试依赖共享缓存的行为时使用
+SHARED_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(tempfile.gettempdir(), 'postly-test-cache'),
+    }
+}
+
+
+def use_shared_cache(testcase):
+    """
+    在测试的剩余部分使用共享缓存，测试结束后清空并恢复
+    """
+    override = override_settings(CACHES=SHARED_CACHES)
+    override.enable()
+    testcase.addCleanup(override.disable)
+    cache.clear()
+    testcase.addCleanup(cache.clear)
+
+
+class CacheIsolatedTestCase(TestCase):
+    """
+    每个测试前后清空缓存的 TestCase
+    限流记录、封禁状态、auth_version 和计数写入速率都保存在缓存中，测试之间不能互相影响
+    """
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
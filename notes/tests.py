@@ -1,7 +1,7 @@
 from django.test import TestCase
 from django.contrib.auth import get_user_model
 from django.utils import timezone
-from .models import SubForum, ModeratorAssignment, Post, Comment, Vote
+from .models import SubForum, ModeratorAssignment, Post, Comment, PostVote
 from django.urls import reverse
 from rest_framework.test import APIClient
 from rest_framework import status
@@ -192,10 +192,9 @@ class VoteModelTest(TestCase):
             title='Test Post',
             content='Test Content'
         )
-        self.vote = Vote.objects.create(
+        self.vote = PostVote.objects.create(
             user=self.user,
-            target_type='post',
-            target_id=self.post.id,
+            post=self.post,
             value='like'
         )
 
@@ -208,10 +207,9 @@ class VoteModelTest(TestCase):
 
     def test_unique_vote_per_target(self):
         with self.assertRaises(Exception):
-            Vote.objects.create(
+            PostVote.objects.create(
                 user=self.user,
-                target_type='post',
-                target_id=self.post.id,
+                post=self.post,
                 value='dislike'
             )
 
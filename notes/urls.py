@@ -5,10 +5,12 @@ from .views.auth import UserRegistrationView, UserLoginView, UserLogoutView, Use
 from .views.forum import SubForumViewSet, get_admin_team
 from .views.post import PostViewSet
 from .views.comment import CommentViewSet
-from .views.vote import VoteCreateAPIView
+from .views.vote import VoteCreateAPIView, VoteBatchAPIView
 from .views.ban import global_ban_user, subforum_ban_user, subforum_unban_user
 from .views.search import PostSearchView, SubForumSearchView
 from .views.user_search import UserSearchView
+from .views.feed import HomeFeedView
+from .views.leaderboard import LeaderboardView
 from .views.moderator import assign_moderator, assign_admin, remove_moderator, my_subforums
 
 router = DefaultRouter()
@@ -24,6 +26,9 @@ urlpatterns = [
     path('api/auth/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
     path('api/user/detail/', UserDetailView.as_view(), name='user-detail'),
     path('api/votes/', VoteCreateAPIView.as_view(), name='vote-create'),
+    path('api/votes/batch/', VoteBatchAPIView.as_view(), name='vote-batch'),
+    path('api/feed/', HomeFeedView.as_view(), name='home-feed'),
+    path('api/leaderboards/', LeaderboardView.as_view(), name='leaderboard'),
     path('api/admin/ban/', global_ban_user, name='global-ban-user'),
     path('api/moderator/ban/', subforum_ban_user, name='subforum-ban-user'),
     path('api/moderator/unban/', subforum_unban_user, name='subforum-unban-user'),
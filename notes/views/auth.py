@@ -1,13 +1,13 @@
 from rest_framework import status
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from rest_framework_simplejwt.tokens import RefreshToken, TokenError
 from rest_framework_simplejwt.exceptions import TokenError, InvalidToken, TokenBackendError
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from django.contrib.auth import authenticate
 from datetime import timedelta
 from ..serializers import UserRegistrationSerializer, UserLoginSerializer
 from ..models import User
+from ..authentication import ClaimsRefreshToken
 
 class UserRegistrationView(APIView):
     permission_classes = [AllowAny]
@@ -16,7 +16,7 @@ class UserRegistrationView(APIView):
         serializer = UserRegistrationSerializer(data=request.data)
         if serializer.is_valid():
             user = serializer.save()
-            refresh = RefreshToken.for_user(user)
+            refresh = ClaimsRefreshToken.for_user(user)
             return Response({
                 'access': str(refresh.access_token),
                 'refresh': str(refresh),
@@ -39,11 +39,12 @@ class UserLoginView(APIView):
                         'error': 'Your account has been banned.'
                     }, status=status.HTTP_403_FORBIDDEN)
                     
-                refresh = RefreshToken.for_user(user)
+                refresh = ClaimsRefreshToken.for_user(user)
                 return Response({
                     'access': str(refresh.access_token),
                     'refresh': str(refresh),
                     'username': user.username,
+                    'role': user.role,
                 })
             return Response({
                 'error': 'Invalid credentials'
@@ -57,10 +58,12 @@ class UserLogoutView(APIView):
         try:
             refresh_token = request.data.get('refresh_token')
             if refresh_token:
-                token = RefreshToken(refresh_token)
+                token = ClaimsRefreshToken(refresh_token)
                 token.blacklist()
                 return Response({'message': 'Successfully logged out'})
             return Response({'error': 'Refresh token is required'}, status=status.HTTP_400_BAD_REQUEST)
+        except TokenError:
+            return Response({'error': 'Token is invalid or has been blacklisted'}, status=status.HTTP_401_UNAUTHORIZED)
         except Exception as e:
             return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
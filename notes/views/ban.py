@@ -6,25 +6,22 @@ from django.utils import timezone
 from django.shortcuts import get_object_or_404
 from datetime import timedelta
 
-from ..models import User, SubForum, SubForumBan, ModeratorAssignment
+from ..models import User, SubForum, SubForumBan
+from ..permissions import get_permission_context
 from ..serializers import GlobalBanSerializer, SubForumBanSerializer, SubForumBanDetailSerializer
 
-def check_ban_permission(user, subforum):
+def check_ban_permission(request, subforum):
     """
-    Check if user has permission to ban in the given subforum
+    Check if the requesting user has permission to ban in the given subforum
     Returns (has_permission, is_super_admin, is_subforum_admin)
     """
-    if user.role == 'super_admin':
+    context = get_permission_context(request)
+    if context.is_super_admin:
         return True, True, False
     
-    moderator = ModeratorAssignment.objects.filter(
-        user=user,
-        sub_forum=subforum
-    ).first()
-    
-    if moderator and moderator.is_admin:
+    if context.is_admin(subforum):
         return True, False, True
-    elif moderator:
+    elif context.is_moderator(subforum):
         return True, False, False
     
     return False, False, False
@@ -65,6 +62,8 @@ def global_ban_user(request):
         target_user.banned_at = None
 
     target_user.save()
+    target_user.bump_auth_version()
+    SubForumBan.invalidate_cache(target_user.id)
 
     return Response({
         "detail": f"User has been {'banned' if action == 'ban' else 'unbanned'} successfully"
@@ -85,7 +84,7 @@ def subforum_ban_user(request):
     target_user = get_object_or_404(User, id=data['user_id'])
 
     # Check permissions
-    has_permission, is_super, is_admin = check_ban_permission(request.user, subforum)
+    has_permission, is_super, is_admin = check_ban_permission(request, subforum)
     if not has_permission:
         return Response(
             {"detail": "You don't have permission to ban users in this subforum"},
@@ -149,14 +148,13 @@ def subforum_unban_user(request):
 
     subforum = get_object_or_404(SubForum, id=subforum_id)
     ban_record = get_object_or_404(
-        SubForumBan,
+        SubForumBan.objects.active(),
         user_id=user_id,
-        subforum_id=subforum_id,
-        is_active=True
+        subforum_id=subforum_id
     )
 
     # Check permissions
-    has_permission, is_super, is_admin = check_ban_permission(request.user, subforum)
+    has_permission, is_super, is_admin = check_ban_permission(request, subforum)
     if not has_permission:
         return Response(
             {"detail": "You don't have permission to unban users in this subforum"},
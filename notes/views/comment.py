@@ -1,9 +1,13 @@
 from django.shortcuts import get_object_or_404
+from django.db import transaction
 from rest_framework import viewsets, serializers
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.exceptions import PermissionDenied
 from ..serializers import CommentSerializer
-from ..models import Comment, Post, User, SubForumBan, ModeratorAssignment
+from ..models import Comment, Post, User, COMMENT_MAX_DEPTH
+from ..permissions import get_permission_context
+from ..ranking import record_post_activity
+from ..counters import increment_counter
 
 class CommentViewSet(viewsets.ModelViewSet):
     """
@@ -33,8 +37,9 @@ class CommentViewSet(viewsets.ModelViewSet):
         if self.request.user.is_banned:
             raise PermissionDenied('You are banned from posting.')
 
-        # 从请求数据中获取帖子ID和回复用户ID
+        # 从请求数据中获取帖子ID、父评论ID和回复用户ID
         post_id = self.request.data.get('post_id')
+        parent_id = self.request.data.get('parent_id')
         reply_to_user_id = self.request.data.get('reply_to_user_id')
 
         if not post_id:
@@ -44,17 +49,24 @@ class CommentViewSet(viewsets.ModelViewSet):
         post = get_object_or_404(Post, id=post_id)
         
         # 检查用户是否被子论坛封禁
-        subforum_ban = SubForumBan.objects.filter(
-            user=self.request.user,
-            subforum=post.sub_forum,
-            is_active=True
-        ).first()
-        
-        if subforum_ban:
+        if get_permission_context(self.request).is_banned_in(post.sub_forum_id):
             raise PermissionDenied('You are banned from posting in this subforum.')
         
-        # 验证回复用户ID
-        reply_to_user = None
+        # 验证父评论，必须属于同一个帖子
+        parent = None
+        if parent_id:
+            parent = Comment.objects.filter(id=parent_id, post=post).select_related('author').first()
+            if parent is None:
+                raise serializers.ValidationError(
+                    {"parent_id": "Invalid parent comment ID."}
+                )
+            if parent.depth + 1 >= COMMENT_MAX_DEPTH:
+                raise serializers.ValidationError(
+                    {"parent_id": "Maximum reply depth reached."}
+                )
+
+        # 验证回复用户ID，回复评论时默认回复父评论的作者
+        reply_to_user = parent.author if parent else None
         if reply_to_user_id:
             try:
                 reply_to_user = User.objects.get(id=reply_to_user_id)
@@ -63,34 +75,39 @@ class CommentViewSet(viewsets.ModelViewSet):
                     {"reply_to_user_id": "Invalid user ID."}
                 )
         
-        # 创建评论
-        serializer.save(
-            author=self.request.user,
-            post=post,
-            reply_to_user=reply_to_user
-        )
+        # 创建评论，同一事务内原子地增加帖子的评论数
+        with transaction.atomic():
+            serializer.save(
+                author=self.request.user,
+                post=post,
+                parent=parent,
+                reply_to_user=reply_to_user
+            )
+            sharded = increment_counter(post, 'comment_count')
 
-    def perform_destroy(self, instance):
-        user = self.request.user
-
-        # 超级管理员可以删除任何评论
-        if user.role == 'super_admin':
-            instance.delete()
-            return
+        # 更新帖子热度，分片计数的热门帖子在合并分片时统一更新
+        if not sharded:
+            record_post_activity(post, comments=1)
 
-        # 检查用户是否是评论作者
-        if instance.author == user:
-            instance.delete()
-            return
+    def delete_comment(self, instance):
+        """
+        删除评论并同步帖子评论数和热度
+        回复会随父评论级联删除，按实际删除的数量扣减
+        """
+        post = instance.post
+        with transaction.atomic():
+            _, deleted = instance.delete()
+            removed = deleted.get(Comment._meta.label, 0)
+            sharded = increment_counter(post, 'comment_count', -removed)
+        if not sharded:
+            record_post_activity(post, comments=-removed)
 
-        # 检查用户是否是子论坛管理员或版主
-        moderator = ModeratorAssignment.objects.filter(
-            user=user,
-            sub_forum=instance.post.sub_forum
-        ).first()
+    def perform_destroy(self, instance):
+        user = self.request.user
 
-        if moderator:
-            instance.delete()
+        # 评论作者、超级管理员、子论坛管理员或版主可以删除评论
+        if instance.author_id == user.id or get_permission_context(self.request).can_moderate(instance.post.sub_forum_id):
+            self.delete_comment(instance)
             return
 
         raise PermissionDenied('You do not have permission to delete this comment.') 
\ No newline at end of file
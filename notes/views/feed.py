@@ -0,0 +1,24 @@
+from rest_framework import generics
+from rest_framework.permissions import IsAuthenticated
+from ..models import Post, SubForumSubscription
+from ..serializers import PostListSerializer, defer_sparse_fields
+from ..pagination import FeedCursorPagination
+
+class HomeFeedView(generics.ListAPIView):
+    """
+    首页信息流
+    合并当前用户订阅的所有子论坛的最新帖子，按 (created_at, id) 游标分页
+    """
+    serializer_class = PostListSerializer
+    permission_classes = [IsAuthenticated]
+    pagination_class = FeedCursorPagination
+
+    def get_subforum_ids(self):
+        return list(
+            SubForumSubscription.objects.filter(user=self.request.user)
+            .values_list('sub_forum_id', flat=True)
+        )
+
+    def get_queryset(self):
+        queryset = Post.objects.select_related('author', 'sub_forum')
+        return defer_sparse_fields(queryset, PostListSerializer, self.request)
@@ -2,11 +2,14 @@ from rest_framework import viewsets, status
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.decorators import action, api_view
 from rest_framework.response import Response
-from django.db.models import Count
-from ..serializers import SubForumSerializer, PostSerializer, UserSerializer
-from ..models import SubForum, ModeratorAssignment, Post, User
+from ..serializers import SubForumSerializer, PostListSerializer, UserSerializer, get_sparse_fieldset, get_deferred_fields, defer_sparse_fields
+from ..models import SubForum, ModeratorAssignment, Post, User, PostRanking, SubForumSubscription
 from ..permissions import IsNotBanned
+from ..authentication import ClaimsRefreshToken
+from ..pagination import SubForumPostPagination
+from ..streaming import wants_stream, stream_serialized
 from django.shortcuts import get_object_or_404
+from functools import partial
 import logging
 
 logger = logging.getLogger(__name__)
@@ -48,11 +51,18 @@ class SubForumViewSet(viewsets.ModelViewSet):
     serializer_class = SubForumSerializer
     http_method_names = ['get', 'post', 'put', 'delete', 'head', 'options']
 
+    def get_queryset(self):
+        # 未请求的 description / rules 不从数据库读取
+        queryset = SubForum.objects.select_related('created_by')
+        return defer_sparse_fields(queryset, SubForumSerializer, self.request)
+
     def get_permissions(self):
         if self.action == 'create':
             permission_classes = [IsAuthenticated, IsNotBanned]
         elif self.action in ['update', 'partial_update', 'destroy']:
             permission_classes = [IsAuthenticated, IsNotBanned]
+        elif self.action in ['subscribe', 'unsubscribe']:
+            permission_classes = [IsAuthenticated]
         else:
             permission_classes = [AllowAny]
         return [permission() for permission in permission_classes]
@@ -80,10 +90,18 @@ class SubForumViewSet(viewsets.ModelViewSet):
             logger.info(f"Updating user role from {user.role} to subforum_admin")
             user.role = 'subforum_admin'
             user.save()
+            user.bump_auth_version()
             
             # 验证角色是否已更新
             updated_user = User.objects.get(id=user.id)
             logger.info(f"User role after update: {updated_user.role}")
+
+            # 角色变更使调用者当前的令牌失效，随响应返回带有新声明的令牌
+            refresh = ClaimsRefreshToken.for_user(updated_user)
+            self.refreshed_tokens = {
+                'access': str(refresh.access_token),
+                'refresh': str(refresh),
+            }
             
             # 强制刷新 request.user 对象
             if hasattr(self.request, '_cached_user'):
@@ -111,6 +129,7 @@ class SubForumViewSet(viewsets.ModelViewSet):
 
     def create(self, request, *args, **kwargs):
         logger.info("Starting subforum creation process")
+        self.refreshed_tokens = None
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         self.perform_create(serializer)
@@ -120,16 +139,85 @@ class SubForumViewSet(viewsets.ModelViewSet):
         user = User.objects.get(id=request.user.id)
         logger.info(f"User role before sending response: {user.role}")
         
-        return Response(serializer.data, status=status.HTTP_201_CREATED, headers=headers)
+        data = serializer.data
+        if self.refreshed_tokens:
+            data = {**data, 'tokens': self.refreshed_tokens}
+        return Response(data, status=status.HTTP_201_CREATED, headers=headers)
 
-    @action(detail=True, methods=['get'])
+    @action(detail=True, methods=['get'], pagination_class=SubForumPostPagination)
     def posts(self, request, pk=None):
         """
-        获取特定子论坛下的所有帖子
+        获取特定子论坛下的帖子，按 (created_at, id) 游标分页
+        - stream=1: 不分页，流式返回全部帖子
+        """
+        subforum = self.get_object()
+        sparse = get_sparse_fieldset(request)
+        posts = Post.objects.filter(sub_forum=subforum).select_related('author', 'sub_forum')
+        posts = defer_sparse_fields(posts, PostListSerializer, request)
+        if wants_stream(request):
+            return stream_serialized(
+                posts.order_by('-created_at', '-id'),
+                partial(PostListSerializer, **sparse),
+                context=self.get_serializer_context()
+            )
+
+        page = self.paginate_queryset(posts)
+        serializer = PostListSerializer(page, many=True, context=self.get_serializer_context(), **sparse)
+        return self.get_paginated_response(serializer.data)
+
+    @action(detail=True, methods=['get'])
+    def hot(self, request, pk=None):
+        """
+        获取特定子论坛的热门帖子
+        直接读取预先计算好的热度排名，按 (sub_forum, score) 索引范围读取
+        - limit: 返回数量（默认 25，最大 100）
+        """
+        subforum = self.get_object()
+        try:
+            limit = min(max(int(request.query_params.get('limit', 25)), 1), 100)
+        except ValueError:
+            limit = 25
+
+        rankings = PostRanking.objects.filter(sub_forum=subforum).select_related(
+            'post', 'post__author', 'post__sub_forum'
+        ).order_by('-score', '-post_id')
+        deferred = get_deferred_fields(PostListSerializer, request)
+        if deferred:
+            rankings = rankings.defer(*[f'post__{name}' for name in deferred])
+        posts = [ranking.post for ranking in rankings[:limit]]
+        serializer = PostListSerializer(
+            posts, many=True, context=self.get_serializer_context(), **get_sparse_fieldset(request)
+        )
+        return Response(serializer.data)
+
+    @action(detail=True, methods=['post'])
+    def subscribe(self, request, pk=None):
+        """
+        订阅子论坛，订阅后的帖子会出现在首页信息流中
+        """
+        subforum = self.get_object()
+        _, created = SubForumSubscription.objects.get_or_create(
+            user=request.user,
+            sub_forum=subforum
+        )
+        return Response(
+            {"detail": "Subscribed successfully"},
+            status=status.HTTP_201_CREATED if created else status.HTTP_200_OK
+        )
+
+    @action(detail=True, methods=['post'])
+    def unsubscribe(self, request, pk=None):
+        """
+        取消订阅子论坛
         """
         subforum = self.get_object()
-        posts = Post.objects.filter(sub_forum=subforum).annotate(
-            comment_count=Count('comments')
-        ).order_by('-created_at')
-        serializer = PostSerializer(posts, many=True)
-        return Response(serializer.data) 
\ No newline at end of file
+        deleted, _ = SubForumSubscription.objects.filter(
+            user=request.user,
+            sub_forum=subforum
+        ).delete()
+        if not deleted:
+            return Response(
+                {"detail": "You are not subscribed to this subforum"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return Response({"detail": "Unsubscribed successfully"})
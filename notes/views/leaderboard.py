@@ -0,0 +1,67 @@
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework import status
+from ..models import Post, Comment
+from ..serializers import PostListSerializer, CommentSerializer
+from ..leaderboards import LEADERBOARD_WINDOWS, top_liked
+
+class LeaderboardView(APIView):
+    """
+    点赞排行榜：时间窗口内获得点赞最多的帖子或评论
+    - type: post（默认）或 comment
+    - window: 24h（默认）、7d、30d
+    - subforum: 只统计某个子论坛
+    - limit: 返回数量（默认 10，最大 100）
+    """
+    max_limit = 100
+
+    def get(self, request):
+        target_type = request.query_params.get('type', 'post')
+        window = request.query_params.get('window', '24h')
+        if target_type not in ('post', 'comment'):
+            return Response(
+                {"error": "type must be 'post' or 'comment'"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if window not in LEADERBOARD_WINDOWS:
+            return Response(
+                {"error": f"window must be one of {', '.join(LEADERBOARD_WINDOWS)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            subforum_id = request.query_params.get('subforum')
+            subforum_id = int(subforum_id) if subforum_id else None
+            limit = min(max(int(request.query_params.get('limit', 10)), 1), self.max_limit)
+        except ValueError:
+            return Response(
+                {"error": "subforum and limit must be integers"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        top = top_liked(target_type, window, subforum_id=subforum_id, limit=limit)
+        ids = [target_id for target_id, _ in top]
+        if target_type == 'post':
+            objects = Post.objects.select_related('author', 'sub_forum').defer('content').in_bulk(ids)
+            serializer_class = PostListSerializer
+        else:
+            objects = Comment.objects.select_related(
+                'author', 'reply_to_user', 'post', 'post__sub_forum'
+            ).in_bulk(ids)
+            serializer_class = CommentSerializer
+
+        # 已被删除的帖子或评论不出现在排行榜中
+        ranked = [(objects[target_id], likes) for target_id, likes in top if target_id in objects]
+        serializer = serializer_class(
+            [obj for obj, _ in ranked], many=True, context={'request': request}
+        )
+        results = []
+        for data, (_, likes) in zip(serializer.data, ranked):
+            data = dict(data)
+            data['window_likes'] = likes
+            results.append(data)
+        return Response({
+            'type': target_type,
+            'window': window,
+            'results': results,
+        })
@@ -3,25 +3,22 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from django.shortcuts import get_object_or_404
-from django.db.models import Count
+from functools import partial
 from ..models import User, SubForum, ModeratorAssignment
-from ..serializers import SubForumSerializer
+from ..permissions import get_permission_context
+from ..serializers import SubForumSerializer, get_sparse_fieldset, defer_sparse_fields
+from ..streaming import wants_stream, stream_serialized
 
-def check_admin_permission(user, subforum):
+def check_admin_permission(request, subforum):
     """
-    检查用户是否有权限管理该子论坛
+    检查当前用户是否有权限管理该子论坛
     返回 (has_permission, is_super_admin)
     """
-    if user.role == 'super_admin':
+    context = get_permission_context(request)
+    if context.is_super_admin:
         return True, True
     
-    moderator = ModeratorAssignment.objects.filter(
-        user=user,
-        sub_forum=subforum,
-        is_admin=True
-    ).first()
-    
-    return bool(moderator), False
+    return context.is_admin(subforum), False
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
@@ -30,19 +27,24 @@ def my_subforums(request):
     获取当前用户管理的子论坛列表
     - 超级管理员可以看到所有子论坛
     - 子论坛管理员只能看到自己管理的子论坛
+    - stream=1: 流式返回结果
     """
     if request.user.role == 'super_admin':
         subforums = SubForum.objects.all()
     else:
+        # (user, sub_forum) 唯一，JOIN 不会产生重复行，不需要 distinct
         subforums = SubForum.objects.filter(
             moderator_assignments__user=request.user,
             moderator_assignments__is_admin=True
-        ).distinct().annotate(
-            moderator_count=Count('moderator_assignments'),
-            post_count=Count('posts')
         )
     
-    serializer = SubForumSerializer(subforums, many=True)
+    subforums = subforums.select_related('created_by')
+    sparse = get_sparse_fieldset(request)
+    subforums = defer_sparse_fields(subforums, SubForumSerializer, request)
+    if wants_stream(request):
+        return stream_serialized(subforums.order_by('id'), partial(SubForumSerializer, **sparse))
+
+    serializer = SubForumSerializer(subforums, many=True, **sparse)
     return Response(serializer.data)
 
 @api_view(['POST'])
@@ -54,7 +56,7 @@ def assign_moderator(request, subforum_id):
     - 子论坛管理员只能任命自己管理的子论坛的版主
     """
     subforum = get_object_or_404(SubForum, id=subforum_id)
-    has_permission, is_super_admin = check_admin_permission(request.user, subforum)
+    has_permission, is_super_admin = check_admin_permission(request, subforum)
     
     if not has_permission:
         return Response(
@@ -101,6 +103,7 @@ def assign_moderator(request, subforum_id):
     if target_user.role == 'user':
         target_user.role = 'moderator'
         target_user.save()
+        target_user.bump_auth_version()
     
     return Response({"detail": "Moderator assigned successfully"})
 
@@ -158,6 +161,7 @@ def assign_admin(request, subforum_id):
     if target_user.role in ['user', 'moderator']:
         target_user.role = 'subforum_admin'
         target_user.save()
+        target_user.bump_auth_version()
     
     return Response({"detail": "Subforum admin assigned successfully"})
 
@@ -170,7 +174,7 @@ def remove_moderator(request, subforum_id):
     - 子论坛管理员只能移除自己管理的子论坛的版主
     """
     subforum = get_object_or_404(SubForum, id=subforum_id)
-    has_permission, is_super_admin = check_admin_permission(request.user, subforum)
+    has_permission, is_super_admin = check_admin_permission(request, subforum)
     
     if not has_permission:
         return Response(
@@ -221,9 +225,11 @@ def remove_moderator(request, subforum_id):
         # 如果没有其他职位，将角色恢复为普通用户
         target_user.role = 'user'
         target_user.save()
+        target_user.bump_auth_version()
     elif not other_assignments.filter(is_admin=True).exists() and target_user.role == 'subforum_admin':
         # 如果没有其他管理员职位但还有版主职位，将角色降为版主
         target_user.role = 'moderator'
         target_user.save()
+        target_user.bump_auth_version()
     
     return Response({"detail": "Moderator removed successfully"}) 
\ No newline at end of file
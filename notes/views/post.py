@@ -1,11 +1,17 @@
 from django.shortcuts import get_object_or_404
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber, Substr
 from rest_framework import viewsets, serializers
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from rest_framework.exceptions import PermissionDenied
-from ..serializers import PostSerializer, CommentSerializer
-from ..models import Post, SubForum, Comment, SubForumBan, ModeratorAssignment
+from rest_framework.exceptions import PermissionDenied, ValidationError
+from ..serializers import PostSerializer, PostListSerializer, CommentSerializer, defer_sparse_fields
+from ..models import Post, SubForum, Comment, COMMENT_PATH_STEP, COMMENT_PATH_END, COMMENT_MAX_DEPTH
+from ..permissions import get_permission_context
+from ..pagination import PostCursorPagination, CommentCursorPagination
+from ..streaming import wants_stream, stream_serialized
+from ..excerpts import make_excerpt
 
 class PostViewSet(viewsets.ModelViewSet):
     """
@@ -15,13 +21,22 @@ class PostViewSet(viewsets.ModelViewSet):
     serializer_class = PostSerializer
     http_method_names = ['get', 'post', 'put', 'patch', 'delete']  # 允许编辑和删除方法
     throttle_scope = 'posts'  # 添加发帖限流规则
+    pagination_class = PostCursorPagination  # 按 (created_at, id) 游标分页
+    thread_limit = 500  # 子树查询最多返回的评论数
 
     def get_queryset(self):
         queryset = Post.objects.all()
         author = self.request.query_params.get('author', None)
         if author is not None:
             queryset = queryset.filter(author__username=author)
-        return queryset.select_related('author', 'sub_forum').order_by('-created_at')
+        queryset = defer_sparse_fields(queryset, self.get_serializer_class(), self.request)
+        return queryset.select_related('author', 'sub_forum').order_by('-created_at', '-id')
+
+    def get_serializer_class(self):
+        # 列表只返回摘要，详情返回完整内容
+        if self.action == 'list':
+            return PostListSerializer
+        return PostSerializer
 
     def get_permissions(self):
         if self.action in ['create', 'update', 'partial_update', 'destroy']:
@@ -49,19 +64,17 @@ class PostViewSet(viewsets.ModelViewSet):
         subforum = get_object_or_404(SubForum, id=subforum_id)
         
         # 检查用户是否被子论坛封禁
-        subforum_ban = SubForumBan.objects.filter(
-            user=self.request.user,
-            subforum=subforum,
-            is_active=True
-        ).first()
-        
-        if subforum_ban:
+        if get_permission_context(self.request).is_banned_in(subforum):
             raise PermissionDenied('You are banned from posting in this subforum.')
         
         # 创建帖子，设置作者和子论坛
         serializer.save(
             author=self.request.user,
-            sub_forum=subforum
+            sub_forum=subforum,
+            excerpt=make_excerpt(
+                serializer.validated_data['content'],
+                serializer.validated_data.get('format', 'markdown')
+            )
         )
 
     def perform_update(self, serializer):
@@ -75,48 +88,101 @@ class PostViewSet(viewsets.ModelViewSet):
             raise PermissionDenied('You are banned from posting.')
             
         # 检查用户是否被子论坛封禁
-        subforum_ban = SubForumBan.objects.filter(
-            user=self.request.user,
-            subforum=post.sub_forum,
-            is_active=True
-        ).first()
-        
-        if subforum_ban:
+        if get_permission_context(self.request).is_banned_in(post.sub_forum_id):
             raise PermissionDenied('You are banned from posting in this subforum.')
         
-        serializer.save()
+        # 内容或格式变化时重新生成摘要
+        serializer.save(
+            excerpt=make_excerpt(
+                serializer.validated_data.get('content', post.content),
+                serializer.validated_data.get('format', post.format)
+            )
+        )
 
     def perform_destroy(self, instance):
         user = self.request.user
 
-        # 超级管理员可以删除任何帖子
-        if user.role == 'super_admin':
+        # 帖子作者、超级管理员、子论坛管理员或版主可以删除帖子
+        if instance.author_id == user.id or get_permission_context(self.request).can_moderate(instance.sub_forum_id):
             instance.delete()
             return
 
-        # 检查用户是否是帖子作者
-        if instance.author == user:
-            instance.delete()
-            return
-
-        # 检查用户是否是子论坛管理员或版主
-        moderator = ModeratorAssignment.objects.filter(
-            user=user,
-            sub_forum=instance.sub_forum
-        ).first()
+        raise PermissionDenied('You do not have permission to delete this post.')
 
-        if moderator:
-            instance.delete()
-            return
+    @action(detail=True, methods=['get'], pagination_class=CommentCursorPagination)
+    def comments(self, request, pk=None):
+        """
+        获取特定帖子下的评论，按 (created_at, id) 游标分页
+        - cursor: 前后翻页
+        - after: 只获取某条评论之后的新评论
+        - stream=1: 不分页，流式返回全部评论
+        """
+        post = self.get_object()
+        comments = Comment.objects.filter(post=post).select_related(
+            'author', 'reply_to_user', 'post', 'post__sub_forum'
+        )
+        if wants_stream(request):
+            return stream_serialized(
+                comments.order_by('created_at', 'id'), CommentSerializer, context=self.get_serializer_context()
+            )
 
-        raise PermissionDenied('You do not have permission to delete this post.')
+        page = self.paginate_queryset(comments)
+        serializer = CommentSerializer(page, many=True, context=self.get_serializer_context())
+        return self.get_paginated_response(serializer.data)
 
     @action(detail=True, methods=['get'])
-    def comments(self, request, pk=None):
+    def thread(self, request, pk=None):
         """
-        获取特定帖子下的所有评论
+        按物化路径获取评论树，结果按线程顺序（深度优先）排列
+        - root: 获取某条评论的整个子树
+        - max_depth: 限制相对深度
+        - roots / replies: 不指定 root 时，返回前 N 条根评论及每条的前 K 条回复
         """
         post = self.get_object()
-        comments = Comment.objects.filter(post=post).order_by('created_at')
-        serializer = CommentSerializer(comments, many=True)
-        return Response(serializer.data) 
\ No newline at end of file
+        comments = Comment.objects.filter(post=post).select_related(
+            'author', 'reply_to_user', 'post', 'post__sub_forum'
+        )
+        max_depth = self._get_int_param('max_depth', None, 0, COMMENT_MAX_DEPTH)
+
+        root_id = request.query_params.get('root')
+        if root_id:
+            try:
+                root_id = int(root_id)
+            except ValueError:
+                raise ValidationError({'root': 'Invalid comment ID.'})
+            root = get_object_or_404(Comment, id=root_id, post=post)
+            thread = comments.filter(path__gte=root.path, path__lt=root.path + COMMENT_PATH_END)
+            if max_depth is not None:
+                thread = thread.filter(depth__lte=root.depth + max_depth)
+            thread = thread.order_by('path')[:self.thread_limit]
+        else:
+            roots = self._get_int_param('roots', 20, 1, 100)
+            replies = self._get_int_param('replies', 3, 0, 50)
+            root_paths = list(
+                comments.filter(depth=0).order_by('path').values_list('path', flat=True)[:roots]
+            )
+            if not root_paths:
+                return Response([])
+
+            # 前 N 个根评论在路径上是连续的一段，一次范围查询取出，
+            # 再按根评论分区编号，每个分区只保留根评论和前 K 条回复
+            thread = comments.filter(path__gte=root_paths[0], path__lt=root_paths[-1] + COMMENT_PATH_END)
+            if max_depth is not None:
+                thread = thread.filter(depth__lte=max_depth)
+            thread = thread.annotate(
+                position=Window(
+                    expression=RowNumber(),
+                    partition_by=[Substr('path', 1, COMMENT_PATH_STEP)],
+                    order_by=F('path').asc()
+                )
+            ).filter(position__lte=replies + 1).order_by('path')
+
+        serializer = CommentSerializer(thread, many=True, context=self.get_serializer_context())
+        return Response(serializer.data)
+
+    def _get_int_param(self, name, default, minimum, maximum):
+        try:
+            value = int(self.request.query_params[name])
+        except (KeyError, ValueError):
+            return default
+        return min(max(value, minimum), maximum)
@@ -1,7 +1,7 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
-from django.db.models import Q, Count
+from django.db.models import Q
 from ..models import Post, SubForum
 from ..serializers import PostSearchSerializer, SubForumSearchSerializer
 
@@ -17,7 +17,7 @@ class PostSearchView(APIView):
         # 搜索标题和内容
         posts = Post.objects.filter(
             Q(title__icontains=query) | Q(content__icontains=query)
-        ).select_related('author', 'sub_forum').order_by('-created_at')
+        ).select_related('author', 'sub_forum').defer('content').order_by('-created_at')
         
         # 分页
         page = int(request.query_params.get('page', 1))
@@ -49,9 +49,7 @@ class SubForumSearchView(APIView):
         # 搜索名称和描述
         subforums = SubForum.objects.filter(
             Q(name__icontains=query) | Q(description__icontains=query)
-        ).select_related('created_by').annotate(
-            post_count=Count('posts')
-        ).order_by('-created_at')
+        ).select_related('created_by').order_by('-created_at')
         
         # 分页
         page = int(request.query_params.get('page', 1))
@@ -1,10 +1,16 @@
 from rest_framework import status
-from rest_framework.generics import CreateAPIView
+from rest_framework.generics import CreateAPIView, GenericAPIView
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from django.core.exceptions import ObjectDoesNotExist
-from ..models import Vote, Post, Comment
-from ..serializers import VoteSerializer
+from django.db import transaction
+from django.db.models import F
+from ..models import Post, Comment, VOTE_MODELS
+from ..serializers import VoteSerializer, VoteBatchSerializer
+from ..ranking import record_post_activity
+from ..counters import increment_counter, read_counter
+from ..voting import write_votes, get_vote_buffer
+from ..leaderboards import record_likes
 
 class VoteCreateAPIView(CreateAPIView):
     serializer_class = VoteSerializer
@@ -20,26 +26,102 @@ class VoteCreateAPIView(CreateAPIView):
         
         try:
             if target_type == 'post':
-                Post.objects.get(id=target_id)
+                target = Post.objects.get(id=target_id)
             elif target_type == 'comment':
-                Comment.objects.get(id=target_id)
+                target = Comment.objects.annotate(sub_forum_id=F('post__sub_forum_id')).get(id=target_id)
         except ObjectDoesNotExist:
             return Response(
                 {'detail': f'Target {target_type} with id {target_id} does not exist'},
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        # Try to get existing vote or create new one
-        vote, created = Vote.objects.get_or_create(
-            user=request.user,
-            target_type=target_type,
-            target_id=target_id,
-            defaults={'value': 'like'}
-        )
+        vote_buffer = get_vote_buffer()
+        if vote_buffer is not None:
+            return self.create_buffered(vote_buffer, target_type, target)
+
+        # Try to get existing vote or create new one, and bump the target's
+        # like tally in the same transaction
+        sharded = False
+        with transaction.atomic():
+            vote_model = VOTE_MODELS[target_type]
+            vote, created = vote_model.objects.get_or_create(
+                user=request.user,
+                defaults={'value': 'like'},
+                **{vote_model.target_field: target}
+            )
+            if created:
+                sharded = increment_counter(target, 'like_count')
+                record_likes(target_type, [(target, 1)])
+                target.refresh_from_db(fields=['like_count'])
+
+        # 帖子获得新的点赞时更新热度，分片计数的热门帖子在合并分片时统一更新
+        if created and target_type == 'post' and not sharded:
+            record_post_activity(target, likes=1)
 
-        # Return the serialized vote data
+        # Return the serialized vote data along with the current tally
         response_serializer = self.get_serializer(vote)
+        data = dict(response_serializer.data)
+        data['like_count'] = read_counter(target, 'like_count')
         return Response(
-            response_serializer.data,
+            data,
             status=status.HTTP_201_CREATED if created else status.HTTP_200_OK
-        ) 
\ No newline at end of file
+        )
+
+    def create_buffered(self, vote_buffer, target_type, target):
+        """
+        Write-behind path: queue the like and let the buffer flush it in a batch
+        """
+        vote_model = VOTE_MODELS[target_type]
+        vote = vote_model.objects.filter(
+            user=self.request.user,
+            **{vote_model.target_field: target}
+        ).first()
+        if vote is not None:
+            data = dict(self.get_serializer(vote).data)
+            data['like_count'] = read_counter(target, 'like_count')
+            return Response(data, status=status.HTTP_200_OK)
+
+        vote_buffer.add(self.request.user.id, target_type, target.pk)
+        return Response({
+            'user': self.request.user.id,
+            'target_type': target_type,
+            'target_id': target.pk,
+            'value': 'like',
+            'status': 'queued',
+            'like_count': read_counter(target, 'like_count'),
+        }, status=status.HTTP_202_ACCEPTED)
+
+
+class VoteBatchAPIView(GenericAPIView):
+    """
+    Like many posts/comments in one request, e.g. replaying queued offline likes
+    """
+    serializer_class = VoteBatchSerializer
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        items = serializer.validated_data['votes']
+
+        # One IN query per target type checks existence, then all new votes
+        # are inserted in a single transaction
+        created, found = write_votes(
+            (request.user.id, item['target_type'], item['target_id']) for item in items
+        )
+
+        # Repeated items in the same batch report 'exists' after the first one
+        results = []
+        reported = set()
+        for item in items:
+            target_type, target_id = item['target_type'], item['target_id']
+            key = (request.user.id, target_type, target_id)
+            if (target_type, target_id) not in found:
+                result = 'not_found'
+            elif key in created and key not in reported:
+                result = 'created'
+            else:
+                result = 'exists'
+            reported.add(key)
+            results.append({'target_type': target_type, 'target_id': target_id, 'status': result})
+        return Response({'results': results}, status=status.HTTP_200_OK)
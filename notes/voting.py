@@ -0,0 +1,247 @@
+import atexit
+import glob
+import json
+import logging
+import os
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.db import transaction, close_old_connections
+from django.db.models import F
+
+from .models import Post, Comment, VOTE_MODELS
+from .counters import increment_counters
+from .ranking import record_posts_likes
+from .leaderboards import record_likes
+
+logger = logging.getLogger(__name__)
+
+TARGET_MODELS = {'post': Post, 'comment': Comment}
+# 只读取更新计数、热度和排行榜分桶需要的列
+TARGET_FIELDS = {
+    'post': ('id', 'counters_sharded', 'sub_forum_id', 'created_at'),
+    'comment': ('id', 'counters_sharded'),
+}
+
+
+def write_votes(keys):
+    """
+    批量写入点赞，keys 为 (user_id, target_type, target_id)
+    已存在的点赞和不存在的目标会被跳过；同一事务内 bulk_create，
+    并把同一目标的多个点赞合并为一次计数增量
+    返回 (新建的 key 集合, 存在的 (target_type, target_id) 集合)
+    """
+    grouped = {}
+    for user_id, target_type, target_id in keys:
+        grouped.setdefault(target_type, set()).add((user_id, target_id))
+
+    created = set()
+    found = set()
+    with transaction.atomic():
+        for target_type, pairs in grouped.items():
+            targets = TARGET_MODELS[target_type].objects.filter(
+                id__in={target_id for _, target_id in pairs}
+            ).only(*TARGET_FIELDS[target_type])
+            if target_type == 'comment':
+                targets = targets.annotate(sub_forum_id=F('post__sub_forum_id'))
+            targets = targets.in_bulk()
+            found.update((target_type, target_id) for target_id in targets)
+
+            vote_model = VOTE_MODELS[target_type]
+            target_column = f'{vote_model.target_field}_id'
+            existing = set(
+                vote_model.objects.filter(
+                    user_id__in={user_id for user_id, _ in pairs},
+                    **{f'{target_column}__in': list(targets)}
+                ).values_list('user_id', target_column)
+            )
+            new = [
+                (user_id, target_id) for user_id, target_id in pairs
+                if target_id in targets and (user_id, target_id) not in existing
+            ]
+            vote_model.objects.bulk_create([
+                vote_model(user_id=user_id, value='like', **{target_column: target_id})
+                for user_id, target_id in new
+            ], ignore_conflicts=True)
+            created.update((user_id, target_type, target_id) for user_id, target_id in new)
+
+            # 获得相同点赞数的目标合并为一条 UPDATE
+            likes = Counter(target_id for _, target_id in new)
+            by_delta = {}
+            for target_id, n in likes.items():
+                by_delta.setdefault(n, []).append(targets[target_id])
+            sharded = set()
+            for n, objs in by_delta.items():
+                sharded |= increment_counters(objs, 'like_count', n)
+            record_likes(target_type, [(targets[target_id], n) for target_id, n in likes.items()])
+
+            if target_type == 'post':
+                # 分片计数的热门帖子在合并分片时统一更新热度
+                record_posts_likes([
+                    (targets[target_id], n) for target_id, n in likes.items() if target_id not in sharded
+                ])
+    return created, found
+
+
+class VoteBuffer:
+    """
+    点赞写缓冲
+    请求线程只把点赞放入内存（同一用户对同一目标去重）并追加到 spool 文件，
+    后台线程每隔 flush_interval 秒用 write_votes 批量写入数据库
+    """
+    def __init__(self, spool_path=None, flush_interval=None, max_batch=1000):
+        self.spool_path = spool_path
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self.pending = {}
+        self.lock = threading.Lock()
+        self.flush_lock = threading.Lock()
+        self.wake = threading.Event()
+        self.spool = None
+        self.flusher = None
+
+    def add(self, user_id, target_type, target_id):
+        """
+        缓冲一个点赞，已在缓冲区中时返回 False
+        """
+        key = (user_id, target_type, target_id)
+        with self.lock:
+            if key in self.pending:
+                return False
+            if self.spool_path:
+                if self.spool is None:
+                    self.spool = open(self.spool_path, 'a', encoding='utf-8')
+                self.spool.write(json.dumps(key) + '\n')
+                self.spool.flush()
+            self.pending[key] = None
+            full = len(self.pending) >= self.max_batch
+
+        self.start_flusher()
+        if full:
+            self.wake.set()
+        return True
+
+    def flush(self):
+        """
+        把缓冲区写入数据库，返回新建的点赞数
+        写入成功后才删除对应的 spool 文件，失败时放回缓冲区等待下次写入
+        """
+        with self.flush_lock:
+            with self.lock:
+                if not self.pending:
+                    return 0
+                keys = list(self.pending)
+                # 先改名 spool 文件再清空缓冲区，改名失败时点赞仍留在缓冲区中
+                rotated = self.rotate_spool()
+                self.pending = {}
+
+            try:
+                created, _ = write_votes(keys)
+            except Exception:
+                with self.lock:
+                    for key in keys:
+                        self.pending.setdefault(key, None)
+                raise
+
+            if rotated:
+                os.remove(rotated)
+            return len(created)
+
+    def rotate_spool(self):
+        """
+        把当前 spool 文件改名，新的点赞写入新文件；调用方需持有 self.lock
+        """
+        if self.spool is None:
+            return None
+        rotated = f'{self.spool_path}.{time.time_ns()}.flushing'
+        # 改名成功后才关闭文件，失败时继续追加到原来的 spool 文件
+        os.replace(self.spool_path, rotated)
+        self.spool.close()
+        self.spool = None
+        return rotated
+
+    def start_flusher(self):
+        if not self.flush_interval or self.flusher is not None:
+            return
+        with self.lock:
+            if self.flusher is not None:
+                return
+            self.flusher = threading.Thread(target=self.run, name='vote-buffer-flusher', daemon=True)
+            self.flusher.start()
+        atexit.register(self.flush)
+
+    def run(self):
+        while True:
+            self.wake.wait(self.flush_interval)
+            self.wake.clear()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception('Failed to flush vote buffer')
+            finally:
+                close_old_connections()
+
+
+def _process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        # 进程存在但属于其他用户
+        return True
+    return True
+
+
+def replay_spool(spool_path, chunk_size=1000):
+    """
+    重放 spool_path 前缀下所有遗留的 spool 文件（进程崩溃后未写入的点赞）
+    文件名中的 pid 对应的进程仍在运行时跳过：它的 spool 文件和正在写入的 .flushing 文件由该进程自己处理
+    write_votes 会跳过已存在的点赞，重复重放是安全的
+    返回新建的点赞数
+    """
+    created = 0
+    for path in sorted(glob.glob(f'{spool_path}.*')):
+        # <spool_path>.<pid> 或 <spool_path>.<pid>.<ns>.flushing
+        pid = path[len(spool_path) + 1:].split('.', 1)[0]
+        if pid.isdigit() and _process_alive(int(pid)):
+            continue
+        keys = []
+        with open(path, encoding='utf-8') as spool:
+            for line in spool:
+                try:
+                    user_id, target_type, target_id = json.loads(line)
+                except ValueError:
+                    # 崩溃时写了一半的最后一行
+                    continue
+                if target_type in TARGET_MODELS:
+                    keys.append((user_id, target_type, target_id))
+        for start in range(0, len(keys), chunk_size):
+            created += len(write_votes(keys[start:start + chunk_size])[0])
+        os.remove(path)
+    return created
+
+
+_vote_buffer = None
+_vote_buffer_lock = threading.Lock()
+
+
+def get_vote_buffer():
+    """
+    返回当前进程的点赞写缓冲，未开启 VOTE_BUFFER_ENABLED 时返回 None
+    每个进程使用独立的 spool 文件：<VOTE_BUFFER_SPOOL_PATH>.<pid>
+    """
+    global _vote_buffer
+    if not getattr(settings, 'VOTE_BUFFER_ENABLED', False):
+        return None
+    with _vote_buffer_lock:
+        if _vote_buffer is None:
+            spool_path = getattr(settings, 'VOTE_BUFFER_SPOOL_PATH', None)
+            _vote_buffer = VoteBuffer(
+                spool_path=f'{spool_path}.{os.getpid()}' if spool_path else None,
+                flush_interval=getattr(settings, 'VOTE_BUFFER_FLUSH_INTERVAL', 0.25),
+                max_batch=getattr(settings, 'VOTE_BUFFER_MAX_BATCH', 1000),
+            )
+    return _vote_buffer
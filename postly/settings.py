@@ -78,8 +78,10 @@ INSTALLED_APPS = [
 ]
 
 REST_FRAMEWORK = {
+    # 从令牌中的 role / is_banned / auth_version 声明构造用户，不再每个请求查询 users 表；
+    # 换回 rest_framework_simplejwt.authentication.JWTAuthentication 即恢复为每次查询数据库
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'notes.authentication.ClaimsJWTAuthentication',
     ],
     'DEFAULT_THROTTLE_CLASSES': [
         'rest_framework.throttling.ScopedRateThrottle',
@@ -90,6 +92,13 @@ REST_FRAMEWORK = {
     }
 }
 
+# 点赞写缓冲：开启后 /api/votes/ 只把点赞放入进程内缓冲区，由后台线程定期批量写入
+VOTE_BUFFER_ENABLED = False
+VOTE_BUFFER_FLUSH_INTERVAL = 0.25  # 秒
+VOTE_BUFFER_MAX_BATCH = 1000  # 缓冲区达到该数量时立即写入
+# 缓冲的点赞同时追加到 <path>.<pid> 文件，进程崩溃后用 replay_vote_spool 命令重放；None 表示不落盘
+VOTE_BUFFER_SPOOL_PATH = None
+
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(days=7),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=14),
@@ -112,8 +121,15 @@ SIMPLE_JWT = {
     'TOKEN_TYPE_CLAIM': 'token_type',
 
     'JTI_CLAIM': 'jti',
+
+    # 刷新令牌时写入最新的 role / is_banned / auth_version 声明
+    'TOKEN_REFRESH_SERIALIZER': 'notes.authentication.ClaimsTokenRefreshSerializer',
 }
 
+# 每隔多少秒清理一次过期的 OutstandingToken / BlacklistedToken，设置后服务进程（postly.wsgi / postly.asgi，包括 runserver）启动时启动后台线程；
+# 每个设置了它的进程都会各自清理，多进程部署只在一个进程中设置，或者保持 None 并用 cron 运行 purge_expired_tokens 命令
+TOKEN_PURGE_INTERVAL = None
+
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
@@ -158,6 +174,19 @@ DATABASES = {
 }
 
 
+# Cache
+# 封禁状态、auth_version 和令牌黑名单版本依赖缓存失效在进程之间同步，多进程部署必须换成共享的后端，例如：
+#   'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': 'redis://127.0.0.1:6379'
+#   'BACKEND': 'django.core.cache.backends.db.DatabaseCache', 'LOCATION': 'django_cache'（先运行 createcachetable）
+# 默认的进程内缓存不在进程之间共享，以下功能保持关闭，直到配置了上面这样的共享后端（见 notes.caching.cache_is_shared）：
+#   - 封禁状态和 auth_version 不缓存，每次请求查询数据库
+#   - 令牌黑名单的布隆过滤器不使用，每次刷新和登出都查询黑名单表
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
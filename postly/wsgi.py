@@ -14,3 +14,9 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'postly.settings')
 
 application = get_wsgi_application()
+
+# 设置了 TOKEN_PURGE_INTERVAL 时启动定期清理过期令牌的后台线程
+# 只有服务进程会加载本模块，管理命令（migrate、test、shell 等）和 runserver 的自动重载父进程不会启动它
+from notes.blacklist import start_token_purger  # noqa: E402
+
+start_token_purger()